@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 # URL of the frontend application, used for redirects after OAuth
@@ -43,8 +44,42 @@ env = environ.Env(
     STRIPE_PUBLISHABLE_KEY=(str, ''),
     GOOGLE_DEVELOPER_TOKEN=(str, ''), # Added GOOGLE_DEVELOPER_TOKEN
     GOOGLE_LOGIN_CUSTOMER_ID=(str, ''), # Added GOOGLE_LOGIN_CUSTOMER_ID (optional for MCC)
+    GOOGLE_ADS_MAX_WORKERS=(int, 8), # Concurrent per-customer Google Ads queries
+    GOOGLE_ADS_CLIENT_CACHE_SIZE=(int, 32), # Max pooled GoogleAdsClient instances per process
+    GOOGLE_ADS_CLIENT_CACHE_TTL=(int, 1800), # Seconds a pooled GoogleAdsClient is reused
+    GOOGLE_TOKEN_REFRESH_MARGIN=(int, 300), # Refresh stored access tokens this many seconds before expiry
+    GOOGLE_ADS_HIERARCHY_TTL=(int, 86400), # Seconds before a stored account hierarchy snapshot is re-walked
+    GOOGLE_ADS_HIERARCHY_MODE=(str, 'flat'), # 'flat' (single customer_client query) or 'tree' (concurrent BFS)
+    GOOGLE_ADS_COST_STORE_ENABLED=(bool, True), # Serve per-day campaign costs from the local store, fetching only gaps
+    GOOGLE_ADS_COST_MUTABLE_DAYS=(int, 3), # Recent days that are always re-fetched because Google may still adjust them
+    REPORT_STORE_ENABLED=(bool, True), # Persist every combined report run into ReportRecord
+    REPORT_WORKER_CONCURRENCY=(int, 2), # Report jobs run side by side by one run_report_worker process
+    REPORT_JOB_STALE_SECONDS=(int, 1800), # A running job older than this is assumed orphaned and re-queued
+    REPORT_JOB_MAX_ATTEMPTS=(int, 3), # Give up on a job after this many claims
+    COMBINED_CACHE_ENABLED=(bool, True), # Serve /api/combined-report/ from a stale-while-revalidate cache
+    COMBINED_CACHE_FRESH_TTL=(int, 300), # Seconds a cached combined report is served without a refresh
+    COMBINED_CACHE_STALE_TTL=(int, 86400), # Seconds a cached combined report may be served while it is refreshed
+    SINGLE_FLIGHT_LOCK_DIR=(str, ''), # Directory for cross-worker report locks (default: <tmp>/google-binom-reporter-locks)
+    SINGLE_FLIGHT_LOCK_TIMEOUT=(float, 120), # Seconds to wait for another worker's identical report before fetching anyway
+    SINGLE_FLIGHT_RESULT_TTL=(int, 60), # Seconds a coalesced result is kept for workers that waited on it
+    SERVER_TIMING_ENABLED=(bool, True), # Add Server-Timing headers and per-request stage timing logs
+    SERVER_TIMING_TOP_CUSTOMERS=(int, 5), # Slowest Google Ads customers listed in the Server-Timing header
+    METRICS_AUTH_TOKEN=(str, ''), # Bearer token Prometheus uses for /api/metrics/ (empty: Google users/superusers only)
+    METRICS_CUSTOMER_LABELS=(bool, False), # Label Google Ads call metrics with the customer ID (one series set per customer)
     BINOM_API_KEY=(str, ''), # Define schema for Binom API Key
-    BINOM_API_URL=(str, '')  # Define schema for Binom API URL
+    BINOM_API_URL=(str, ''),  # Define schema for Binom API URL
+    BINOM_CONNECT_TIMEOUT=(float, 5), # Seconds to establish a connection to Binom
+    BINOM_READ_TIMEOUT=(float, 60), # Seconds to wait for Binom to send data
+    BINOM_MAX_RETRIES=(int, 3), # Retries on 429/5xx, connection errors and timeouts
+    BINOM_RETRY_BACKOFF=(float, 0.5), # Base delay (seconds) for exponential backoff
+    BINOM_RETRY_BACKOFF_MAX=(float, 10), # Upper bound for a single backoff delay
+    BINOM_POOL_MAXSIZE=(int, 10), # Keep-alive connections kept open to Binom per process
+    BINOM_STREAM_RESPONSES=(bool, False), # Parse Binom reports incrementally in /api/report/generate/
+    BINOM_SHARD_SIZE=(str, ''), # '', 'day' or 'week': split long Binom ranges into concurrent sub-fetches
+    BINOM_SHARD_MAX_WORKERS=(int, 4), # Max concurrent Binom shard requests
+    BINOM_CACHE_ENABLED=(bool, True), # Cache Binom report responses in the 'reports' cache
+    BINOM_CACHE_PAST_TTL=(int, 86400), # Seconds to keep ranges that ended before today (immutable data)
+    BINOM_CACHE_TODAY_TTL=(int, 300), # Seconds to keep ranges that include today
 )
 
 # Read .env file located at the project root (backend/.env)
@@ -94,6 +129,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # important for React frontend CORS
+    'reports.metrics.RequestMetricsMiddleware',  # Per-view latency histograms for /api/metrics/
+    'reports.timing.ServerTimingMiddleware',  # Server-Timing header + per-stage timing logs
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -166,6 +203,28 @@ if ENVIRONMENT == "production":
     DATABASES['default']['CONN_MAX_AGE'] = 600
     DATABASES['default']['SSL_REQUIRE'] = True
 
+# Caches
+# 'reports' holds upstream report results (Binom responses, ...). It must be shared by every
+# gunicorn worker, so it defaults to a file-based cache; point REPORT_CACHE_URL at Redis or
+# Memcached (e.g. rediscache://host:6379/1) when running on more than one host.
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='locmemcache://'),
+    'reports': env.cache_url(
+        'REPORT_CACHE_URL',
+        default=f'filecache://{Path(tempfile.gettempdir()) / "google-binom-reporter-cache"}'
+    ),
+}
+
+# Django REST framework
+# ORJSONRenderer writes the same JSON as DRF's JSONRenderer, several times faster for large
+# reports (and is the stdlib JSONRenderer when orjson isn't installed).
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'reports.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
 # Email settings
 EMAIL_BACKEND = env('EMAIL_BACKEND')
 EMAIL_HOST = env('EMAIL_HOST')
@@ -182,6 +241,28 @@ GOOGLE_CLIENT_ID = env('GOOGLE_CLIENT_ID')
 GOOGLE_CLIENT_SECRET = env('GOOGLE_CLIENT_SECRET')
 GOOGLE_DEVELOPER_TOKEN = env('GOOGLE_DEVELOPER_TOKEN')
 GOOGLE_LOGIN_CUSTOMER_ID = env('GOOGLE_LOGIN_CUSTOMER_ID') # Optional, defaults to '' if not in .env
+GOOGLE_ADS_MAX_WORKERS = env('GOOGLE_ADS_MAX_WORKERS') # Thread pool size for per-customer cost fetching
+GOOGLE_ADS_CLIENT_CACHE_SIZE = env('GOOGLE_ADS_CLIENT_CACHE_SIZE')
+GOOGLE_ADS_CLIENT_CACHE_TTL = env('GOOGLE_ADS_CLIENT_CACHE_TTL')
+GOOGLE_TOKEN_REFRESH_MARGIN = env('GOOGLE_TOKEN_REFRESH_MARGIN')
+GOOGLE_ADS_HIERARCHY_TTL = env('GOOGLE_ADS_HIERARCHY_TTL')
+GOOGLE_ADS_HIERARCHY_MODE = env('GOOGLE_ADS_HIERARCHY_MODE')
+GOOGLE_ADS_COST_STORE_ENABLED = env('GOOGLE_ADS_COST_STORE_ENABLED')
+GOOGLE_ADS_COST_MUTABLE_DAYS = env('GOOGLE_ADS_COST_MUTABLE_DAYS')
+REPORT_STORE_ENABLED = env('REPORT_STORE_ENABLED')
+REPORT_WORKER_CONCURRENCY = env('REPORT_WORKER_CONCURRENCY')
+REPORT_JOB_STALE_SECONDS = env('REPORT_JOB_STALE_SECONDS')
+REPORT_JOB_MAX_ATTEMPTS = env('REPORT_JOB_MAX_ATTEMPTS')
+COMBINED_CACHE_ENABLED = env('COMBINED_CACHE_ENABLED')
+COMBINED_CACHE_FRESH_TTL = env('COMBINED_CACHE_FRESH_TTL')
+COMBINED_CACHE_STALE_TTL = env('COMBINED_CACHE_STALE_TTL')
+SINGLE_FLIGHT_LOCK_DIR = env('SINGLE_FLIGHT_LOCK_DIR')
+SINGLE_FLIGHT_LOCK_TIMEOUT = env('SINGLE_FLIGHT_LOCK_TIMEOUT')
+SINGLE_FLIGHT_RESULT_TTL = env('SINGLE_FLIGHT_RESULT_TTL')
+SERVER_TIMING_ENABLED = env('SERVER_TIMING_ENABLED')
+SERVER_TIMING_TOP_CUSTOMERS = env('SERVER_TIMING_TOP_CUSTOMERS')
+METRICS_AUTH_TOKEN = env('METRICS_AUTH_TOKEN')
+METRICS_CUSTOMER_LABELS = env('METRICS_CUSTOMER_LABELS')
 STRIPE_SECRET_KEY = env('STRIPE_SECRET_KEY')
 STRIPE_PUBLISHABLE_KEY = env('STRIPE_PUBLISHABLE_KEY')
 STRIPE_WEBHOOK_SECRET = env('STRIPE_WEBHOOK_SECRET')
@@ -189,6 +270,18 @@ STRIPE_WEBHOOK_SECRET = env('STRIPE_WEBHOOK_SECRET')
 # Binom API Settings
 BINOM_API_KEY = env('BINOM_API_KEY')
 BINOM_API_URL = env('BINOM_API_URL')
+BINOM_CONNECT_TIMEOUT = env('BINOM_CONNECT_TIMEOUT')
+BINOM_READ_TIMEOUT = env('BINOM_READ_TIMEOUT')
+BINOM_MAX_RETRIES = env('BINOM_MAX_RETRIES')
+BINOM_RETRY_BACKOFF = env('BINOM_RETRY_BACKOFF')
+BINOM_RETRY_BACKOFF_MAX = env('BINOM_RETRY_BACKOFF_MAX')
+BINOM_POOL_MAXSIZE = env('BINOM_POOL_MAXSIZE')
+BINOM_STREAM_RESPONSES = env('BINOM_STREAM_RESPONSES')
+BINOM_SHARD_SIZE = env('BINOM_SHARD_SIZE')
+BINOM_SHARD_MAX_WORKERS = env('BINOM_SHARD_MAX_WORKERS')
+BINOM_CACHE_ENABLED = env('BINOM_CACHE_ENABLED')
+BINOM_CACHE_PAST_TTL = env('BINOM_CACHE_PAST_TTL')
+BINOM_CACHE_TODAY_TTL = env('BINOM_CACHE_TODAY_TTL')
 
 # Static files (CSS, JavaScript, Images)
 # Ensure this is defined only once and correctly.
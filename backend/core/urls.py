@@ -10,7 +10,13 @@ urlpatterns = [
     path('api/google-ads/test/', views.google_ads_test_view, name='google_ads_test'),
     path('api/report/generate/', views.generate_report, name='generate_report'),
     path('api/google-ads/manager-check/', views.google_ads_manager_check, name='google_ads_manager_check'),
+    path('api/google-ads/hierarchy/refresh/', views.google_ads_hierarchy_refresh, name='google_ads_hierarchy_refresh'),
     path('api/combined-report/', views.combined_report_view, name='combined_report'),
+    path('api/combined-report/export/<str:export_format>/', views.combined_report_export, name='combined_report_export'),
+    path('api/combined-report/jobs/', views.combined_report_job_create, name='combined_report_jobs'),
+    path('api/combined-report/jobs/<int:job_id>/', views.combined_report_job_status, name='combined_report_job'),
+    path('api/report/history/', views.report_history_view, name='report_history'),
+    path('api/metrics/', views.metrics_view, name='metrics'),
     path('api/auth/user/', views.user_status_view, name='user_status'),
     path('api/auth/logout/', views.logout_view, name='logout'),
 ]
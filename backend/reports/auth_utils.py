@@ -70,3 +70,23 @@ def exchange_code_for_tokens(code, redirect="backend"):
         raise ValueError("Email not found in Google userinfo response.")
     tokens_data["user_email"] = user_email
     return tokens_data
+
+
+def refresh_access_token(refresh_token):
+    """
+    Mints a new access token from a refresh token.
+    Returns Google's token response (access_token, expires_in, ...).
+    """
+    url = "https://oauth2.googleapis.com/token"
+    data = {
+        "client_id": settings.GOOGLE_CLIENT_ID,
+        "client_secret": settings.GOOGLE_CLIENT_SECRET,
+        "refresh_token": refresh_token,
+        "grant_type": "refresh_token",
+    }
+    response = requests.post(url, data=data, timeout=getattr(settings, 'GOOGLE_OAUTH_TIMEOUT', 10))
+    response.raise_for_status()
+    tokens_data = response.json()
+    if not tokens_data.get("access_token"):
+        raise ValueError("Access token not found in Google's token response.")
+    return tokens_data
@@ -1,12 +1,46 @@
 # backend/reports/binom_service.py
+import codecs
+import json
+import logging
+import random
+import threading
+import time
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlencode
+from . import metrics
 
 BINOM_API_URL = settings.BINOM_API_URL
 BINOM_API_KEY = settings.BINOM_API_KEY
 
-def fetch_binom_data(
+# Status codes worth retrying: rate limiting and transient server/proxy failures.
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_binom_session():
+    """
+    Returns the process-wide requests.Session used for Binom calls.
+    Connections are kept alive and pooled, so repeated reports skip the TCP/TLS handshake.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            pool_size = getattr(settings, 'BINOM_POOL_MAXSIZE', 10)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def build_binom_params(
     start_date,
     end_date,
     timezone_value="America/Atikokan",
@@ -28,12 +62,208 @@ def fetch_binom_data(
             params.append(('trafficSourceIds[]', tid))
     else:
         params.append(('trafficSourceIds[]', str(traffic_source_ids).strip()))
+    return params
+
+
+def _backoff_delay(retry_number, retry_after=None):
+    """Exponential backoff with jitter; honours a numeric Retry-After header when present."""
+    cap = getattr(settings, 'BINOM_RETRY_BACKOFF_MAX', 10)
+    if retry_after:
+        try:
+            return min(float(retry_after), cap)
+        except ValueError:
+            pass
+    delay = min(cap, getattr(settings, 'BINOM_RETRY_BACKOFF', 0.5) * (2 ** retry_number))
+    return delay / 2 + random.uniform(0, delay / 2)
+
 
+def request_binom(params, stream=False, stats=None):
+    """
+    Sends one Binom report request through the pooled session.
+
+    Connection errors, timeouts and RETRY_STATUS_CODES are retried up to BINOM_MAX_RETRIES
+    times with jittered exponential backoff. When a ``stats`` dict is passed it is filled with
+    the duration (ms, including backoff), the number of retries and the final status code.
+    """
     headers = {
         "Api-Key": BINOM_API_KEY,
         "cache-control": "no-cache"
     }
     url = f"{BINOM_API_URL}?{urlencode(params, doseq=True)}"
-    response = requests.get(url, headers=headers)
+    timeout = (
+        getattr(settings, 'BINOM_CONNECT_TIMEOUT', 5),
+        getattr(settings, 'BINOM_READ_TIMEOUT', 60),
+    )
+    max_retries = getattr(settings, 'BINOM_MAX_RETRIES', 3)
+    session = get_binom_session()
+    started = time.monotonic()
+    retries = 0
+    response = None
+    try:
+        while True:
+            try:
+                response = session.get(url, headers=headers, timeout=timeout, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if retries >= max_retries:
+                    raise
+                delay = _backoff_delay(retries)
+                logger.warning(f"Binom request failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or retries >= max_retries:
+                    break
+                delay = _backoff_delay(retries, response.headers.get("Retry-After"))
+                logger.warning(f"Binom returned {response.status_code}, retrying in {delay:.2f}s")
+                response.close()
+            retries += 1
+            time.sleep(delay)
+    finally:
+        duration_ms = round((time.monotonic() - started) * 1000, 1)
+        status_code = response.status_code if response is not None else None
+        logger.info(f"Binom request finished: status={status_code} duration_ms={duration_ms} retries={retries}")
+        endpoint = "report-stream" if stream else "report"
+        metrics.observe_upstream("binom", endpoint, duration_ms / 1000, status_code or "error")
+        metrics.count_retries("binom", endpoint, retries)
+        if stats is not None:
+            stats.update({"duration_ms": duration_ms, "retries": retries, "status_code": status_code})
     response.raise_for_status()
+    return response
+
+
+def fetch_binom_data(
+    start_date,
+    end_date,
+    timezone_value="America/Atikokan",
+    traffic_source_ids="1,6",
+    date_type="custom-time",
+    stats=None
+):
+    params = build_binom_params(start_date, end_date, timezone_value, traffic_source_ids, date_type)
+    response = request_binom(params, stats=stats)
     return response.json()
+
+
+class _JSONStreamReader:
+    """
+    Minimal incremental reader over a stream of JSON text chunks.
+
+    Only what is needed to walk a top-level array (or the array under one top-level key)
+    one element at a time: each element is decoded with json's C decoder as soon as it
+    is complete, and consumed text is discarded so the buffer stays about one chunk long.
+    """
+
+    _WHITESPACE = " \t\n\r"
+    _NUMBER_CHARS = frozenset("0123456789.eE+-")
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            return False
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            text = self._text_decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self._buffer += text
+                return True
+        self._buffer += self._text_decoder.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def peek(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in self._WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Malformed Binom response: expected '{char}' at offset {self._pos}")
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number followed by nothing but number characters (none at all, or a cut-off
+            # "12." / "1e" / "1e+") may continue in the next chunk.
+            if isinstance(value, (int, float)) and self._NUMBER_CHARS.issuperset(self._buffer[end:]) \
+                    and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def array_items(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"Malformed Binom response: unexpected '{separator}' in array")
+
+
+def iter_json_array(chunks, key="data"):
+    """
+    Yields the elements of a top-level JSON array, or of the array stored under ``key`` in a
+    top-level object, while the document is still being received. An object without that
+    array (e.g. Binom's {"error": ...} body) raises ValueError carrying the object's content.
+    """
+    reader = _JSONStreamReader(chunks)
+    first = reader.peek()
+    if first == "[":
+        yield from reader.array_items()
+        return
+    reader.expect("{")
+    skipped = {}
+    while reader.peek() not in ("}", ""):
+        name = reader.value()
+        reader.expect(":")
+        if name == key and reader.peek() == "[":
+            yield from reader.array_items()
+            return
+        skipped[name] = reader.value()
+        if reader.peek() == ",":
+            reader.expect(",")
+    raise ValueError(f"Binom response has no '{key}' array: {json.dumps(skipped, default=str)[:500]}")
+
+
+def iter_binom_rows(
+    start_date,
+    end_date,
+    timezone_value="America/Atikokan",
+    traffic_source_ids="1,6",
+    date_type="custom-time",
+    stats=None
+):
+    """
+    Streaming variant of fetch_binom_data: yields report rows as they are parsed from the
+    response body instead of loading the whole payload first.
+    """
+    params = build_binom_params(start_date, end_date, timezone_value, traffic_source_ids, date_type)
+    response = request_binom(params, stream=True, stats=stats)
+    chunk_size = getattr(settings, 'BINOM_STREAM_CHUNK_SIZE', 64 * 1024)
+    try:
+        yield from iter_json_array(response.iter_content(chunk_size=chunk_size))
+    finally:
+        response.close()
@@ -0,0 +1,111 @@
+# backend/reports/columnar.py
+"""
+Column-oriented report payloads: {'columns': [...], 'types': {...}, 'data': {column: [values]}}.
+
+Used by the Parquet/Arrow renderers, which turn the typed columns straight into an Arrow
+table, and by the ?layout=columns JSON mode. 'types' uses plain names (string, float, int,
+date) so JSON clients can read it too.
+"""
+from datetime import date
+from .rows import export_values
+
+COMBINED_TYPES = {
+    'Account': 'string',
+    'Campaign': 'string',
+    'Total Spend': 'float',
+    'Revenue': 'float',
+    'P/L': 'float',
+    'ROI': 'float',
+    'Sales': 'int',
+    'Start Date': 'date',
+    'End Date': 'date',
+}
+
+# ?layout=columns of /api/combined-report/: the row layout's fields, with Sales as a number.
+COMBINED_JSON_TYPES = {
+    'Account': 'string',
+    'Campaign': 'string',
+    'Total Spend': 'float',
+    'Revenue': 'float',
+    'Sales': 'int',
+}
+
+# ?layout=columns of /api/report/generate/ (filter_binom_rows output).
+BINOM_TYPES = {
+    'id': 'string',
+    'name': 'string',
+    'leads': 'int',
+    'revenue': 'float',
+}
+
+HISTORY_GROUP_TYPES = {
+    'account_name': 'string',
+    'campaign_name': 'string',
+    'start_date': 'date',
+}
+
+HISTORY_TYPES = {
+    'total_spend': 'float',
+    'revenue': 'float',
+    'pl': 'float',
+    'roi': 'float',
+    'sales': 'int',
+}
+
+
+def _as_date(value):
+    if isinstance(value, date) or value is None:
+        return value
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _as_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+_CASTS = {
+    'string': lambda value: None if value is None else str(value),
+    'float': lambda value: None if value is None else float(value),
+    'int': _as_int,
+    'date': _as_date,
+}
+
+
+def to_columns(records, types):
+    """Column payload for ``records`` (sequences in ``types`` order), with every value cast to its column type."""
+    columns = list(types)
+    data = {column: [] for column in columns}
+    appends = [(data[column].append, _CASTS[types[column]]) for column in columns]
+    for record in records:
+        for (append, cast), value in zip(appends, record):
+            append(cast(value))
+    return {'columns': columns, 'types': dict(types), 'data': data}
+
+
+def combined_columns(rows, start_date, end_date):
+    """Combined report CampaignRows as columns (EXPORT_FIELDS plus the report's date range)."""
+    dates = (start_date, end_date)
+    return to_columns((export_values(row) + dates for row in rows), COMBINED_TYPES)
+
+
+def combined_json_columns(rows):
+    """Combined report CampaignRows as columns with the same fields as the row layout."""
+    return to_columns(((row.account, row.campaign, row.spend, row.revenue, row.sales) for row in rows), COMBINED_JSON_TYPES)
+
+
+def binom_columns(rows):
+    """filter_binom_rows dicts as columns."""
+    return to_columns(([row.get(column) for column in BINOM_TYPES] for row in rows), BINOM_TYPES)
+
+
+def history_columns(results, group_fields):
+    """History API result dicts as columns: the group key columns, then the totals."""
+    types = {column: HISTORY_GROUP_TYPES[column] for column in group_fields}
+    types.update(HISTORY_TYPES)
+    return to_columns(([result.get(column) for column in types] for result in results), types)
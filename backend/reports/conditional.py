@@ -0,0 +1,39 @@
+# backend/reports/conditional.py
+"""
+ETag / If-None-Match support for report endpoints.
+
+The ETag is a hash of the rendered body plus its content type, so an unchanged report gets
+the same tag on every poll and the client receives a bodyless 304 instead of the full
+payload. The body is rendered once, here, and hashed as bytes (no second serialization).
+"""
+import hashlib
+from functools import wraps
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework.response import Response
+from . import timing
+
+
+def report_etag(content, content_type=''):
+    digest = hashlib.blake2b(content, digest_size=16)
+    digest.update(f"\n{content_type}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_response(view):
+    """
+    Adds an ETag to successful DRF responses of a GET view and answers a matching
+    If-None-Match with 304 Not Modified. Goes above @api_view, where the response has its
+    renderer and can be rendered.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD') or response.status_code != 200 or not isinstance(response, Response):
+            return response
+        with timing.stage('serialize'):
+            response.render()
+        response['ETag'] = report_etag(response.content, response.get('Content-Type', ''))
+        # Browsers keep the body but revalidate every time, which is what makes polling cheap.
+        patch_cache_control(response, private=True, no_cache=True)
+        return get_conditional_response(request, etag=response['ETag'], response=response)
+    return wrapper
@@ -0,0 +1,117 @@
+# backend/reports/cost_store.py
+"""
+Local per-customer, per-day store of Google Ads campaign costs.
+
+A (customer, day) cell is fetched from Google Ads once and then served from the
+DailyCampaignCost table. Only cells that were never fetched, or that fall inside the
+mutable window (the last GOOGLE_ADS_COST_MUTABLE_DAYS days, where Google Ads still
+adjusts costs), are queried again.
+
+Google Ads attributes costs in each account's own timezone, which the store doesn't know,
+so the window is counted back from the earliest date still current anywhere (UTC-12): no
+account's day is treated as final before it has closed.
+"""
+from datetime import date, timedelta
+from datetime import timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+from .models import DailyCampaignCost, DailyCostCoverage
+from .rows import CampaignRow
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+# Westernmost UTC offset in use; its date is the earliest "today" of any account.
+_EARLIEST_TIMEZONE = dt_timezone(timedelta(hours=-12))
+
+
+def mutable_since():
+    """First day whose costs may still change and must always be re-fetched."""
+    today = timezone.now().astimezone(_EARLIEST_TIMEZONE).date()
+    return today - timedelta(days=getattr(settings, 'GOOGLE_ADS_COST_MUTABLE_DAYS', 3))
+
+
+def missing_date_ranges(customer_ids, start_date, end_date):
+    """
+    Returns [(customer_id, range_start, range_end)] covering every cell in the range that has
+    to be fetched, with consecutive days of one customer merged into a single range.
+    """
+    start, end = _as_date(start_date), _as_date(end_date)
+    immutable_before = mutable_since()
+    covered = set(
+        DailyCostCoverage.objects.filter(
+            customer_id__in=customer_ids,
+            date__range=(start, end),
+            date__lt=immutable_before,
+        ).values_list('customer_id', 'date')
+    )
+    ranges = []
+    for customer_id in customer_ids:
+        run_start = None
+        day = start
+        while day <= end + timedelta(days=1):
+            missing = day <= end and (customer_id, day) not in covered
+            if missing and run_start is None:
+                run_start = day
+            elif not missing and run_start is not None:
+                ranges.append((customer_id, run_start, day - timedelta(days=1)))
+                run_start = None
+            day += timedelta(days=1)
+    return ranges
+
+
+def store_daily_costs(customer_id, start_date, end_date, rows):
+    """
+    Replaces the stored costs of ``customer_id`` for the given days with ``rows`` (dicts with
+    campaign_id, campaign_name, account_name, date, cost_micros) and marks the days as covered.
+
+    Rows are upserted, then campaigns no longer present on a day are deleted, so two
+    concurrent stores of overlapping ranges can't collide on unique_daily_campaign_cost.
+    """
+    start, end = _as_date(start_date), _as_date(end_date)
+    now = timezone.now()
+    campaigns_by_day = {}
+    for row in rows:
+        campaigns_by_day.setdefault(row['date'], set()).add(row['campaign_id'])
+    with transaction.atomic():
+        DailyCampaignCost.objects.bulk_create(
+            [DailyCampaignCost(customer_id=customer_id, **row) for row in rows],
+            update_conflicts=True,
+            unique_fields=['customer_id', 'campaign_id', 'date'],
+            update_fields=['account_name', 'campaign_name', 'cost_micros', 'fetched_at'],
+            batch_size=1000,
+        )
+        stored = DailyCampaignCost.objects.filter(customer_id=customer_id, date__range=(start, end))
+        stored.exclude(date__in=list(campaigns_by_day)).delete()
+        for day, campaign_ids in campaigns_by_day.items():
+            stored.filter(date=day).exclude(campaign_id__in=campaign_ids).delete()
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        DailyCostCoverage.objects.bulk_create(
+            [DailyCostCoverage(customer_id=customer_id, date=day, fetched_at=now) for day in days],
+            update_conflicts=True,
+            unique_fields=['customer_id', 'date'],
+            update_fields=['fetched_at'],
+            batch_size=1000,
+        )
+
+
+def aggregate_campaign_costs(customer_ids, start_date, end_date):
+    """Sums the stored daily costs per campaign into the rows fetch_campaign_costs returns."""
+    totals = (
+        DailyCampaignCost.objects.filter(customer_id__in=customer_ids, date__range=(_as_date(start_date), _as_date(end_date)))
+        .values('customer_id', 'campaign_id')
+        # Names rarely change; Max just picks one deterministically when they do.
+        .annotate(cost_micros=Sum('cost_micros'), account_name=Max('account_name'), campaign_name=Max('campaign_name'))
+    )
+    return [
+        CampaignRow(
+            account=total['account_name'],
+            campaign=total['campaign_name'],
+            spend=round(total['cost_micros'] / 1_000_000, 2),
+        )
+        for total in totals
+    ]
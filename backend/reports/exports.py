@@ -0,0 +1,64 @@
+# backend/reports/exports.py
+"""
+Streaming file exports of combined report rows.
+
+The report rows are loaded (and cached) as a whole before the response starts; only the
+encoding is streamed, in chunks of EXPORT_CHUNK_ROWS, so the encoded file is never held in
+memory in one piece.
+"""
+import csv
+import io
+import json
+from .rows import EXPORT_FIELDS, export_values
+
+EXPORT_CHUNK_ROWS = 1000
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _chunks(rows, size=EXPORT_CHUNK_ROWS):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+DATE_FIELDS = ('Start Date', 'End Date')
+
+
+def iter_csv(rows, start_date, end_date):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS + DATE_FIELDS)
+    yield buffer.getvalue()
+    dates = (start_date, end_date)
+    for chunk in _chunks(rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(export_values(row) + dates for row in chunk)
+        yield buffer.getvalue()
+
+
+def iter_ndjson(rows, start_date, end_date):
+    fields = EXPORT_FIELDS + DATE_FIELDS
+    dates = (start_date, end_date)
+    for chunk in _chunks(rows):
+        yield "".join(json.dumps(dict(zip(fields, export_values(row) + dates))) + "\n" for row in chunk)
+
+
+def iter_export(export_format, rows, start_date, end_date):
+    """
+    Yields the encoded export of ``rows`` (CampaignRows), chunk by chunk.
+    """
+    if export_format == 'csv':
+        return iter_csv(rows, start_date, end_date)
+    if export_format == 'ndjson':
+        return iter_ndjson(rows, start_date, end_date)
+    raise ValueError(f"Unsupported export format: {export_format}")
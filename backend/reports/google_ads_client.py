@@ -1,7 +1,133 @@
+import logging
+import threading
+from datetime import timezone as dt_timezone
+from cachetools import TTLCache
 from django.conf import settings
+from django.db import connection
+from django.utils import timezone
 from google.ads.googleads.client import GoogleAdsClient
+from google.oauth2.credentials import Credentials
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Process-wide pool of GoogleAdsClient instances keyed by (refresh_token, login_customer_id).
+# The cache evicts least-recently-used entries once GOOGLE_ADS_CLIENT_CACHE_SIZE is reached and
+# drops entries older than GOOGLE_ADS_CLIENT_CACHE_TTL seconds. The cache itself is not
+# thread-safe, so every access goes through _client_cache_lock; building a client (which may
+# hit the DB and refresh the OAuth token) happens outside it, under a per-key lock.
+_client_cache = None
+_client_cache_lock = threading.RLock()
+_build_locks = {}
+
+
+class _PooledClient:
+    """A cached client plus the service stubs (and their gRPC channels) built from it."""
+
+    def __init__(self, client):
+        self.client = client
+        self.services = {}
+
+    def close(self):
+        for name, service in self.services.items():
+            transport = getattr(service, 'transport', None)
+            try:
+                if transport is not None:
+                    transport.close()
+            except Exception as e:
+                logger.warning(f"Could not close the gRPC channel of {name}: {e}")
+        self.services = {}
+
+
+class _ClientCache(TTLCache):
+    """TTLCache that closes the gRPC channels of clients it evicts or expires."""
+
+    def popitem(self):
+        key, pooled = super().popitem()
+        pooled.close()
+        return key, pooled
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for _, pooled in expired:
+            pooled.close()
+        return expired
+
+
+def _get_client_cache():
+    global _client_cache
+    if _client_cache is None:
+        _client_cache = _ClientCache(
+            maxsize=getattr(settings, 'GOOGLE_ADS_CLIENT_CACHE_SIZE', 32),
+            ttl=getattr(settings, 'GOOGLE_ADS_CLIENT_CACHE_TTL', 1800),
+        )
+    return _client_cache
+
+
+def _resolve_login_customer_id(login_customer_id):
+    login_cid = login_customer_id or getattr(settings, 'GOOGLE_LOGIN_CUSTOMER_ID', None)
+    if login_cid and str(login_cid).isdigit():
+        return str(login_cid)
+    return None
+
+
+def _to_google_auth_expiry(expiry):
+    # google-auth compares expiries against naive UTC datetimes.
+    if expiry is not None and timezone.is_aware(expiry):
+        expiry = timezone.make_naive(expiry, dt_timezone.utc)
+    return expiry
+
+
+def _build_stored_credentials(refresh_token):
+    """
+    Returns OAuth credentials seeded from the persisted token store, or None when the
+    refresh token does not belong to a GoogleAccount (the client then refreshes on its own).
+    Later refreshes go through the token manager too, so they are shared across workers.
+    """
+    from .token_manager import get_access_token
+
+    try:
+        access_token, expiry = get_access_token(refresh_token)
+    except Exception as e:
+        logger.warning(f"Could not load a stored access token, falling back to client-side refresh: {e}")
+        return None
+    if access_token is None:
+        return None
+
+    def _refresh_handler(request, scopes=None):
+        try:
+            token, token_expiry = get_access_token(refresh_token)
+        finally:
+            # google-auth calls this from its own metadata-plugin thread; don't leak a
+            # DB connection there.
+            if not connection.in_atomic_block:
+                connection.close()
+        return token, _to_google_auth_expiry(token_expiry)
+
+    return Credentials(
+        token=access_token,
+        refresh_token=refresh_token,
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id=settings.GOOGLE_CLIENT_ID,
+        client_secret=settings.GOOGLE_CLIENT_SECRET,
+        expiry=_to_google_auth_expiry(expiry),
+        refresh_handler=_refresh_handler,
+    )
+
+
+def build_google_ads_client(refresh_token, login_customer_id=None):
+    """Builds a brand-new client. Prefer load_google_ads_client, which reuses pooled clients."""
+    login_cid = _resolve_login_customer_id(login_customer_id)
+    credentials = _build_stored_credentials(refresh_token)
+    if credentials is not None:
+        return GoogleAdsClient(
+            credentials,
+            settings.GOOGLE_DEVELOPER_TOKEN,
+            login_customer_id=login_cid,
+            use_proto_plus=True,
+            version="v18",
+        )
 
-def load_google_ads_client(refresh_token, login_customer_id=None):
     credentials_dict = {
         "developer_token": settings.GOOGLE_DEVELOPER_TOKEN,
         "client_id": settings.GOOGLE_CLIENT_ID,
@@ -9,8 +135,69 @@ def load_google_ads_client(refresh_token, login_customer_id=None):
         "refresh_token": refresh_token,
         "use_proto_plus": True,
     }
-    login_cid = login_customer_id or getattr(settings, 'GOOGLE_LOGIN_CUSTOMER_ID', None)
-    if login_cid and str(login_cid).isdigit():
-        credentials_dict["login_customer_id"] = str(login_cid)
+    if login_cid:
+        credentials_dict["login_customer_id"] = login_cid
     client = GoogleAdsClient.load_from_dict(credentials_dict, version="v18")
     return client
+
+
+def _get_pooled_client(refresh_token, login_customer_id=None):
+    key = (refresh_token, _resolve_login_customer_id(login_customer_id))
+    with _client_cache_lock:
+        pooled = _get_client_cache().get(key)
+        metrics.count_cache('google_ads_client', 'miss' if pooled is None else 'hit')
+        if pooled is not None:
+            return pooled
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+
+    # Only callers for this key wait while the client (and its access token) is built.
+    with build_lock:
+        with _client_cache_lock:
+            pooled = _get_client_cache().get(key)
+        if pooled is not None:
+            return pooled
+        try:
+            pooled = _PooledClient(build_google_ads_client(refresh_token, login_customer_id))
+            with _client_cache_lock:
+                _get_client_cache()[key] = pooled
+        finally:
+            with _client_cache_lock:
+                _build_locks.pop(key, None)
+        return pooled
+
+
+def load_google_ads_client(refresh_token, login_customer_id=None):
+    """
+    Returns a shared GoogleAdsClient for (refresh_token, login_customer_id).
+
+    The client's OAuth credentials are shared as well, so the access token is refreshed
+    once and reused by every request made through it until it expires.
+    """
+    return _get_pooled_client(refresh_token, login_customer_id).client
+
+
+def get_google_ads_service(refresh_token, login_customer_id=None, name="GoogleAdsService"):
+    """
+    Returns a shared service stub for the pooled client.
+
+    GoogleAdsClient.get_service opens a new gRPC channel on every call; caching the stub keeps
+    a single warm channel per (refresh_token, login_customer_id). gRPC stubs are safe to use
+    from several threads at once.
+    """
+    pooled = _get_pooled_client(refresh_token, login_customer_id)
+    with _client_cache_lock:
+        service = pooled.services.get(name)
+        if service is None:
+            service = pooled.client.get_service(name)
+            pooled.services[name] = service
+        return service
+
+
+def clear_google_ads_client_cache():
+    """Drops every pooled client, e.g. after a refresh token was revoked or replaced."""
+    global _client_cache
+    with _client_cache_lock:
+        if _client_cache is not None:
+            for pooled in _client_cache.values():
+                pooled.close()
+        _client_cache = None
@@ -1,37 +1,144 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from django.conf import settings
+from django.db import connection
+from django.utils import timezone
 from google.ads.googleads.errors import GoogleAdsException
-from .google_ads_client import load_google_ads_client
-
-def fetch_all_client_campaign_costs(refresh_token, start_date, end_date):
-    all_accounts = get_all_accounts_in_hierarchy(refresh_token)
-    all_costs = []
-    for account_info in all_accounts:
-        if not account_info.get("is_manager"):
-            customer_id = account_info["customer_id"]
-            parent_id = account_info["parent_id"]
-            costs = fetch_campaign_costs(
+from .cost_store import aggregate_campaign_costs, missing_date_ranges, store_daily_costs
+from .google_ads_client import get_google_ads_service
+from .models import AccountHierarchySnapshot
+from .rows import CampaignRow
+from . import metrics, timing
+
+def _map_concurrently(func, items, max_workers=None, thread_name_prefix="google-ads-costs"):
+    """Runs ``func`` over ``items`` on a bounded thread pool and returns results in input order."""
+    if max_workers is None:
+        max_workers = getattr(settings, "GOOGLE_ADS_MAX_WORKERS", 8)
+    max_workers = max(1, min(int(max_workers), len(items) or 1))
+    if max_workers == 1:
+        return [func(item) for item in items]
+    def run(item):
+        try:
+            return func(item)
+        finally:
+            # Pool threads end with the executor; don't leave a DB connection behind if one was opened.
+            connection.close()
+
+    # executor.map yields in submission order, so the output ordering is unchanged.
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix) as executor:
+        return list(executor.map(timing.bind(run), items))
+
+
+def _warm_cost_client(refresh_token):
+    """
+    Builds the pooled client used by the cost queries on the calling thread, so its token
+    lookup (DB) and OAuth refresh don't happen inside the worker threads.
+    """
+    try:
+        get_google_ads_service(refresh_token, login_customer_id=str(settings.GOOGLE_LOGIN_CUSTOMER_ID))
+    except Exception as e:
+        # The per-customer queries hit (and report) the same error.
+        logging.getLogger(__name__).warning(f"Could not prepare the Google Ads client: {e}")
+
+
+def _record_query(endpoint, customer_id, started, status, per_customer_timing=True):
+    """Reports one Google Ads query to the upstream metrics and the request's Server-Timing."""
+    elapsed = time.perf_counter() - started
+    metrics.observe_upstream("google_ads", endpoint, elapsed, status, customer_id)
+    if per_customer_timing:
+        timing.record_customer(customer_id, elapsed * 1000)
+
+
+def fetch_all_client_campaign_costs(refresh_token, start_date, end_date, max_workers=None, use_store=None, as_rows=False):
+    """
+    Fetches campaign costs for every non-manager account in the hierarchy.
+
+    Accounts are queried concurrently on a bounded thread pool (``max_workers``,
+    defaulting to ``settings.GOOGLE_ADS_MAX_WORKERS``); ``max_workers=1`` keeps the
+    old sequential behaviour. Results are collected in hierarchy order and a failing
+    account only loses its own rows, exactly as in the sequential loop.
+
+    With the daily cost store enabled (``use_store``, default GOOGLE_ADS_COST_STORE_ENABLED)
+    only the (customer, day) cells that are missing or still mutable are queried; everything
+    else is summed from the DailyCampaignCost table.
+
+    Rows are returned as Account/Campaign/Cost dicts, or as CampaignRow instances with
+    ``as_rows=True`` for callers that keep processing them (the combined report).
+    Timed as the 'hierarchy' and 'ads' stages of the current request, plus per-customer query times.
+    """
+    with timing.stage('hierarchy'):
+        all_accounts = get_account_hierarchy(refresh_token)
+    client_accounts = [account_info for account_info in all_accounts if not account_info.get("is_manager")]
+    if use_store is None:
+        use_store = getattr(settings, "GOOGLE_ADS_COST_STORE_ENABLED", True)
+
+    if use_store:
+        with timing.stage('ads'):
+            all_costs = _fetch_costs_through_store(refresh_token, client_accounts, start_date, end_date, max_workers)
+    else:
+        def _fetch(account_info):
+            return fetch_campaign_costs(
                 refresh_token=refresh_token,
-                customer_id=customer_id,
-                parent_id=parent_id,
+                customer_id=account_info["customer_id"],
+                parent_id=account_info["parent_id"],
                 start_date=start_date,
                 end_date=end_date
             )
+
+        all_costs = []
+        with timing.stage('ads'):
+            if client_accounts:
+                _warm_cost_client(refresh_token)
+            fetched = _map_concurrently(_fetch, client_accounts, max_workers)
+        for costs in fetched:
             if costs:
                 all_costs.extend(costs)
-    filtered_costs = [cost for cost in all_costs if cost['Cost'] > 0]
-    filtered_costs.sort(key=lambda x: (x['Account'], x['Campaign']))
-    return filtered_costs
+    filtered_costs = [cost for cost in all_costs if cost.spend > 0]
+    filtered_costs.sort(key=lambda x: (x.account, x.campaign))
+    if as_rows:
+        return filtered_costs
+    return [cost.to_cost_dict() for cost in filtered_costs]
 
 
-def fetch_campaign_costs(refresh_token, customer_id, parent_id, start_date, end_date):
+def _fetch_costs_through_store(refresh_token, client_accounts, start_date, end_date, max_workers=None):
+    logger = logging.getLogger(__name__)
+    customer_ids = [account_info["customer_id"] for account_info in client_accounts]
+    gaps = missing_date_ranges(customer_ids, start_date, end_date)
+
+    # Worker threads only talk to Google Ads: the client (and its stored token) is loaded here
+    # first, and the cost rows are written back on this thread.
+    if gaps:
+        _warm_cost_client(refresh_token)
+    fetched = _map_concurrently(
+        lambda gap: fetch_campaign_daily_costs(refresh_token, gap[0], gap[1].isoformat(), gap[2].isoformat()),
+        gaps,
+        max_workers,
+    )
+    failed = 0
+    for (customer_id, gap_start, gap_end), rows in zip(gaps, fetched):
+        if rows is None:
+            failed += 1
+            continue
+        store_daily_costs(customer_id, gap_start, gap_end, rows)
+    logger.info(f"Cost store: {len(gaps)} gap queries for {len(customer_ids)} accounts ({failed} failed)")
+    return aggregate_campaign_costs(customer_ids, start_date, end_date)
+
+
+def fetch_campaign_daily_costs(refresh_token, customer_id, start_date, end_date):
+    """
+    Returns per-campaign, per-day cost rows for the daily cost store, or None when the query
+    failed (so the days are not marked as fetched).
+    """
     logger = logging.getLogger(__name__)
-    client = load_google_ads_client(refresh_token, login_customer_id=str(settings.GOOGLE_LOGIN_CUSTOMER_ID))
-    ga_service = client.get_service("GoogleAdsService")
+    ga_service = get_google_ads_service(refresh_token, login_customer_id=str(settings.GOOGLE_LOGIN_CUSTOMER_ID))
     query = f"""
         SELECT
             customer.descriptive_name,
+            campaign.id,
             campaign.name,
+            segments.date,
             metrics.cost_micros
         FROM
             campaign
@@ -40,86 +147,253 @@ def fetch_campaign_costs(refresh_token, customer_id, parent_id, start_date, end_
             AND metrics.cost_micros > 0
     """
     results = []
+    started = time.perf_counter()
+    status = "ok"
     try:
         stream = ga_service.search_stream(customer_id=customer_id, query=query)
         for batch in stream:
             for row in batch.results:
                 results.append({
-                    "Account": row.customer.descriptive_name,
-                    "Campaign": row.campaign.name,
-                    "Cost": round(row.metrics.cost_micros / 1_000_000, 2),
+                    "campaign_id": str(row.campaign.id),
+                    "campaign_name": row.campaign.name,
+                    "account_name": row.customer.descriptive_name,
+                    "date": date.fromisoformat(row.segments.date),
+                    "cost_micros": row.metrics.cost_micros,
                 })
-    except GoogleAdsException as ex:
+    except GoogleAdsException:
+        status = "google_ads_error"
         logger.info(f"No campaign data for customer_id {customer_id} (likely a manager account).")
+        return None
     except Exception as e:
+        status = "error"
         logger.error(f"An unexpected error occurred for customer_id {customer_id}: {e}", exc_info=True)
+        return None
+    finally:
+        _record_query("campaign_daily_costs", customer_id, started, status)
     return results
 
 
-def get_all_accounts_in_hierarchy(refresh_token, root_cid=None, max_accounts=200):
+def fetch_campaign_costs(refresh_token, customer_id, parent_id, start_date, end_date):
     logger = logging.getLogger(__name__)
-    client = load_google_ads_client(refresh_token)
-    ga_service = client.get_service("GoogleAdsService")
-    if not root_cid:
-        root_cid = str(settings.GOOGLE_LOGIN_CUSTOMER_ID)
-    query = """
+    ga_service = get_google_ads_service(refresh_token, login_customer_id=str(settings.GOOGLE_LOGIN_CUSTOMER_ID))
+    query = f"""
         SELECT
-            customer_client.client_customer,
-            customer_client.manager,
-            customer_client.descriptive_name
-        FROM customer_client
-        WHERE customer_client.level = 1 AND customer_client.status = 'ENABLED'
+            customer.descriptive_name,
+            campaign.name,
+            metrics.cost_micros
+        FROM
+            campaign
+        WHERE
+            segments.date BETWEEN '{start_date}' AND '{end_date}'
+            AND metrics.cost_micros > 0
     """
-    all_accounts = []
-    visited_managers = set()
-
-    def _walk_account_tree(parent_id):
-        nonlocal all_accounts
-        if len(all_accounts) >= max_accounts or parent_id in visited_managers:
-            return
-        visited_managers.add(parent_id)
-        try:
-            search_request = ga_service.search_stream(customer_id=parent_id, query=query)
-            for batch in search_request:
-                for row in batch.results:
-                    if len(all_accounts) >= max_accounts:
-                        return
-                    child_cid = row.customer_client.client_customer.split('/')[-1]
-                    is_manager = row.customer_client.manager
-                    desc_name = row.customer_client.descriptive_name
-                    logger.debug(f"Discovered account: {child_cid} (desc: {desc_name}) under parent {parent_id} - is_manager: {is_manager}")
-                    if child_cid == parent_id:
-                        continue
-                    all_accounts.append({
-                        "customer_id": child_cid,
-                        "parent_id": parent_id,
-                        "descriptive_name": desc_name,
-                        "is_manager": is_manager
-                    })
-                    if is_manager:
-                        _walk_account_tree(child_cid)
-        except Exception as e:
-            logger.error(f"Error discovering children for {parent_id}: {e}", exc_info=True)
-
-    _walk_account_tree(root_cid)
-    root_name = "Unknown Root Manager"
+    results = []
+    started = time.perf_counter()
+    status = "ok"
     try:
-        root_details_query = f"SELECT customer.descriptive_name FROM customer WHERE customer.id = '{root_cid}'"
-        stream = ga_service.search_stream(customer_id=root_cid, query=root_details_query)
+        stream = ga_service.search_stream(customer_id=customer_id, query=query)
         for batch in stream:
             for row in batch.results:
-                root_name = row.customer.descriptive_name
-                break
-            break
+                results.append(CampaignRow(
+                    account=row.customer.descriptive_name,
+                    campaign=row.campaign.name,
+                    spend=round(row.metrics.cost_micros / 1_000_000, 2),
+                ))
+    except GoogleAdsException as ex:
+        status = "google_ads_error"
+        logger.info(f"No campaign data for customer_id {customer_id} (likely a manager account).")
     except Exception as e:
-        logger.error(f"Could not fetch root manager name for {root_cid}: {e}", exc_info=True)
-    all_accounts.append({
+        status = "error"
+        logger.error(f"An unexpected error occurred for customer_id {customer_id}: {e}", exc_info=True)
+    _record_query("campaign_costs", customer_id, started, status)
+    return results
+
+
+HIERARCHY_MODES = ("flat", "tree")
+
+
+def _customer_id_from_resource(resource_name):
+    return resource_name.split('/')[-1]
+
+
+def get_all_accounts_in_hierarchy(refresh_token, root_cid=None, max_accounts=None, mode=None, max_workers=None, stats=None):
+    """
+    Discovers every enabled account below ``root_cid`` (the login customer by default).
+
+    Modes (``mode`` or settings.GOOGLE_ADS_HIERARCHY_MODE):
+      - "flat": one customer_client query against the root, which already returns every
+        level of the tree. parent_id is the root for all accounts, since that is the login
+        customer every cost query goes through anyway.
+      - "tree": walks sub-managers breadth-first, querying each level's managers
+        concurrently, and records each account's immediate parent.
+
+    ``max_accounts=None`` means no limit. When a ``stats`` dict is passed it is filled with
+    the mode, the number of upstream queries issued and the discovery time in ms, which is
+    also reported as the 'hierarchy-discovery' stage of the current request.
+    """
+    logger = logging.getLogger(__name__)
+    started = time.monotonic()
+    ga_service = get_google_ads_service(refresh_token)
+    if not root_cid:
+        root_cid = str(settings.GOOGLE_LOGIN_CUSTOMER_ID)
+    mode = mode or getattr(settings, "GOOGLE_ADS_HIERARCHY_MODE", "flat")
+    if mode not in HIERARCHY_MODES:
+        raise ValueError(f"Unknown hierarchy discovery mode '{mode}', expected one of {HIERARCHY_MODES}.")
+
+    if mode == "flat":
+        rows_by_parent, query_count = _discover_flat(ga_service, root_cid)
+    else:
+        if max_workers is None:
+            max_workers = getattr(settings, "GOOGLE_ADS_MAX_WORKERS", 8)
+        rows_by_parent, query_count = _discover_tree(ga_service, root_cid, max_workers)
+
+    all_accounts = {}
+    root_name = "Unknown Root Manager"
+    truncated = False
+    for parent_id, rows in rows_by_parent:
+        for child_cid, is_manager, desc_name in rows:
+            if child_cid == root_cid:
+                root_name = desc_name or root_name
+                continue
+            if child_cid == parent_id or child_cid in all_accounts:
+                continue
+            if max_accounts is not None and len(all_accounts) >= max_accounts:
+                truncated = True
+                break
+            all_accounts[child_cid] = {
+                "customer_id": child_cid,
+                "parent_id": parent_id,
+                "descriptive_name": desc_name,
+                "is_manager": is_manager
+            }
+    all_accounts[root_cid] = {
         "customer_id": root_cid,
         "parent_id": None,
         "descriptive_name": root_name,
         "is_manager": True
-    })
-    logger.info(f"Discovered {len(all_accounts)} accounts in total (limit was {max_accounts})")
-    unique_accounts = list({v['customer_id']: v for v in all_accounts}.values())
-    logger.info(f"Returning {len(unique_accounts)} unique accounts.")
+    }
+    unique_accounts = list(all_accounts.values())
+    duration_ms = round((time.monotonic() - started) * 1000, 1)
+    timing.record('hierarchy-discovery', duration_ms)
+    if truncated:
+        logger.warning(f"Account discovery for {root_cid} stopped at max_accounts={max_accounts}")
+    logger.info(f"Discovered {len(unique_accounts)} unique accounts under {root_cid} ({mode} mode, {query_count} queries, {duration_ms} ms)")
+    if stats is not None:
+        stats.update({
+            "mode": mode,
+            "query_count": query_count,
+            "duration_ms": duration_ms,
+            "account_count": len(unique_accounts),
+            "truncated": truncated,
+        })
     return unique_accounts
+
+
+def _search_customer_clients(ga_service, customer_id, query):
+    """Returns [(child_cid, is_manager, descriptive_name)] for one customer_client query."""
+    logger = logging.getLogger(__name__)
+    rows = []
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        stream = ga_service.search_stream(customer_id=customer_id, query=query)
+        for batch in stream:
+            for row in batch.results:
+                child_cid = _customer_id_from_resource(row.customer_client.client_customer)
+                logger.debug(f"Discovered account: {child_cid} (desc: {row.customer_client.descriptive_name}) under {customer_id} - is_manager: {row.customer_client.manager}")
+                rows.append((child_cid, row.customer_client.manager, row.customer_client.descriptive_name))
+    except Exception as e:
+        status = "error"
+        logger.error(f"Error discovering children for {customer_id}: {e}", exc_info=True)
+    # Hierarchy discovery has its own Server-Timing stage; only the metrics get it per manager.
+    _record_query("customer_client", customer_id, started, status, per_customer_timing=False)
+    return rows
+
+
+def _discover_flat(ga_service, root_cid):
+    # customer_client on a manager lists every direct and indirect client (level 0 is the
+    # manager itself), so a single query covers the whole tree including the root's name.
+    query = """
+        SELECT
+            customer_client.client_customer,
+            customer_client.manager,
+            customer_client.descriptive_name,
+            customer_client.level
+        FROM customer_client
+        WHERE customer_client.status = 'ENABLED'
+    """
+    return [(root_cid, _search_customer_clients(ga_service, root_cid, query))], 1
+
+
+def _discover_tree(ga_service, root_cid, max_workers):
+    # Level 0 is the queried manager itself, which gives us each manager's name for free.
+    query = """
+        SELECT
+            customer_client.client_customer,
+            customer_client.manager,
+            customer_client.descriptive_name
+        FROM customer_client
+        WHERE customer_client.level <= 1 AND customer_client.status = 'ENABLED'
+    """
+    rows_by_parent = []
+    query_count = 0
+    visited_managers = {root_cid}
+    frontier = [root_cid]
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="google-ads-hierarchy") as executor:
+        while frontier:
+            level_rows = list(executor.map(lambda cid: _search_customer_clients(ga_service, cid, query), frontier))
+            query_count += len(frontier)
+            next_frontier = []
+            for parent_id, rows in zip(frontier, level_rows):
+                rows_by_parent.append((parent_id, rows))
+                for child_cid, is_manager, _ in rows:
+                    if is_manager and child_cid not in visited_managers:
+                        visited_managers.add(child_cid)
+                        next_frontier.append(child_cid)
+            frontier = next_frontier
+    return rows_by_parent, query_count
+
+
+def get_account_hierarchy(refresh_token, root_cid=None, force_refresh=False):
+    """
+    Returns the account hierarchy from the persisted snapshot, re-walking the MCC tree only
+    when the snapshot is missing, older than GOOGLE_ADS_HIERARCHY_TTL seconds, or
+    ``force_refresh`` is set.
+    """
+    if not root_cid:
+        root_cid = str(settings.GOOGLE_LOGIN_CUSTOMER_ID)
+    if not force_refresh:
+        snapshot = AccountHierarchySnapshot.objects.filter(root_customer_id=root_cid).first()
+        ttl = getattr(settings, "GOOGLE_ADS_HIERARCHY_TTL", 86400)
+        if snapshot and (timezone.now() - snapshot.refreshed_at).total_seconds() < ttl:
+            metrics.count_cache('hierarchy', 'hit')
+            return snapshot.accounts
+    metrics.count_cache('hierarchy', 'refresh' if force_refresh else 'miss')
+    return refresh_account_hierarchy(refresh_token, root_cid).accounts
+
+
+def refresh_account_hierarchy(refresh_token, root_cid=None, mode=None):
+    """Walks the MCC tree and stores the result as the snapshot for ``root_cid``."""
+    logger = logging.getLogger(__name__)
+    if not root_cid:
+        root_cid = str(settings.GOOGLE_LOGIN_CUSTOMER_ID)
+    stats = {}
+    accounts = get_all_accounts_in_hierarchy(refresh_token, root_cid=root_cid, mode=mode, stats=stats)
+    snapshot = AccountHierarchySnapshot.objects.filter(root_customer_id=root_cid).first()
+    if len(accounts) <= 1 and snapshot and snapshot.account_count > 1:
+        # Discovery only found the root, which almost always means the walk failed;
+        # keep serving the previous tree instead of caching an empty one.
+        logger.warning(f"Hierarchy refresh for {root_cid} found no client accounts; keeping the previous snapshot.")
+        return snapshot
+    snapshot, _ = AccountHierarchySnapshot.objects.update_or_create(
+        root_customer_id=root_cid,
+        defaults={
+            "accounts": accounts,
+            "account_count": len(accounts),
+            "discovery_mode": stats.get("mode", ""),
+            "query_count": stats.get("query_count", 0),
+            "discovery_ms": stats.get("duration_ms", 0),
+            "refreshed_at": timezone.now(),
+        },
+    )
+    return snapshot
@@ -0,0 +1,73 @@
+import gc
+import random
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from reports.report_merge import merge_report_rows
+
+
+def build_synthetic_inputs(size, seed=0):
+    """
+    Builds ``size`` Binom rows and ``size`` Google Ads rows shaped like the real upstream data:
+    about half of the campaigns exist on both sides, a quarter only in one of them, and a
+    mix of ID-tagged and plain campaign names.
+    """
+    rng = random.Random(seed)
+    binom_rows = []
+    google_rows = []
+    for i in range(size):
+        account = f"Account {i % 97}"
+        if i % 3:
+            name = f"{account} - {250000 + i % 100000:06d}_{i % 100:02d} Offer {i}"
+        else:
+            name = f"{account} - Offer   {i}"
+        binom_name = name if i % 4 != 3 else f"Binom only {i}"
+        google_name = name if i % 4 != 2 else f"Google only {i}"
+        binom_rows.append({
+            'id': str(i),
+            'name': f"{binom_name} (site{i % 50}.com)",
+            'leads': str(rng.randint(0, 20)),
+            'revenue': f"{rng.uniform(0, 500):.2f}" if i % 10 else "0",
+        })
+        google_rows.append({
+            'Account': account,
+            'Campaign': google_name,
+            'Cost': round(rng.uniform(0, 300), 2),
+        })
+    return binom_rows, google_rows
+
+
+class Command(BaseCommand):
+    help = "Benchmarks merge_report_rows on synthetic inputs and reports rows/sec and peak memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated input sizes (rows per upstream).")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs per size; the fastest is reported.")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",") if size.strip()]
+        self.stdout.write(f"{'rows/upstream':>14} {'output rows':>12} {'best s':>9} {'rows/sec':>12} {'peak MB':>9}")
+        for size in sizes:
+            binom_rows, google_rows = build_synthetic_inputs(size)
+            input_rows = len(binom_rows) + len(google_rows)
+
+            timings = []
+            for _ in range(max(1, options["repeat"])):
+                gc.collect()
+                started = time.perf_counter()
+                output = merge_report_rows(binom_rows, google_rows)
+                timings.append(time.perf_counter() - started)
+            output_rows = len(output)
+            del output
+
+            # Memory is measured in a separate run, since tracemalloc slows the merge down.
+            gc.collect()
+            tracemalloc.start()
+            merge_report_rows(binom_rows, google_rows)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            best = min(timings)
+            self.stdout.write(
+                f"{size:>14,} {output_rows:>12,} {best:>9.3f} {input_rows / best:>12,.0f} {peak / 1024 / 1024:>9.1f}"
+            )
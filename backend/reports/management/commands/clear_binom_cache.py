@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reports.report_service import invalidate_binom_cache
+
+
+class Command(BaseCommand):
+    help = "Invalidates cached Binom reports: one range when --start-date/--end-date are given, otherwise all of them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start-date", default=None, help="YYYY-MM-DD")
+        parser.add_argument("--end-date", default=None, help="YYYY-MM-DD")
+        parser.add_argument("--timezone", default=getattr(settings, 'DEFAULT_TIMEZONE', 'America/Atikokan'))
+        parser.add_argument("--traffic-source-ids", default=getattr(settings, 'TRAFFIC_SOURCE_IDS', '1,6'))
+        parser.add_argument("--date-type", default=getattr(settings, 'DEFAULT_DATE_TYPE', 'custom-time'))
+
+    def handle(self, *args, **options):
+        if options["start_date"] or options["end_date"]:
+            invalidate_binom_cache(
+                options["start_date"],
+                options["end_date"] or options["start_date"],
+                options["timezone"],
+                options["traffic_source_ids"],
+                options["date_type"],
+            )
+            self.stdout.write(self.style.SUCCESS(f"Invalidated cached Binom report for {options['start_date']}..{options['end_date']}"))
+        else:
+            invalidate_binom_cache()
+            self.stdout.write(self.style.SUCCESS("Invalidated all cached Binom reports"))
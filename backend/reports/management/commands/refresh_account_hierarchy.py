@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from reports.google_auth_service import refresh_account_hierarchy
+from reports.models import GoogleAccount
+
+
+class Command(BaseCommand):
+    help = "Re-walks the Google Ads MCC tree and stores a fresh account hierarchy snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", default=None, help="GoogleAccount whose refresh token is used (default: GOOGLE_ACCOUNT_EMAIL).")
+        parser.add_argument("--root-cid", default=None, help="Root manager customer ID (default: GOOGLE_LOGIN_CUSTOMER_ID).")
+        parser.add_argument("--mode", choices=["flat", "tree"], default=None, help="Discovery mode (default: GOOGLE_ADS_HIERARCHY_MODE).")
+
+    def handle(self, *args, **options):
+        email = options["email"] or settings.GOOGLE_ACCOUNT_EMAIL
+        account = GoogleAccount.objects.filter(user_email=email).first()
+        if not account or not account.refresh_token:
+            raise CommandError(f"GoogleAccount with a refresh token not found for email: {email}.")
+
+        snapshot = refresh_account_hierarchy(account.refresh_token, root_cid=options["root_cid"], mode=options["mode"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {snapshot.account_count} accounts under {snapshot.root_customer_id} at {snapshot.refreshed_at.isoformat()} "
+            f"({snapshot.discovery_mode} mode, {snapshot.query_count} queries, {snapshot.discovery_ms} ms)"
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from reports.report_rollups import rollup_reports
+
+
+class Command(BaseCommand):
+    help = "Builds weekly and monthly ReportRecords from daily ones, recomputing only buckets with days stored since the last run."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Recompute every bucket instead of only the changed ones.")
+
+    def handle(self, *args, **options):
+        summary = rollup_reports(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['changed_days']} changed days: rebuilt {summary['buckets_rebuilt']} buckets, "
+            f"{summary['buckets_incomplete']} still incomplete"
+        ))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reports.report_jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = "Runs queued combined report jobs (POST /api/combined-report/jobs/) from the ReportJob table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=getattr(settings, 'REPORT_WORKER_CONCURRENCY', 2),
+                            help="Jobs run side by side (default: REPORT_WORKER_CONCURRENCY).")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty instead of polling.")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to wait between polls of an empty queue.")
+
+    def handle(self, *args, **options):
+        if not options["once"]:
+            self.stdout.write(f"Report worker started with concurrency {options['concurrency']}")
+        processed = run_worker(
+            concurrency=options["concurrency"],
+            once=options["once"],
+            poll_interval=options["poll_interval"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} report jobs"))
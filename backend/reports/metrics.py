@@ -0,0 +1,136 @@
+# backend/reports/metrics.py
+"""
+Prometheus metrics for the report backend, served in text format by /api/metrics/.
+
+- reports_upstream_requests_total / reports_upstream_request_duration_seconds: Binom and
+  Google Ads calls by upstream, endpoint, customer ID and status. The customer ID label is
+  empty unless METRICS_CUSTOMER_LABELS is set: every customer adds a full set of histogram
+  series, per worker file in multiprocess mode.
+- reports_upstream_retries_total: retried Binom calls.
+- reports_cache_requests_total: lookups per report cache by result; the hit ratio is
+  rate(...{result="hit"}) over rate(...) of the same cache.
+- reports_merge_rows: sizes of each combined-report merge, by side.
+- reports_http_request_duration_seconds: request latency by view, method and status.
+
+Each gunicorn worker only sees its own calls. With PROMETHEUS_MULTIPROC_DIR set (to an
+empty directory shared by the workers and cleared before they start) prometheus_client
+writes every process's values to files there and a scrape of any worker adds them all up;
+gunicorn's child_exit hook should call mark_process_dead(worker.pid).
+
+prometheus_client is optional: without it recording does nothing and the endpoint
+answers 503.
+"""
+import os
+import time
+from django.conf import settings
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Histogram, multiprocess
+except ImportError:
+    prometheus_client = None
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+ROW_BUCKETS = (0, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+if prometheus_client is not None:
+    UPSTREAM_REQUESTS = Counter(
+        'reports_upstream_requests_total',
+        'Binom and Google Ads calls.',
+        ['upstream', 'endpoint', 'customer_id', 'status'],
+    )
+    UPSTREAM_DURATION = Histogram(
+        'reports_upstream_request_duration_seconds',
+        'Binom and Google Ads call latency (Binom: including retries and backoff).',
+        ['upstream', 'endpoint', 'customer_id'],
+        buckets=LATENCY_BUCKETS,
+    )
+    UPSTREAM_RETRIES = Counter(
+        'reports_upstream_retries_total',
+        'Retried upstream calls.',
+        ['upstream', 'endpoint'],
+    )
+    CACHE_REQUESTS = Counter(
+        'reports_cache_requests_total',
+        'Report cache lookups by result (hit, stale, miss, refresh).',
+        ['cache', 'result'],
+    )
+    MERGE_ROWS = Histogram(
+        'reports_merge_rows',
+        'Rows per combined-report merge: Binom and Google Ads campaigns in, matched and output rows.',
+        ['side'],
+        buckets=ROW_BUCKETS,
+    )
+    REQUEST_DURATION = Histogram(
+        'reports_http_request_duration_seconds',
+        'Request latency by view.',
+        ['view', 'method', 'status'],
+        buckets=LATENCY_BUCKETS,
+    )
+
+
+def enabled():
+    return prometheus_client is not None
+
+
+def observe_upstream(upstream, endpoint, seconds, status, customer_id=''):
+    """Records one upstream call; ``status`` is e.g. an HTTP status code, 'ok' or 'error'."""
+    if prometheus_client is None:
+        return
+    if not getattr(settings, 'METRICS_CUSTOMER_LABELS', False):
+        customer_id = ''
+    UPSTREAM_REQUESTS.labels(upstream, endpoint, str(customer_id), str(status)).inc()
+    UPSTREAM_DURATION.labels(upstream, endpoint, str(customer_id)).observe(seconds)
+
+
+def count_retries(upstream, endpoint, retries):
+    if prometheus_client is not None and retries:
+        UPSTREAM_RETRIES.labels(upstream, endpoint).inc(retries)
+
+
+def count_cache(cache, result):
+    if prometheus_client is not None:
+        CACHE_REQUESTS.labels(cache, result).inc()
+
+
+def observe_merge(**sides):
+    """observe_merge(binom=..., google_ads=..., matched=..., output=...) with row counts."""
+    if prometheus_client is None:
+        return
+    for side, rows in sides.items():
+        MERGE_ROWS.labels(side).observe(rows)
+
+
+def render():
+    """(body, content type) of the current metrics, summed over all processes in multiprocess mode."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """For gunicorn's child_exit hook: drops the files of a worker that exited."""
+    if prometheus_client is not None and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
+
+
+class RequestMetricsMiddleware:
+    """
+    Observes every request's latency under its URL name, falling back to the URL pattern
+    for unnamed routes ('unmatched' for 404s).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if prometheus_client is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match.route) if match else 'unmatched'
+        REQUEST_DURATION.labels(view, request.method, str(response.status_code)).observe(time.perf_counter() - started)
+        return response
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_reportrecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountHierarchySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('root_customer_id', models.CharField(max_length=20, unique=True)),
+                ('accounts', models.JSONField(default=list)),
+                ('account_count', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Account Hierarchy Snapshot',
+                'verbose_name_plural': 'Account Hierarchy Snapshots',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_accounthierarchysnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accounthierarchysnapshot',
+            name='discovery_mode',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='accounthierarchysnapshot',
+            name='discovery_ms',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='accounthierarchysnapshot',
+            name='query_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_hierarchy_discovery_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCampaignCost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('customer_id', models.CharField(max_length=20)),
+                ('campaign_id', models.CharField(max_length=20)),
+                ('date', models.DateField()),
+                ('account_name', models.CharField(max_length=255)),
+                ('campaign_name', models.CharField(max_length=255)),
+                ('cost_micros', models.BigIntegerField()),
+                ('fetched_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['customer_id', 'date'], name='daily_cost_customer_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('customer_id', 'campaign_id', 'date'), name='unique_daily_campaign_cost')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCostCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('customer_id', models.CharField(max_length=20)),
+                ('date', models.DateField()),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('customer_id', 'date'), name='unique_daily_cost_coverage')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0005_daily_campaign_cost_store'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportrecord',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='reportrecord',
+            name='report_type',
+            field=models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly'), ('custom', 'Custom')], default='monthly', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='reportrecord',
+            index=models.Index(fields=['start_date', 'end_date'], name='report_record_range_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportrecord',
+            index=models.Index(fields=['account_name', 'start_date'], name='report_record_account_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='reportrecord',
+            constraint=models.UniqueConstraint(fields=('account_name', 'campaign_name', 'start_date', 'end_date', 'report_type'), name='unique_report_record'),
+        ),
+    ]
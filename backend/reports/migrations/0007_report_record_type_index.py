@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_report_record_upsert'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reportrecord',
+            index=models.Index(fields=['report_type', 'start_date'], name='report_record_type_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 02:17
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_coverage(apps, schema_editor):
+    """Days already stored before coverage was tracked count as covered."""
+    ReportRecord = apps.get_model('reports', 'ReportRecord')
+    DailyReportCoverage = apps.get_model('reports', 'DailyReportCoverage')
+    days = (
+        ReportRecord.objects.filter(report_type='daily')
+        .values('start_date')
+        .annotate(stored_at=Max('updated_at'))
+        .order_by()
+    )
+    DailyReportCoverage.objects.bulk_create(
+        [DailyReportCoverage(date=day['start_date'], stored_at=day['stored_at']) for day in days],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0009_report_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyReportCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('stored_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(backfill_coverage, migrations.RunPython.noop),
+    ]
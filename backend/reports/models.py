@@ -23,6 +23,7 @@ class ReportRecord(models.Model):
         ('daily', 'Daily'),
         ('weekly', 'Weekly'),
         ('monthly', 'Monthly'),
+        ('custom', 'Custom'),
     )
 
     account_name = models.CharField(max_length=255)
@@ -36,7 +37,136 @@ class ReportRecord(models.Model):
     end_date = models.DateField()
     report_type = models.CharField(max_length=10, choices=REPORT_TYPE_CHOICES, default='monthly')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['account_name', 'campaign_name', 'start_date', 'end_date', 'report_type'],
+                name='unique_report_record',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['start_date', 'end_date'], name='report_record_range_idx'),
+            models.Index(fields=['account_name', 'start_date'], name='report_record_account_idx'),
+            models.Index(fields=['report_type', 'start_date'], name='report_record_type_idx'),
+        ]
 
     def __str__(self):
         return f"{self.report_type} - {self.account_name} ({self.start_date} to {self.end_date})"
 
+
+
+class ReportJob(models.Model):
+    """A combined report queued by the API and run by `manage.py run_report_worker`."""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    requested_by = models.CharField(max_length=254, blank=True, default='')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='report_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Report job {self.pk} ({self.start_date} to {self.end_date}): {self.status}"
+
+
+class RollupCheckpoint(models.Model):
+    """High-water mark of DailyReportCoverage.stored_at already folded into the weekly/monthly rollups."""
+    name = models.CharField(max_length=50, unique=True)
+    watermark = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.watermark}"
+
+
+class DailyReportCoverage(models.Model):
+    """
+    Marks a day as stored by a daily combined run, including days without any campaigns
+    (and therefore without daily ReportRecords), and when it was last stored.
+    """
+    date = models.DateField(unique=True)
+    stored_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.date} (stored {self.stored_at:%Y-%m-%d %H:%M})"
+
+
+
+class AccountHierarchySnapshot(models.Model):
+    """Persisted result of walking the MCC tree below ``root_customer_id``."""
+    root_customer_id = models.CharField(max_length=20, unique=True)
+    accounts = models.JSONField(default=list)
+    account_count = models.PositiveIntegerField(default=0)
+    discovery_mode = models.CharField(max_length=10, blank=True, default='')
+    query_count = models.PositiveIntegerField(default=0)
+    discovery_ms = models.FloatField(default=0)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Account Hierarchy Snapshot"
+        verbose_name_plural = "Account Hierarchy Snapshots"
+
+    def __str__(self):
+        return f"{self.root_customer_id} ({self.account_count} accounts, {self.refreshed_at:%Y-%m-%d %H:%M})"
+
+
+class DailyCampaignCost(models.Model):
+    """One campaign's Google Ads cost for one day, as last fetched from the API."""
+    customer_id = models.CharField(max_length=20)
+    campaign_id = models.CharField(max_length=20)
+    date = models.DateField()
+    account_name = models.CharField(max_length=255)
+    campaign_name = models.CharField(max_length=255)
+    cost_micros = models.BigIntegerField()
+    fetched_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['customer_id', 'campaign_id', 'date'], name='unique_daily_campaign_cost'),
+        ]
+        indexes = [
+            models.Index(fields=['customer_id', 'date'], name='daily_cost_customer_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer_id} {self.campaign_name} {self.date}: {self.cost_micros / 1_000_000:.2f}"
+
+
+class DailyCostCoverage(models.Model):
+    """
+    Marks a (customer, day) cell as fetched, so days without any spend (and therefore
+    without DailyCampaignCost rows) are not re-queried either.
+    """
+    customer_id = models.CharField(max_length=20)
+    date = models.DateField()
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['customer_id', 'date'], name='unique_daily_cost_coverage'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer_id} {self.date} (fetched {self.fetched_at:%Y-%m-%d %H:%M})"
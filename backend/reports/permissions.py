@@ -1,3 +1,5 @@
+import hmac
+from django.conf import settings
 from rest_framework.permissions import BasePermission
 from django.contrib.auth.models import AnonymousUser
 from .models import GoogleAccount
@@ -22,3 +24,16 @@ class IsGoogleOrSuperuser(BasePermission):
             except GoogleAccount.DoesNotExist:
                 pass
         return False
+
+
+class IsMetricsScraperOrGoogleOrSuperuser(IsGoogleOrSuperuser):
+    """
+    Lets a scraper in with `Authorization: Bearer <METRICS_AUTH_TOKEN>` (when the setting is
+    set); anyone else needs IsGoogleOrSuperuser.
+    """
+    def has_permission(self, request, view):
+        token = getattr(settings, 'METRICS_AUTH_TOKEN', '')
+        scheme, _, credentials = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+        if token and scheme.lower() == 'bearer' and hmac.compare_digest(credentials.strip().encode(), token.encode()):
+            return True
+        return super().has_permission(request, view)
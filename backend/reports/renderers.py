@@ -0,0 +1,99 @@
+# backend/reports/renderers.py
+"""
+DRF renderers for report payloads.
+
+ORJSONRenderer is the default JSON renderer (REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']);
+it produces the same JSON as DRF's JSONRenderer, only faster, and falls back to it when
+orjson isn't installed.
+
+The binary columnar renderers (?format=parquet / ?format=arrow) expect the column payload
+built by reports.columnar and write it as one typed Arrow table. pyarrow is optional:
+without it COLUMNAR_RENDERERS is empty and DRF answers those formats with 404 like any
+other unknown format.
+"""
+from importlib.util import find_spec
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson. Types orjson doesn't handle the same way as DRF
+    (Decimal, datetime, lazy strings, querysets, ...) go through DRF's own JSONEncoder, so
+    the output is unchanged. Indented output (browsable API, ?indent) uses the stdlib path.
+    """
+    _encoder = JSONEncoder()
+    # DRF formats datetimes itself (millisecond precision, 'Z' for UTC), so let its encoder do it.
+    _options = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type or '', renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=self._encoder.default, option=self._options)
+
+
+def _arrow_type(pa, kind):
+    return {
+        'string': pa.string(),
+        'float': pa.float64(),
+        'int': pa.int64(),
+        'date': pa.date32(),
+    }[kind]
+
+
+def to_arrow_table(data):
+    import pyarrow as pa
+
+    if isinstance(data, dict) and 'columns' in data and 'data' in data:
+        types = data.get('types', {})
+        return pa.table({
+            column: pa.array(data['data'][column], type=_arrow_type(pa, types[column]) if column in types else None)
+            for column in data['columns']
+        })
+    # Anything else (error bodies, mostly) is written as a one-row table of its fields.
+    records = data if isinstance(data, list) else [data]
+    return pa.Table.from_pylist([record if isinstance(record, dict) else {'value': record} for record in records])
+
+
+class ParquetRenderer(BaseRenderer):
+    media_type = 'application/vnd.apache.parquet'
+    format = 'parquet'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        sink = pa.BufferOutputStream()
+        pq.write_table(to_arrow_table(data), sink, compression='zstd')
+        return sink.getvalue().to_pybytes()
+
+
+class ArrowRenderer(BaseRenderer):
+    """Arrow IPC file format; readers can memory-map it (pyarrow.ipc.open_file, DuckDB, polars)."""
+    media_type = 'application/vnd.apache.arrow.file'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import pyarrow as pa
+
+        table = to_arrow_table(data)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+COLUMNAR_RENDERERS = [ParquetRenderer, ArrowRenderer] if find_spec('pyarrow') else []
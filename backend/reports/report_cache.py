@@ -0,0 +1,70 @@
+# backend/reports/report_cache.py
+"""
+Stale-while-revalidate cache for finished reports, kept in the 'reports' cache.
+
+An entry younger than COMBINED_CACHE_FRESH_TTL is served as is. An older one (up to
+COMBINED_CACHE_STALE_TTL) is still served immediately, while a background thread rebuilds
+it; only misses and forced refreshes wait for the upstreams.
+"""
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _store(cache_key, value):
+    caches['reports'].set(cache_key, (time.time(), value), getattr(settings, 'COMBINED_CACHE_STALE_TTL', 86400))
+
+
+def _refresh_in_background(cache_key, build):
+    with _refreshing_lock:
+        if cache_key in _refreshing:
+            return
+        _refreshing.add(cache_key)
+
+    def refresh():
+        try:
+            _store(cache_key, build())
+        except Exception as e:
+            # The stale copy keeps being served; the next request retries.
+            logger.error(f"Background refresh of {cache_key} failed: {e}", exc_info=True)
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(cache_key)
+            connection.close()
+
+    threading.Thread(target=refresh, name="report-cache-refresh", daemon=True).start()
+
+
+def get_or_build(cache_key, build, refresh=False, stats=None):
+    """
+    Returns the cached value for ``cache_key`` or ``build()``'s result. When a ``stats`` dict
+    is passed it gets 'status' (hit, stale, miss or refresh) and 'age' (seconds since the
+    returned value was built).
+    """
+    entry = None if refresh else caches['reports'].get(cache_key)
+    if entry is not None:
+        created_at, value = entry
+        age = max(0, int(time.time() - created_at))
+        stale = age >= getattr(settings, 'COMBINED_CACHE_FRESH_TTL', 300)
+        if stale:
+            _refresh_in_background(cache_key, build)
+        metrics.count_cache('combined', 'stale' if stale else 'hit')
+        if stats is not None:
+            stats.update({'status': 'stale' if stale else 'hit', 'age': age})
+        return value
+
+    value = build()
+    _store(cache_key, value)
+    metrics.count_cache('combined', 'refresh' if refresh else 'miss')
+    if stats is not None:
+        stats.update({'status': 'refresh' if refresh else 'miss', 'age': 0})
+    return value
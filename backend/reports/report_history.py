@@ -0,0 +1,140 @@
+# backend/reports/report_history.py
+"""
+Historical report queries over ReportRecord.
+
+Grouping, sums and ROI are computed by the database; pages are addressed with keyset
+cursors (the last group key of the previous page) rather than OFFSET, so deep pages cost
+the same as the first one.
+"""
+import base64
+import json
+from datetime import date
+from django.db.models import DecimalField, ExpressionWrapper, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, NullIf
+from .models import ReportRecord
+
+# group_by value -> ReportRecord columns making up the group key, in sort order.
+GROUP_FIELDS = {
+    'account': ('account_name',),
+    'campaign': ('account_name', 'campaign_name'),
+    'date': ('start_date',),
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+_MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+class InvalidHistoryQuery(ValueError):
+    """Raised for unusable query parameters (surfaced as HTTP 400)."""
+
+
+def encode_cursor(key):
+    raw = json.dumps([value.isoformat() if isinstance(value, date) else value for value in key])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidHistoryQuery("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidHistoryQuery("Invalid cursor.")
+    try:
+        return [date.fromisoformat(value) if field.endswith('_date') else str(value) for field, value in zip(fields, values)]
+    except (TypeError, ValueError):
+        raise InvalidHistoryQuery("Invalid cursor.")
+
+
+def _after(fields, key):
+    """Q selecting group keys strictly after ``key`` in (fields...) order."""
+    condition = Q()
+    for i in range(len(fields) - 1, -1, -1):
+        step = Q(**{f"{fields[i]}__gt": key[i]})
+        equal = Q(**{field: value for field, value in zip(fields[:i], key[:i])})
+        condition = (equal & step) if not condition else ((equal & step) | condition)
+    return condition
+
+
+def _as_date(value, name):
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise InvalidHistoryQuery(f"{name} must be YYYY-MM-DD.")
+
+
+def query_report_history(
+    start_date=None,
+    end_date=None,
+    account=None,
+    campaign=None,
+    group_by='account',
+    report_type='daily',
+    cursor=None,
+    page_size=DEFAULT_PAGE_SIZE,
+):
+    """
+    Returns (rows, next_cursor). Each row has the group key columns plus total_spend,
+    revenue, pl, roi (percent, None without spend) and sales summed over the matching
+    records of ``report_type`` that lie fully inside [start_date, end_date].
+    """
+    if group_by not in GROUP_FIELDS:
+        raise InvalidHistoryQuery(f"group_by must be one of: {', '.join(GROUP_FIELDS)}.")
+    if report_type not in dict(ReportRecord.REPORT_TYPE_CHOICES):
+        raise InvalidHistoryQuery(f"report_type must be one of: {', '.join(dict(ReportRecord.REPORT_TYPE_CHOICES))}.")
+    try:
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise InvalidHistoryQuery("page_size must be an integer.")
+    fields = GROUP_FIELDS[group_by]
+
+    records = ReportRecord.objects.filter(report_type=report_type)
+    if start_date:
+        records = records.filter(start_date__gte=_as_date(start_date, 'start_date'))
+    if end_date:
+        records = records.filter(end_date__lte=_as_date(end_date, 'end_date'))
+    if account:
+        records = records.filter(account_name=account)
+    if campaign:
+        records = records.filter(campaign_name__icontains=campaign)
+    if cursor:
+        # Filtering on the group columns happens before GROUP BY and uses the indexes.
+        records = records.filter(_after(fields, decode_cursor(cursor, fields)))
+
+    spend = Sum('total_spend', output_field=_MONEY)
+    revenue = Sum('revenue', output_field=_MONEY)
+    groups = (
+        records.values(*fields)
+        .annotate(total_spend=spend, revenue=revenue, sales=Sum('sales'))
+        .annotate(
+            pl=ExpressionWrapper(F('revenue') - F('total_spend'), output_field=_MONEY),
+            # Cast first: SQLite sums whole amounts to integers and would divide them as such.
+            roi=ExpressionWrapper(
+                Cast(F('revenue') - F('total_spend'), FloatField()) * Value(100.0)
+                / NullIf(Cast(F('total_spend'), FloatField()), Value(0.0)),
+                output_field=FloatField(),
+            ),
+        )
+        .order_by(*fields)
+    )
+    page = list(groups[:page_size + 1])
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = encode_cursor([page[-1][field] for field in fields])
+
+    rows = []
+    for group in page:
+        row = {field: group[field] for field in fields}
+        row.update({
+            'total_spend': round(float(group['total_spend'] or 0), 2),
+            'revenue': round(float(group['revenue'] or 0), 2),
+            'pl': round(float(group['pl'] or 0), 2),
+            'roi': round(float(group['roi']), 2) if group['roi'] is not None else None,
+            'sales': group['sales'] or 0,
+        })
+        rows.append(row)
+    return rows, next_cursor
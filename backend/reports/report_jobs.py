@@ -0,0 +1,130 @@
+# backend/reports/report_jobs.py
+"""
+DB-backed queue for combined reports.
+
+The API inserts ReportJob rows; `manage.py run_report_worker` claims them with a
+conditional UPDATE (so concurrent workers never run the same job), runs the same
+fetch/merge/store code as /api/combined-report/ and saves the payload on the row.
+"""
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+
+def _fail_exhausted_jobs(stale_before):
+    """Jobs whose worker died too many times are failed instead of being claimed again."""
+    return ReportJob.objects.filter(
+        status=ReportJob.STATUS_RUNNING,
+        started_at__lt=stale_before,
+        attempts__gte=getattr(settings, 'REPORT_JOB_MAX_ATTEMPTS', 3),
+    ).update(
+        status=ReportJob.STATUS_FAILED,
+        error="Worker stopped while running the job too many times.",
+        finished_at=timezone.now(),
+    )
+
+
+def claim_next_job(worker_name):
+    """
+    Atomically moves the oldest queued job (or a running one whose worker went away) to
+    'running' for ``worker_name`` and returns it, or returns None when there is nothing to do.
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=getattr(settings, 'REPORT_JOB_STALE_SECONDS', 1800))
+    _fail_exhausted_jobs(stale_before)
+    claimable = ReportJob.objects.filter(
+        Q(status=ReportJob.STATUS_QUEUED) | Q(status=ReportJob.STATUS_RUNNING, started_at__lt=stale_before)
+    )
+    while True:
+        job_id = claimable.order_by('created_at', 'pk').values_list('pk', flat=True).first()
+        if job_id is None:
+            return None
+        # Only one worker's UPDATE can match while the row is still claimable; losers try the next job.
+        claimed = claimable.filter(pk=job_id).update(
+            status=ReportJob.STATUS_RUNNING,
+            started_at=now,
+            worker=worker_name,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return ReportJob.objects.get(pk=job_id)
+
+
+def run_job(job):
+    """Runs a claimed job and records its result or error on the row."""
+    # The report code lives next to the view it was extracted from.
+    from . import views
+
+    start_date, end_date = job.start_date.isoformat(), job.end_date.isoformat()
+    mine = ReportJob.objects.filter(pk=job.pk, status=ReportJob.STATUS_RUNNING, worker=job.worker)
+    try:
+        account = views.combined_report_account()
+        if not account:
+            raise RuntimeError("No Google account with a refresh token is configured for the combined report.")
+        rows = views.build_combined_report_once(account, start_date, end_date)
+        payload = views.combined_report_payload(rows, start_date, end_date)
+    except Exception as e:
+        logger.error(f"Report job {job.pk} ({start_date}..{end_date}) failed: {e}", exc_info=True)
+        mine.update(status=ReportJob.STATUS_FAILED, error=str(e) or e.__class__.__name__, finished_at=timezone.now())
+        return False
+    mine.update(status=ReportJob.STATUS_SUCCEEDED, result=payload, error='', finished_at=timezone.now())
+    logger.info(f"Report job {job.pk} ({start_date}..{end_date}) finished with {len(rows)} rows")
+    return True
+
+
+def _work(slot, once, poll_interval, stop):
+    worker_name = f"{socket.gethostname()}:{os.getpid()}:{slot}"
+    processed = 0
+    while not stop.is_set():
+        job = claim_next_job(worker_name)
+        if job is None:
+            if once:
+                break
+            stop.wait(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def _work_in_thread(slot, once, poll_interval, stop):
+    try:
+        return _work(slot, once, poll_interval, stop)
+    finally:
+        # Each thread has its own DB connection; don't leave it open when the thread ends.
+        connection.close()
+
+
+def run_worker(concurrency=None, once=False, poll_interval=2.0, stop=None):
+    """
+    Processes report jobs with up to ``concurrency`` (default REPORT_WORKER_CONCURRENCY) running
+    side by side. With ``once`` it returns as soon as the queue is empty; otherwise it polls
+    until ``stop`` is set. Returns the number of jobs processed.
+    """
+    if concurrency is None:
+        concurrency = getattr(settings, 'REPORT_WORKER_CONCURRENCY', 2)
+    concurrency = max(1, int(concurrency))
+    stop = stop or threading.Event()
+    if concurrency == 1:
+        return _work(0, once, poll_interval, stop)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="report-job") as executor:
+        futures = [executor.submit(_work_in_thread, slot, once, poll_interval, stop) for slot in range(concurrency)]
+        try:
+            while wait(futures, timeout=1).not_done:
+                pass
+        except KeyboardInterrupt:
+            # Running jobs finish; no new ones are claimed.
+            stop.set()
+            wait(futures)
+        return sum(future.result() for future in futures)
@@ -0,0 +1,80 @@
+# backend/reports/report_merge.py
+"""
+Joins Binom rows (revenue, leads) with Google Ads rows (spend) into combined report rows.
+
+Campaigns are matched on the campaign ID embedded in the name (e.g. 250417_02) or, when a
+name has no ID, on the name without its "(domain)" part and with collapsed whitespace.
+"""
+import re
+from . import metrics
+from .rows import CampaignRow, parse_binom_rows, parse_cost_rows
+from .utils import CAMPAIGN_ID_RE
+
+_PARENTHESIZED_RE = re.compile(r'\([^)]*\)')
+
+
+def campaign_key(campaign_name):
+    """Create a consistent key for matching campaigns"""
+    if not campaign_name:
+        return None
+    campaign_name = str(campaign_name)
+    match = CAMPAIGN_ID_RE.search(campaign_name)
+    if match:
+        return match.group(1)
+    return ' '.join(_PARENTHESIZED_RE.sub('', campaign_name).split())
+
+
+def _account_from_campaign(campaign_name):
+    campaign_name = str(campaign_name)
+    return campaign_name.split(' - ')[0].strip() if ' - ' in campaign_name else ''
+
+
+def _index(rows):
+    # Later rows win for duplicate keys, as in the original per-request lookups.
+    lookup = {}
+    for row in rows:
+        key = campaign_key(row.campaign)
+        if key:
+            lookup[key] = row
+    return lookup
+
+
+def merge_report_rows(binom_data, google_ads_data):
+    """
+    Returns the combined report as CampaignRow instances, sorted case-insensitively by
+    account and campaign. Inputs are raw Binom data and Google Ads cost rows (see
+    rows.parse_binom_rows / rows.parse_cost_rows for the accepted shapes).
+
+    One pass over the Binom campaigns handles matched and Binom-only campaigns, the Google
+    Ads rows left over are the Google-only campaigns; rows without a name or without both
+    spend and revenue are dropped on the way, and the result is sorted once.
+    """
+    binom_lookup = _index(parse_binom_rows(binom_data))
+    google_lookup = _index(parse_cost_rows(google_ads_data))
+    google_count = len(google_lookup)
+
+    output = []
+    append = output.append
+    for key, binom_row in binom_lookup.items():
+        google_row = google_lookup.pop(key, None)
+        campaign_name = str(binom_row.campaign).split(' (')[0].strip()
+        account_name = google_row.account if google_row else ''
+        if not account_name:
+            account_name = _account_from_campaign(binom_row.campaign)
+        total_spend = google_row.spend if google_row else 0
+        if not (total_spend or binom_row.revenue) or not (str(account_name).strip() or campaign_name):
+            continue
+        append(CampaignRow(account_name, campaign_name, total_spend, binom_row.revenue, binom_row.sales))
+
+    matched = google_count - len(google_lookup)
+    # Whatever is left only exists in Google Ads.
+    for google_row in google_lookup.values():
+        campaign_name = str(google_row.campaign).split(' (')[0].strip()
+        account_name = google_row.account or _account_from_campaign(google_row.campaign)
+        if not google_row.spend or not (str(account_name).strip() or campaign_name):
+            continue
+        append(CampaignRow(account_name, campaign_name, google_row.spend, 0, '0'))
+
+    output.sort(key=lambda row: (str(row.account).lower(), row.campaign.lower()))
+    metrics.observe_merge(binom=len(binom_lookup), google_ads=google_count, matched=matched, output=len(output))
+    return output
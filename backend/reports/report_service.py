@@ -1,13 +1,73 @@
 # backend/reports/report_service.py
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.conf import settings
+from django.core.cache import caches
+from . import metrics, timing
 from .binom_service import fetch_binom_data as fetch_binom_data_from_binom_module
+from .binom_service import iter_binom_rows as iter_binom_rows_from_binom_module
+
+logger = logging.getLogger(__name__)
+
+SHARD_SIZES = ("day", "week")
+# Binom counters that are summed when shards are re-aggregated. Any other field is kept only
+# if every shard reports the same value for the campaign (ids, names, ...); fields that differ,
+# like ratios, can't be rebuilt from the shards and are dropped from the merged row.
+BINOM_ADDITIVE_FIELDS = ("clicks", "cost", "leads", "revenue")
+BINOM_CACHE_GENERATION_KEY = "binom:generation"
+
 
 def fetch_binom_data(
     start_date,
     end_date,
     timezone="America/Atikokan",
     traffic_source_ids="1,6",
-    date_type="custom-time"
+    date_type="custom-time",
+    shard=None,
+    refresh=False
 ):
+    """
+    Returns the Binom report for the given parameters, served from the 'reports' cache when
+    possible. ``refresh=True`` skips the cached copy and stores the newly fetched one.
+    Timed as the 'binom' stage of the current request.
+    """
+    with timing.stage('binom'):
+        return _fetch_binom_data_cached(start_date, end_date, timezone, traffic_source_ids, date_type, shard, refresh)
+
+
+def _fetch_binom_data_cached(start_date, end_date, timezone, traffic_source_ids, date_type, shard, refresh):
+    if not getattr(settings, 'BINOM_CACHE_ENABLED', True):
+        return _fetch_binom_data_uncached(start_date, end_date, timezone, traffic_source_ids, date_type, shard)
+
+    cache = caches['reports']
+    key = binom_cache_key(start_date, end_date, timezone, traffic_source_ids, date_type, shard)
+    if not refresh:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.debug(f"Binom cache hit for {start_date}..{end_date}")
+            metrics.count_cache('binom', 'hit')
+            return cached
+    metrics.count_cache('binom', 'refresh' if refresh else 'miss')
+    binom_data = _fetch_binom_data_uncached(start_date, end_date, timezone, traffic_source_ids, date_type, shard)
+    cache.set(key, binom_data, binom_cache_ttl(end_date, timezone))
+    return binom_data
+
+
+def _fetch_binom_data_uncached(start_date, end_date, timezone, traffic_source_ids, date_type, shard):
+    if shard:
+        return fetch_binom_data_sharded(
+            start_date,
+            end_date,
+            timezone,
+            traffic_source_ids,
+            date_type,
+            shard=shard
+        )
     return fetch_binom_data_from_binom_module(
         start_date,
         end_date,
@@ -15,3 +75,182 @@ def fetch_binom_data(
         traffic_source_ids,
         date_type
     )
+
+
+def _normalize_traffic_source_ids(traffic_source_ids):
+    return ",".join(sorted(x.strip() for x in str(traffic_source_ids).split(',') if x.strip()))
+
+
+def _binom_cache_generation():
+    return caches['reports'].get(BINOM_CACHE_GENERATION_KEY, 0)
+
+
+def report_params_digest(start_date, end_date, timezone, traffic_source_ids, date_type):
+    """Stable hash of the parameters that identify a report (traffic source order doesn't matter)."""
+    params = json.dumps([
+        str(start_date), str(end_date), timezone, _normalize_traffic_source_ids(traffic_source_ids), date_type
+    ])
+    return hashlib.sha256(params.encode()).hexdigest()
+
+
+def binom_cache_key(start_date, end_date, timezone, traffic_source_ids, date_type, shard=None):
+    """Sharded fetches drop fields the shards disagree on, so they are cached apart from full ones."""
+    digest = report_params_digest(start_date, end_date, timezone, traffic_source_ids, date_type)
+    return f"binom:{_binom_cache_generation()}:{shard or 'full'}:{digest}"
+
+
+def binom_cache_ttl(end_date, timezone):
+    """
+    Ranges that ended before today in the report's timezone no longer change, so they are
+    kept for BINOM_CACHE_PAST_TTL; ranges that include today use BINOM_CACHE_TODAY_TTL.
+    """
+    try:
+        today = datetime.now(ZoneInfo(timezone)).date()
+        is_past = date.fromisoformat(str(end_date)) < today
+    except (ValueError, TypeError, ZoneInfoNotFoundError):
+        is_past = False
+    if is_past:
+        return getattr(settings, 'BINOM_CACHE_PAST_TTL', 86400)
+    return getattr(settings, 'BINOM_CACHE_TODAY_TTL', 300)
+
+
+def invalidate_binom_cache(
+    start_date=None,
+    end_date=None,
+    timezone="America/Atikokan",
+    traffic_source_ids="1,6",
+    date_type="custom-time"
+):
+    """
+    Drops one cached Binom report (sharded or not), or every cached Binom report when no range is given
+    (by moving to a new key generation, so the old entries simply expire).
+    """
+    cache = caches['reports']
+    if start_date is None and end_date is None:
+        cache.set(BINOM_CACHE_GENERATION_KEY, _binom_cache_generation() + 1, None)
+        return
+    cache.delete_many([
+        binom_cache_key(start_date, end_date, timezone, traffic_source_ids, date_type, shard)
+        for shard in (None, *SHARD_SIZES)
+    ])
+
+
+def split_date_range(start_date, end_date, shard="week"):
+    """
+    Splits an inclusive YYYY-MM-DD range into (start, end) string pairs. Week shards follow
+    calendar weeks (Monday to Sunday), clipped to the requested range.
+    """
+    if shard not in SHARD_SIZES:
+        raise ValueError(f"Unknown shard size '{shard}', expected one of {SHARD_SIZES}.")
+    current = date.fromisoformat(str(start_date))
+    last = date.fromisoformat(str(end_date))
+    shards = []
+    while current <= last:
+        if shard == "day":
+            shard_end = current
+        else:
+            shard_end = min(current + timedelta(days=6 - current.weekday()), last)
+        shards.append((current.isoformat(), shard_end.isoformat()))
+        current = shard_end + timedelta(days=1)
+    return shards
+
+
+def _add_binom_values(current, value):
+    try:
+        total = Decimal(str(current or 0)) + Decimal(str(value or 0))
+    except InvalidOperation:
+        return current
+    if isinstance(current, str):
+        # Binom reports zero as "0", and filters downstream compare against that exact string.
+        return "0" if total == 0 else format(total, 'f')
+    return int(total) if isinstance(current, int) else float(total)
+
+
+def merge_binom_shards(results):
+    """
+    Re-aggregates per-shard Binom reports into one report of the same structure as a single
+    call: rows are matched per campaign (by id, falling back to name) and their
+    BINOM_ADDITIVE_FIELDS are summed. Other fields are kept when all shards agree on them and
+    dropped otherwise (a ratio of one shard would be wrong for the whole range), so merged
+    rows can have fewer fields than an unsharded report. Campaign order follows first appearance.
+    """
+    merged = {}
+    conflicting = {}
+    for result in results:
+        rows = result['data'] if isinstance(result, dict) and 'data' in result else result
+        for row in rows or []:
+            key = row.get('id') if row.get('id') is not None else row.get('name')
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = dict(row)
+                continue
+            for field, value in row.items():
+                if field in BINOM_ADDITIVE_FIELDS:
+                    existing[field] = _add_binom_values(existing.get(field, "0"), value)
+                elif field not in existing or existing[field] != value:
+                    conflicting.setdefault(key, set()).add(field)
+    for key, fields in conflicting.items():
+        for field in fields:
+            merged[key].pop(field, None)
+    data = list(merged.values())
+    first = results[0] if results else []
+    if isinstance(first, dict) and 'data' in first:
+        return {**first, 'data': data}
+    return data
+
+
+def fetch_binom_data_sharded(
+    start_date,
+    end_date,
+    timezone="America/Atikokan",
+    traffic_source_ids="1,6",
+    date_type="custom-time",
+    shard="week",
+    max_workers=None
+):
+    """
+    Fetches a long range as day or week shards, at most ``max_workers`` (default
+    BINOM_SHARD_MAX_WORKERS) at a time, and re-aggregates them with merge_binom_shards.
+    Each shard is its own request, so request_binom's retries only repeat the failed shard.
+    """
+    shards = split_date_range(start_date, end_date, shard)
+    if len(shards) == 1:
+        return fetch_binom_data_from_binom_module(start_date, end_date, timezone, traffic_source_ids, date_type)
+    if max_workers is None:
+        max_workers = getattr(settings, 'BINOM_SHARD_MAX_WORKERS', 4)
+    with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(shards))), thread_name_prefix="binom-shard") as executor:
+        results = list(executor.map(
+            lambda dates: fetch_binom_data_from_binom_module(dates[0], dates[1], timezone, traffic_source_ids, date_type),
+            shards
+        ))
+    return merge_binom_shards(results)
+
+def iter_binom_rows(
+    start_date,
+    end_date,
+    timezone="America/Atikokan",
+    traffic_source_ids="1,6",
+    date_type="custom-time"
+):
+    return iter_binom_rows_from_binom_module(
+        start_date,
+        end_date,
+        timezone,
+        traffic_source_ids,
+        date_type
+    )
+
+
+def filter_binom_rows(rows):
+    """
+    Yields the id/name/leads/revenue projection of every Binom row that has revenue or leads.
+    Works on a list or on the streaming iterator, so only the kept rows are ever held.
+    """
+    for item in rows:
+        if item.get('revenue') != "0" or item.get('leads') != "0":
+            yield {
+                'id': item.get('id'),
+                'name': item.get('name'),
+                'leads': item.get('leads', '0'),
+                'revenue': item.get('revenue', '0')
+            }
@@ -0,0 +1,130 @@
+# backend/reports/report_store.py
+"""
+Persists combined report runs into ReportRecord.
+
+Rows are upserted in batches on (account_name, campaign_name, start_date, end_date,
+report_type), so storing a report costs one INSERT ... ON CONFLICT DO UPDATE per batch and
+re-running a range updates its rows in place.
+
+Combined runs are stored as 'daily' (one day) or 'custom' (any longer range, including one
+that happens to be an exact week or month); 'weekly' and 'monthly' records are only
+written by report_rollups, so an ad-hoc run never overwrites or mixes with a rollup.
+"""
+import logging
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.utils import timezone
+from .models import DailyReportCoverage, ReportRecord
+
+UPSERT_BATCH_SIZE = 500
+
+# ReportRecord.roi is DecimalField(max_digits=6, decimal_places=2).
+MAX_ROI_PERCENT = Decimal('9999.99')
+
+_NAME_MAX_LENGTH = ReportRecord._meta.get_field('account_name').max_length
+_UPDATE_FIELDS = ['total_spend', 'revenue', 'pl', 'roi', 'sales', 'updated_at']
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def report_type_for_range(start_date, end_date):
+    """Report type of a combined run: 'daily' for one day, else 'custom'."""
+    return 'daily' if _as_date(start_date) == _as_date(end_date) else 'custom'
+
+
+def _to_int(value):
+    try:
+        return int(float(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _roi_percent(spend, revenue):
+    """ROI as a percentage, or None without spend or when it doesn't fit the column."""
+    if not spend:
+        return None
+    try:
+        roi = ((revenue - spend) / spend * 100).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+    return roi if abs(roi) <= MAX_ROI_PERCENT else None
+
+
+def build_report_records(rows, start_date, end_date, report_type):
+    """
+    Turns CampaignRow instances into unsaved ReportRecords. Rows that collapse onto the same
+    key (names are truncated to the column length) are summed, since one upsert statement
+    can't touch the same row twice.
+    """
+    start, end = _as_date(start_date), _as_date(end_date)
+    totals = {}
+    for row in rows:
+        key = (str(row.account or '')[:_NAME_MAX_LENGTH], str(row.campaign or '')[:_NAME_MAX_LENGTH])
+        spend = Decimal(str(row.spend or 0))
+        revenue = Decimal(str(row.revenue or 0))
+        sales = _to_int(row.sales)
+        if key in totals:
+            previous = totals[key]
+            spend, revenue, sales = spend + previous[0], revenue + previous[1], sales + previous[2]
+        totals[key] = (spend, revenue, sales)
+
+    records = []
+    for (account_name, campaign_name), (spend, revenue, sales) in totals.items():
+        spend = spend.quantize(Decimal('0.01'))
+        revenue = revenue.quantize(Decimal('0.01'))
+        records.append(ReportRecord(
+            account_name=account_name,
+            campaign_name=campaign_name,
+            total_spend=spend,
+            revenue=revenue,
+            pl=revenue - spend,
+            roi=_roi_percent(spend, revenue),
+            sales=sales,
+            start_date=start,
+            end_date=end,
+            report_type=report_type,
+        ))
+    return records
+
+
+def store_report_rows(rows, start_date, end_date, report_type=None, batch_size=UPSERT_BATCH_SIZE):
+    """
+    Replaces the stored ``report_type`` report for the range with ``rows`` (CampaignRow
+    instances) and returns the number of rows written. ``report_type`` defaults to
+    report_type_for_range(start_date, end_date).
+
+    Rows are upserted, then campaigns missing from ``rows`` are deleted in the same
+    transaction, so a re-run doesn't leave campaigns behind that have since disappeared.
+    Daily stores also mark their day in DailyReportCoverage, which is what the rollups
+    watch, since a store that only deletes rows leaves no updated_at behind.
+    """
+    logger = logging.getLogger(__name__)
+    if report_type is None:
+        report_type = report_type_for_range(start_date, end_date)
+    records = build_report_records(rows, start_date, end_date, report_type)
+    campaigns_by_account = {}
+    for record in records:
+        campaigns_by_account.setdefault(record.account_name, set()).add(record.campaign_name)
+    with transaction.atomic():
+        ReportRecord.objects.bulk_create(
+            records,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['account_name', 'campaign_name', 'start_date', 'end_date', 'report_type'],
+            update_fields=_UPDATE_FIELDS,
+        )
+        stored = ReportRecord.objects.filter(
+            report_type=report_type, start_date=_as_date(start_date), end_date=_as_date(end_date)
+        )
+        stored.exclude(account_name__in=list(campaigns_by_account)).delete()
+        for account_name, campaign_names in campaigns_by_account.items():
+            stored.filter(account_name=account_name).exclude(campaign_name__in=campaign_names).delete()
+        if report_type == 'daily':
+            DailyReportCoverage.objects.update_or_create(
+                date=_as_date(start_date), defaults={'stored_at': timezone.now()}
+            )
+    logger.info(f"Stored {len(records)} {report_type} report rows for {start_date}..{end_date}")
+    return len(records)
@@ -0,0 +1,100 @@
+# backend/reports/rows.py
+"""
+Compact row type shared by the report pipeline.
+
+Google Ads costs, parsed Binom rows and merged report rows all travel as CampaignRow
+instances (slotted, so no per-row __dict__ and no repeated string keys) and are turned
+into dicts only when a response is serialized.
+"""
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class CampaignRow:
+    account: str
+    campaign: str
+    spend: float = 0
+    revenue: float = 0
+    # Binom reports leads as strings ("0", "12"); kept as-is so API output doesn't change.
+    sales: object = '0'
+
+    @property
+    def pl(self):
+        return self.revenue - self.spend
+
+    @property
+    def roi(self):
+        """Return on spend as a ratio (0.25 == 25%), or None without spend."""
+        return (self.revenue / self.spend) - 1 if self.spend else None
+
+    def to_dict(self):
+        """Combined report row, as returned by /api/combined-report/."""
+        return {
+            'Account': self.account,
+            'Campaign': self.campaign,
+            'Total Spend': self.spend,
+            'Revenue': self.revenue,
+            'Sales': self.sales,
+        }
+
+    def to_cost_dict(self):
+        """Google Ads cost row, as returned by /api/google-ads/test/."""
+        return {
+            'Account': self.account,
+            'Campaign': self.campaign,
+            'Cost': self.spend,
+        }
+
+
+# Columns of file exports (CSV, NDJSON, Parquet/Arrow); ROI is a percentage there.
+EXPORT_FIELDS = ('Account', 'Campaign', 'Total Spend', 'Revenue', 'P/L', 'ROI', 'Sales')
+
+
+def export_values(row):
+    """Values of ``row`` in EXPORT_FIELDS order."""
+    roi = row.roi
+    return (
+        row.account,
+        row.campaign,
+        row.spend,
+        row.revenue,
+        round(row.pl, 2),
+        round(roi * 100, 2) if roi is not None else None,
+        row.sales,
+    )
+
+
+def _to_float(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parse_binom_rows(binom_data):
+    """
+    Yields a CampaignRow per Binom report row (list, {'data': [...]} envelope or the
+    streaming iterator). ``campaign`` keeps Binom's full name; the account is derived later.
+    """
+    rows = binom_data['data'] if isinstance(binom_data, dict) and 'data' in binom_data else (binom_data or [])
+    for item in rows:
+        yield CampaignRow(
+            account='',
+            campaign=item.get('name', ''),
+            revenue=_to_float(item.get('revenue', 0)),
+            sales=item.get('leads', '0'),
+        )
+
+
+def parse_cost_rows(google_ads_data):
+    """Accepts Google Ads cost rows as CampaignRow instances or legacy Account/Campaign/Cost dicts."""
+    rows = google_ads_data['data'] if isinstance(google_ads_data, dict) and 'data' in google_ads_data else (google_ads_data or [])
+    for row in rows:
+        if isinstance(row, CampaignRow):
+            yield row
+        else:
+            yield CampaignRow(
+                account=row.get('Account', ''),
+                campaign=row.get('Campaign', ''),
+                spend=_to_float(row.get('Cost', 0)),
+            )
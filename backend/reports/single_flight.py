@@ -0,0 +1,114 @@
+# backend/reports/single_flight.py
+"""
+Single-flight coalescing: concurrent calls for the same key run the work once.
+
+Inside a process, duplicates wait on the leader's Future. Across processes (gunicorn
+workers, the report job worker) the leaders serialize on a per-key file lock; whoever had
+to wait for the lock picks up the result the previous holder left in the 'reports' cache,
+as long as it was produced after the wait started.
+"""
+import hashlib
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import caches
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalesce within the process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def _lock_dir():
+    path = Path(getattr(settings, 'SINGLE_FLIGHT_LOCK_DIR', '') or Path(tempfile.gettempdir()) / "google-binom-reporter-locks")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@contextmanager
+def _file_lock(path, timeout):
+    """Exclusive flock on ``path``; yields whether another process was holding it."""
+    if fcntl is None:
+        yield False
+        return
+    with open(path, "a+b") as handle:
+        contended = False
+        locked = False
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                locked = True
+                break
+            except BlockingIOError:
+                contended = True
+                if time.monotonic() >= deadline:
+                    logger.warning(f"Timed out after {timeout}s waiting for {path.name}, running without the lock")
+                    break
+                time.sleep(0.05)
+        try:
+            yield contended
+        finally:
+            if locked:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, stats=None, **kwargs):
+        """
+        Returns func(*args, **kwargs), running it only once for concurrent calls with the same
+        ``key``. When a ``stats`` dict is passed, stats['role'] is set to 'leader' (ran the work),
+        'waited' (joined a call in this process) or 'shared' (reused another process's result).
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            if stats is not None:
+                stats['role'] = 'waited'
+            return future.result()
+
+        try:
+            value, role = self._run_locked(key, func, args, kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        if stats is not None:
+            stats['role'] = role
+        return value
+
+    def _run_locked(self, key, func, args, kwargs):
+        digest = hashlib.sha256(f"{self.name}:{key}".encode()).hexdigest()[:32]
+        cache = caches['reports']
+        cache_key = f"singleflight:{digest}"
+        waiting_since = time.time()
+        with _file_lock(_lock_dir() / f"{digest}.lock", getattr(settings, 'SINGLE_FLIGHT_LOCK_TIMEOUT', 120)) as contended:
+            if contended:
+                shared = cache.get(cache_key)
+                if shared is not None and shared[0] >= waiting_since:
+                    return shared[1], 'shared'
+            value = func(*args, **kwargs)
+            if fcntl is not None:
+                # Only needed by callers already blocked on the lock, so it is kept briefly.
+                cache.set(cache_key, (time.time(), value), getattr(settings, 'SINGLE_FLIGHT_RESULT_TTL', 60))
+        return value, 'leader'
@@ -1,4 +1,9 @@
+import atexit
 import json
+import shutil
+import tempfile
+from importlib.util import find_spec
+from unittest import skipUnless
 from unittest.mock import patch, MagicMock
 from django.urls import reverse
 from django.contrib.auth.models import User
@@ -7,6 +12,27 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from .models import GoogleAccount
 
+# Keep report caches in memory and single-flight locks in a throwaway directory, instead of
+# the developer's shared file cache and lock dir under /tmp.
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'reports': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-reports'},
+}
+TEST_LOCK_DIR = tempfile.mkdtemp(prefix='reports-tests-locks-')
+atexit.register(shutil.rmtree, TEST_LOCK_DIR, True)
+
+
+@override_settings(CACHES=TEST_CACHES, SINGLE_FLIGHT_LOCK_DIR=TEST_LOCK_DIR)
+class ReportsAPITestCase(APITestCase):
+    """Base class for every test here; subclass decorators add to these overrides."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from django.core.cache import caches
+        caches['default'].clear()
+        caches['reports'].clear()
+
 # Helper to create a user with specific permissions
 def create_test_user(username='testuser', password='password', email=None, is_staff=False, is_superuser=False, perms=None):
     user_email = email or f'{username}@example.com'
@@ -16,7 +42,7 @@ def create_test_user(username='testuser', password='password', email=None, is_st
     user.save()
     return user
 
-class AuthAPITests(APITestCase):
+class AuthAPITests(ReportsAPITestCase):
     def setUp(self):
         self.user = create_test_user()
         self.client.login(username=self.user.username, password='password')
@@ -33,7 +59,7 @@ class AuthAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
 @patch('reports.views.build_auth_url')
-class GoogleAuthTests(APITestCase):
+class GoogleAuthTests(ReportsAPITestCase):
     def test_google_auth_url_view(self, mock_build_auth_url):
         mock_build_auth_url.return_value = 'https://auth.url/test'
         
@@ -56,8 +82,9 @@ class GoogleAuthTests(APITestCase):
         self.assertEqual(mock_login.call_count, 1)
         self.assertEqual(response.status_code, status.HTTP_302_FOUND) # It redirects to frontend
 
+@override_settings(COMBINED_CACHE_ENABLED=False)
 @patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
-class ReportAPITests(APITestCase):
+class ReportAPITests(ReportsAPITestCase):
     def setUp(self):
         self.user = create_test_user(username='googleuser', email='googleuser@example.com')
         self.client.login(username=self.user.username, password='password')
@@ -123,7 +150,7 @@ class ReportAPITests(APITestCase):
         mock_fetch_costs.assert_called_once()
         mock_fetch_binom.assert_called_once()
 
-class PermissionTests(APITestCase):
+class PermissionTests(ReportsAPITestCase):
     def test_protected_views_unauthenticated(self):
         protected_urls = [
             reverse('google_ads_test'),
@@ -140,3 +167,1278 @@ class PermissionTests(APITestCase):
                 else:
                     response = self.client.get(url)
                 self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+@override_settings(GOOGLE_ADS_COST_STORE_ENABLED=False)
+class GoogleAdsCostFetchTests(ReportsAPITestCase):
+    ACCOUNTS = [
+        {'customer_id': '1', 'parent_id': '9', 'descriptive_name': 'Root', 'is_manager': True},
+        {'customer_id': '2', 'parent_id': '9', 'descriptive_name': 'B', 'is_manager': False},
+        {'customer_id': '3', 'parent_id': '9', 'descriptive_name': 'A', 'is_manager': False},
+        {'customer_id': '4', 'parent_id': '9', 'descriptive_name': 'C', 'is_manager': False},
+    ]
+
+    @patch('reports.google_ads_reports.fetch_campaign_costs')
+    @patch('reports.google_ads_reports.get_all_accounts_in_hierarchy')
+    def test_concurrent_fetch_matches_sequential(self, mock_accounts, mock_costs):
+        from .google_ads_reports import fetch_all_client_campaign_costs
+        from .rows import CampaignRow
+        mock_accounts.return_value = self.ACCOUNTS
+        costs_by_customer = {
+            '2': [CampaignRow('B', 'x', 1.0)],
+            '3': [CampaignRow('A', 'y', 2.0), CampaignRow('A', 'z', 0)],
+            '4': [],  # failed or empty account only loses its own rows
+        }
+        mock_costs.side_effect = lambda **kwargs: costs_by_customer[kwargs['customer_id']]
+
+        sequential = fetch_all_client_campaign_costs('token', '2024-01-01', '2024-01-31', max_workers=1)
+        concurrent = fetch_all_client_campaign_costs('token', '2024-01-01', '2024-01-31', max_workers=4)
+
+        self.assertEqual(sequential, concurrent)
+        self.assertEqual([row['Account'] for row in concurrent], ['A', 'B'])
+        self.assertEqual(mock_costs.call_count, 6)
+
+
+class GoogleAdsClientPoolTests(ReportsAPITestCase):
+    def setUp(self):
+        from .google_ads_client import clear_google_ads_client_cache
+        clear_google_ads_client_cache()
+        self.addCleanup(clear_google_ads_client_cache)
+
+    @patch('reports.google_ads_client.GoogleAdsClient')
+    def test_client_and_service_are_reused(self, mock_google_ads_client):
+        from .google_ads_client import get_google_ads_service, load_google_ads_client
+        first = get_google_ads_service('token', login_customer_id='123')
+        second = get_google_ads_service('token', login_customer_id='123')
+        self.assertIs(first, second)
+        self.assertIs(load_google_ads_client('token', '123'), load_google_ads_client('token', '123'))
+        mock_google_ads_client.load_from_dict.assert_called_once()
+        mock_google_ads_client.load_from_dict.return_value.get_service.assert_called_once_with('GoogleAdsService')
+
+    @patch('reports.google_ads_client.GoogleAdsClient')
+    def test_distinct_keys_get_distinct_clients(self, mock_google_ads_client):
+        from .google_ads_client import load_google_ads_client
+        load_google_ads_client('token-a', '123')
+        load_google_ads_client('token-b', '123')
+        load_google_ads_client('token-a', '456')
+        self.assertEqual(mock_google_ads_client.load_from_dict.call_count, 3)
+
+    def test_build_runs_outside_the_pool_lock(self):
+        import threading
+        from .google_ads_client import _client_cache_lock, load_google_ads_client
+        acquired = []
+
+        def build(refresh_token, login_customer_id=None):
+            # Another thread must be able to use the pool while this client is being built.
+            thread = threading.Thread(target=lambda: acquired.append(_client_cache_lock.acquire(timeout=1) and _client_cache_lock.release() is None))
+            thread.start()
+            thread.join()
+            return MagicMock()
+
+        with patch('reports.google_ads_client.build_google_ads_client', side_effect=build):
+            load_google_ads_client('token', '123')
+        self.assertEqual(acquired, [True])
+
+    @override_settings(GOOGLE_ADS_CLIENT_CACHE_SIZE=1)
+    @patch('reports.google_ads_client.GoogleAdsClient')
+    def test_evicted_clients_close_their_channels(self, mock_google_ads_client):
+        from .google_ads_client import get_google_ads_service
+        mock_google_ads_client.load_from_dict.side_effect = lambda *args, **kwargs: MagicMock()
+        first = get_google_ads_service('token-a', '123')
+        get_google_ads_service('token-b', '123')
+        first.transport.close.assert_called_once()
+
+
+class TokenManagerTests(ReportsAPITestCase):
+    def setUp(self):
+        self.account = GoogleAccount.objects.create(user_email='tokens@example.com', refresh_token='refresh-1')
+
+    @patch('reports.token_manager.refresh_access_token')
+    def test_valid_stored_token_is_reused(self, mock_refresh):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .token_manager import get_access_token
+        self.account.access_token = 'cached'
+        self.account.token_expiry = timezone.now() + timedelta(minutes=30)
+        self.account.save()
+
+        token, expiry = get_access_token('refresh-1')
+        self.assertEqual(token, 'cached')
+        mock_refresh.assert_not_called()
+
+    @patch('reports.token_manager.refresh_access_token')
+    def test_expiring_token_is_refreshed_and_persisted(self, mock_refresh):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .token_manager import get_access_token
+        mock_refresh.return_value = {'access_token': 'fresh', 'expires_in': 3599}
+        self.account.access_token = 'stale'
+        self.account.token_expiry = timezone.now() + timedelta(seconds=30)
+        self.account.save()
+
+        token, expiry = get_access_token('refresh-1')
+        self.assertEqual(token, 'fresh')
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.access_token, 'fresh')
+        self.assertGreater(self.account.token_expiry, timezone.now() + timedelta(minutes=55))
+        # The second caller gets the persisted token without another refresh.
+        self.assertEqual(get_access_token('refresh-1')[0], 'fresh')
+        mock_refresh.assert_called_once_with('refresh-1')
+
+    def test_unknown_refresh_token(self):
+        from .token_manager import get_access_token
+        self.assertEqual(get_access_token('unknown'), (None, None))
+
+
+@override_settings(GOOGLE_LOGIN_CUSTOMER_ID='999', GOOGLE_ADS_HIERARCHY_TTL=3600)
+class AccountHierarchySnapshotTests(ReportsAPITestCase):
+    ACCOUNTS = [
+        {'customer_id': '1', 'parent_id': '999', 'descriptive_name': 'Client', 'is_manager': False},
+        {'customer_id': '999', 'parent_id': None, 'descriptive_name': 'Root', 'is_manager': True},
+    ]
+
+    @patch('reports.google_ads_reports.get_all_accounts_in_hierarchy')
+    def test_snapshot_is_reused_until_stale(self, mock_walk):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .google_ads_reports import get_account_hierarchy
+        from .models import AccountHierarchySnapshot
+        mock_walk.return_value = self.ACCOUNTS
+
+        self.assertEqual(get_account_hierarchy('token'), self.ACCOUNTS)
+        self.assertEqual(get_account_hierarchy('token'), self.ACCOUNTS)
+        self.assertEqual(mock_walk.call_count, 1)
+
+        AccountHierarchySnapshot.objects.update(refreshed_at=timezone.now() - timedelta(hours=2))
+        get_account_hierarchy('token')
+        self.assertEqual(mock_walk.call_count, 2)
+
+    @patch('reports.google_ads_reports.get_all_accounts_in_hierarchy')
+    def test_failed_walk_keeps_previous_snapshot(self, mock_walk):
+        from .google_ads_reports import refresh_account_hierarchy
+        mock_walk.return_value = self.ACCOUNTS
+        refresh_account_hierarchy('token')
+        mock_walk.return_value = self.ACCOUNTS[1:]
+        snapshot = refresh_account_hierarchy('token')
+        self.assertEqual(snapshot.account_count, 2)
+
+    @patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
+    @patch('reports.google_ads_reports.get_all_accounts_in_hierarchy')
+    def test_refresh_endpoint(self, mock_walk, mock_perm):
+        mock_walk.return_value = self.ACCOUNTS
+        GoogleAccount.objects.create(user_email='ops@example.com', refresh_token='token')
+        response = self.client.post(reverse('google_ads_hierarchy_refresh'), {'email': 'ops@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['account_count'], 2)
+        self.assertEqual(response.data['root_customer_id'], '999')
+
+
+@override_settings(GOOGLE_LOGIN_CUSTOMER_ID='100')
+class AccountDiscoveryTests(ReportsAPITestCase):
+    # manager -> [(child_cid, is_manager, name)], including the level-0 self row
+    TREE = {
+        '100': [('100', True, 'Root'), ('200', True, 'Sub A'), ('300', True, 'Sub B'), ('1', False, 'Client 1')],
+        '200': [('200', True, 'Sub A'), ('2', False, 'Client 2'), ('400', True, 'Sub C')],
+        '300': [('300', True, 'Sub B'), ('3', False, 'Client 3')],
+        '400': [('400', True, 'Sub C')] + [(str(1000 + i), False, f'Deep {i}') for i in range(250)],
+    }
+
+    def _row(self, cid, is_manager, name):
+        row = MagicMock()
+        row.customer_client.client_customer = f'customers/{cid}'
+        row.customer_client.manager = is_manager
+        row.customer_client.descriptive_name = name
+        return row
+
+    def _service(self):
+        service = MagicMock()
+
+        def search_stream(customer_id, query):
+            if 'level <= 1' in query:
+                rows = self.TREE[customer_id]
+            else:
+                rows = [child for children in self.TREE.values() for child in children]
+            batch = MagicMock()
+            batch.results = [self._row(*child) for child in rows]
+            return [batch]
+
+        service.search_stream.side_effect = search_stream
+        return service
+
+    @patch('reports.google_ads_reports.get_google_ads_service')
+    def test_tree_mode_walks_breadth_first_without_cap(self, mock_service):
+        from .google_ads_reports import get_all_accounts_in_hierarchy
+        mock_service.return_value = self._service()
+        stats = {}
+        accounts = get_all_accounts_in_hierarchy('token', mode='tree', stats=stats)
+        by_id = {account['customer_id']: account for account in accounts}
+
+        self.assertEqual(len(accounts), 257)
+        self.assertEqual(by_id['2']['parent_id'], '200')
+        self.assertEqual(by_id['1050']['parent_id'], '400')
+        self.assertEqual(by_id['100']['descriptive_name'], 'Root')
+        self.assertEqual(stats['query_count'], 4)
+        self.assertFalse(stats['truncated'])
+
+    @patch('reports.google_ads_reports.get_google_ads_service')
+    def test_flat_mode_uses_a_single_query(self, mock_service):
+        from .google_ads_reports import get_all_accounts_in_hierarchy
+        mock_service.return_value = self._service()
+        stats = {}
+        accounts = get_all_accounts_in_hierarchy('token', mode='flat', stats=stats)
+
+        self.assertEqual(len(accounts), 257)
+        self.assertEqual(stats['query_count'], 1)
+        self.assertEqual(mock_service.return_value.search_stream.call_count, 1)
+        self.assertEqual({account['customer_id']: account for account in accounts}['100']['descriptive_name'], 'Root')
+
+
+@override_settings(COMBINED_CACHE_ENABLED=False)
+@patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
+class CombinedReportConcurrencyTests(ReportsAPITestCase):
+    def setUp(self):
+        from django.conf import settings
+        self.user = create_test_user(username='combined', email='combined@example.com')
+        self.client.login(username=self.user.username, password='password')
+        GoogleAccount.objects.create(user_email=settings.GOOGLE_ACCOUNT_EMAIL, refresh_token='fake_token')
+        self.params = {'start_date': '2024-01-01', 'end_date': '2024-01-31'}
+
+    @patch('reports.views.fetch_all_client_campaign_costs')
+    @patch('reports.views.fetch_binom_data')
+    def test_binom_and_google_ads_run_concurrently(self, mock_binom, mock_costs, mock_perm):
+        import threading
+        ads_started = threading.Event()
+
+        def binom(*args, **kwargs):
+            # Only succeeds if the Google Ads fetch starts while Binom is still in flight.
+            self.assertTrue(ads_started.wait(timeout=5))
+            return [{'name': 'Acct - 250417_02 Camp (site.com)', 'revenue': '50', 'leads': '2'}]
+
+        def costs(*args, **kwargs):
+            ads_started.set()
+            return [{'Account': 'Acct', 'Campaign': 'Acct - 250417_02 Camp', 'Cost': 20.0}]
+
+        mock_binom.side_effect = binom
+        mock_costs.side_effect = costs
+        response = self.client.get(reverse('combined_report'), self.params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'], [
+            {'Account': 'Acct', 'Campaign': 'Acct - 250417_02 Camp', 'Total Spend': 20.0, 'Revenue': 50.0, 'Sales': '2'}
+        ])
+
+    @patch('reports.views.fetch_all_client_campaign_costs', return_value=[])
+    @patch('reports.views.fetch_binom_data')
+    def test_binom_error_is_surfaced(self, mock_binom, mock_costs, mock_perm):
+        import requests
+        mock_binom.side_effect = requests.exceptions.HTTPError('Binom is down')
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.client.get(reverse('combined_report'), self.params)
+        mock_costs.assert_called_once()
+
+
+class BinomClientTests(ReportsAPITestCase):
+    def _response(self, status_code, payload=None, headers=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        response.json.return_value = payload
+        if status_code >= 400:
+            import requests
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError(str(status_code))
+        return response
+
+    @patch('reports.binom_service.time.sleep')
+    @patch('reports.binom_service.get_binom_session')
+    def test_retries_transient_errors_and_records_stats(self, mock_session, mock_sleep):
+        import requests
+        from .binom_service import fetch_binom_data
+        mock_session.return_value.get.side_effect = [
+            requests.exceptions.ConnectTimeout('slow'),
+            self._response(503),
+            self._response(200, [{'name': 'A'}]),
+        ]
+        stats = {}
+        data = fetch_binom_data('2024-01-01', '2024-01-02', stats=stats)
+
+        self.assertEqual(data, [{'name': 'A'}])
+        self.assertEqual(stats['retries'], 2)
+        self.assertEqual(stats['status_code'], 200)
+        self.assertEqual(mock_sleep.call_count, 2)
+        _, kwargs = mock_session.return_value.get.call_args
+        self.assertEqual(kwargs['timeout'], (5, 60))
+
+    @override_settings(BINOM_MAX_RETRIES=1)
+    @patch('reports.binom_service.time.sleep')
+    @patch('reports.binom_service.get_binom_session')
+    def test_gives_up_after_max_retries(self, mock_session, mock_sleep):
+        import requests
+        from .binom_service import fetch_binom_data
+        mock_session.return_value.get.side_effect = [self._response(429, headers={'Retry-After': '2'}), self._response(502)]
+        with self.assertRaises(requests.exceptions.HTTPError):
+            fetch_binom_data('2024-01-01', '2024-01-02')
+        mock_sleep.assert_called_once_with(2.0)
+
+    @patch('reports.binom_service.get_binom_session')
+    def test_client_errors_are_not_retried(self, mock_session):
+        import requests
+        from .binom_service import fetch_binom_data
+        mock_session.return_value.get.return_value = self._response(403)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            fetch_binom_data('2024-01-01', '2024-01-02')
+        self.assertEqual(mock_session.return_value.get.call_count, 1)
+
+
+class BinomStreamingParserTests(ReportsAPITestCase):
+    ROWS = [
+        {'id': 1, 'name': 'Café – 250417_02', 'leads': '3', 'revenue': '12.50', 'extra': {'nested': [1, 2]}},
+        {'id': 2, 'name': 'Empty', 'leads': '0', 'revenue': '0'},
+        {'id': 3, 'name': 'Numbers', 'leads': 12345, 'revenue': 6789.125},
+    ]
+
+    def _chunks(self, text, size):
+        data = text.encode('utf-8')
+        return [data[i:i + size] for i in range(0, len(data), size)]
+
+    def test_parses_top_level_array_in_small_chunks(self):
+        from .binom_service import iter_json_array
+        text = json.dumps(self.ROWS, ensure_ascii=False, indent=2)
+        for size in (1, 2, 7, 4096):
+            with self.subTest(chunk_size=size):
+                self.assertEqual(list(iter_json_array(self._chunks(text, size))), self.ROWS)
+
+    def test_parses_data_key_of_an_object(self):
+        from .binom_service import iter_json_array
+        text = json.dumps({'meta': {'total': [3, 'x']}, 'data': self.ROWS, 'after': 1})
+        self.assertEqual(list(iter_json_array(self._chunks(text, 5))), self.ROWS)
+        self.assertEqual(list(iter_json_array(self._chunks('{"data": []}', 3))), [])
+        with self.assertRaisesMessage(ValueError, '"error": "denied"'):
+            list(iter_json_array(self._chunks('{"error": "denied"}', 3)))
+
+    def test_bare_numbers_split_across_chunks(self):
+        from .binom_service import iter_json_array
+        self.assertEqual(list(iter_json_array([b'[12.', b'5]'])), [12.5])
+        self.assertEqual(list(iter_json_array([b'[1e', b'3, -2.5E', b'+1]'])), [1000.0, -25.0])
+        text = '[0, 12.5, -3, 1e3, 2.5E-2, 7]'
+        for size in range(1, len(text) + 1):
+            with self.subTest(chunk_size=size):
+                self.assertEqual(list(iter_json_array(self._chunks(text, size))), [0, 12.5, -3, 1000.0, 0.025, 7])
+
+    def test_malformed_payload_raises(self):
+        from .binom_service import iter_json_array
+        with self.assertRaises(ValueError):
+            list(iter_json_array(self._chunks('[{"a": 1} {"b": 2}]', 4)))
+        with self.assertRaises(ValueError):
+            list(iter_json_array(self._chunks('[{"a": 1}, {"b": ', 4)))
+
+    @patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
+    @patch('reports.views.fetch_binom_data')
+    @patch('reports.views.iter_binom_rows')
+    def test_generate_report_stream_mode(self, mock_iter_rows, mock_fetch, mock_perm):
+        mock_iter_rows.return_value = iter(self.ROWS)
+        response = self.client.get(reverse('generate_report'), {'stream': '1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data], [1, 3])
+        mock_fetch.assert_not_called()
+
+
+@override_settings(BINOM_CACHE_ENABLED=False)
+class BinomShardingTests(ReportsAPITestCase):
+    def test_split_date_range(self):
+        from .report_service import split_date_range
+        self.assertEqual(
+            split_date_range('2024-01-03', '2024-01-16', 'week'),
+            [('2024-01-03', '2024-01-07'), ('2024-01-08', '2024-01-14'), ('2024-01-15', '2024-01-16')]
+        )
+        self.assertEqual(len(split_date_range('2024-01-01', '2024-03-31', 'day')), 91)
+        with self.assertRaises(ValueError):
+            split_date_range('2024-01-01', '2024-01-02', 'month')
+
+    @patch('reports.report_service.fetch_binom_data_from_binom_module')
+    def test_sharded_fetch_reaggregates_shards(self, mock_fetch):
+        from .report_service import fetch_binom_data
+        calls = []
+
+        def fetch(start_date, end_date, *args):
+            calls.append(start_date)
+            return {'data': [
+                {'id': 1, 'name': 'A', 'leads': '2', 'revenue': '10.25', 'clicks': '5', 'cr': len(calls) * 10},
+                {'id': 2, 'name': 'B', 'leads': '0', 'revenue': '0'},
+            ]}
+
+        mock_fetch.side_effect = fetch
+        result = fetch_binom_data('2024-01-01', '2024-01-21', shard='week')
+
+        # clicks are summed; 'cr' differs between shards and can't be re-aggregated, so it is dropped.
+        self.assertEqual(result, {'data': [
+            {'id': 1, 'name': 'A', 'leads': '6', 'revenue': '30.75', 'clicks': '15'},
+            {'id': 2, 'name': 'B', 'leads': '0', 'revenue': '0'},
+        ]})
+        self.assertEqual(sorted(calls), ['2024-01-01', '2024-01-08', '2024-01-15'])
+
+    @override_settings(BINOM_MAX_RETRIES=1)
+    @patch('reports.binom_service.time.sleep')
+    @patch('reports.binom_service.get_binom_session')
+    def test_shards_are_retried_by_request_binom_only(self, mock_session, mock_sleep):
+        import requests
+        from unittest.mock import MagicMock
+        from .report_service import fetch_binom_data_sharded
+
+        def response(status_code):
+            result = MagicMock(status_code=status_code, headers={})
+            result.json.return_value = {'data': [{'id': 1, 'name': 'A', 'leads': '1', 'revenue': '1'}]}
+            if status_code >= 400:
+                result.raise_for_status.side_effect = requests.exceptions.HTTPError(response=result)
+            return result
+
+        def get(url, **kwargs):
+            return response(503 if 'dateFrom=2024-01-08' in url else 200)
+
+        mock_session.return_value.get.side_effect = get
+        with self.assertRaises(requests.exceptions.HTTPError):
+            fetch_binom_data_sharded('2024-01-01', '2024-01-14', 'UTC', '1', shard='week', max_workers=1)
+        failed = [call for call in mock_session.return_value.get.call_args_list if 'dateFrom=2024-01-08' in call.args[0]]
+        # One attempt plus BINOM_MAX_RETRIES, with no second retry loop around the shard.
+        self.assertEqual(len(failed), 2)
+        self.assertEqual(mock_sleep.call_count, 1)
+
+
+@override_settings(BINOM_CACHE_ENABLED=True)
+class BinomCacheTests(ReportsAPITestCase):
+    def setUp(self):
+        from django.core.cache import caches
+        caches['reports'].clear()
+
+    @patch('reports.report_service.fetch_binom_data_from_binom_module')
+    def test_identical_requests_are_served_from_cache(self, mock_fetch):
+        from .report_service import fetch_binom_data, invalidate_binom_cache
+        mock_fetch.return_value = [{'name': 'A'}]
+
+        fetch_binom_data('2024-01-01', '2024-01-31', 'UTC', '1,6')
+        self.assertEqual(fetch_binom_data('2024-01-01', '2024-01-31', 'UTC', '6, 1'), [{'name': 'A'}])
+        self.assertEqual(mock_fetch.call_count, 1)
+
+        fetch_binom_data('2024-01-01', '2024-01-31', 'UTC', '1,6', refresh=True)
+        self.assertEqual(mock_fetch.call_count, 2)
+
+        invalidate_binom_cache('2024-01-01', '2024-01-31', 'UTC', '1,6')
+        fetch_binom_data('2024-01-01', '2024-01-31', 'UTC', '1,6')
+        self.assertEqual(mock_fetch.call_count, 3)
+
+        invalidate_binom_cache()
+        fetch_binom_data('2024-01-01', '2024-01-31', 'UTC', '1,6')
+        self.assertEqual(mock_fetch.call_count, 4)
+
+    @patch('reports.report_service.fetch_binom_data_from_binom_module')
+    def test_sharded_and_full_fetches_are_cached_apart(self, mock_fetch):
+        from .report_service import fetch_binom_data, invalidate_binom_cache
+        mock_fetch.side_effect = lambda start_date, *args: [{'id': 1, 'name': 'A', 'revenue': '1', 'cr': start_date}]
+
+        full = fetch_binom_data('2024-01-01', '2024-01-14', 'UTC', '1,6')
+        sharded = fetch_binom_data('2024-01-01', '2024-01-14', 'UTC', '1,6', shard='week')
+        self.assertIn('cr', full[0])
+        self.assertNotIn('cr', sharded[0])
+        self.assertEqual(fetch_binom_data('2024-01-01', '2024-01-14', 'UTC', '1,6'), full)
+        self.assertEqual(mock_fetch.call_count, 3)
+
+        invalidate_binom_cache('2024-01-01', '2024-01-14', 'UTC', '1,6')
+        fetch_binom_data('2024-01-01', '2024-01-14', 'UTC', '1,6', shard='week')
+        self.assertEqual(mock_fetch.call_count, 5)
+
+    @override_settings(BINOM_CACHE_PAST_TTL=86400, BINOM_CACHE_TODAY_TTL=300)
+    def test_ttl_depends_on_whether_range_includes_today(self):
+        from datetime import datetime, timedelta
+        from zoneinfo import ZoneInfo
+        from .report_service import binom_cache_ttl
+        today = datetime.now(ZoneInfo('Pacific/Kiritimati')).date()
+        self.assertEqual(binom_cache_ttl((today - timedelta(days=1)).isoformat(), 'Pacific/Kiritimati'), 86400)
+        self.assertEqual(binom_cache_ttl(today.isoformat(), 'Pacific/Kiritimati'), 300)
+        self.assertEqual(binom_cache_ttl(None, 'America/Atikokan'), 300)
+
+
+@override_settings(GOOGLE_ADS_COST_MUTABLE_DAYS=3)
+class DailyCostStoreTests(ReportsAPITestCase):
+    ACCOUNTS = [
+        {'customer_id': '1', 'parent_id': '9', 'descriptive_name': 'Client', 'is_manager': False},
+        {'customer_id': '9', 'parent_id': None, 'descriptive_name': 'Root', 'is_manager': True},
+    ]
+
+    def _daily_rows(self, customer_id, start_date, end_date):
+        from datetime import date, timedelta
+        day, last, rows = date.fromisoformat(start_date), date.fromisoformat(end_date), []
+        while day <= last:
+            rows.append({'campaign_id': '55', 'campaign_name': 'Camp', 'account_name': 'Client', 'date': day, 'cost_micros': 1_500_000})
+            day += timedelta(days=1)
+        return rows
+
+    @patch('reports.google_ads_reports.fetch_campaign_daily_costs')
+    @patch('reports.google_ads_reports.get_account_hierarchy')
+    def test_only_missing_and_mutable_days_are_fetched(self, mock_accounts, mock_daily):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .cost_store import mutable_since
+        from .google_ads_reports import fetch_all_client_campaign_costs
+        mock_accounts.return_value = self.ACCOUNTS
+        mock_daily.side_effect = lambda token, cid, start, end: self._daily_rows(cid, start, end)
+        today = timezone.localdate()
+        start = today - timedelta(days=29)
+
+        first = fetch_all_client_campaign_costs('token', start.isoformat(), today.isoformat(), use_store=True)
+        self.assertEqual(first, [{'Account': 'Client', 'Campaign': 'Camp', 'Cost': 45.0}])
+        self.assertEqual([call.args[2:] for call in mock_daily.call_args_list], [(start.isoformat(), today.isoformat())])
+
+        mock_daily.reset_mock()
+        second = fetch_all_client_campaign_costs('token', (start - timedelta(days=2)).isoformat(), today.isoformat(), use_store=True)
+        self.assertEqual(second, [{'Account': 'Client', 'Campaign': 'Camp', 'Cost': 48.0}])
+        self.assertEqual([call.args[2:] for call in mock_daily.call_args_list], [
+            ((start - timedelta(days=2)).isoformat(), (start - timedelta(days=1)).isoformat()),
+            (mutable_since().isoformat(), today.isoformat()),
+        ])
+
+    @override_settings(GOOGLE_ADS_COST_MUTABLE_DAYS=3)
+    def test_mutable_window_follows_the_latest_account_timezone(self):
+        from datetime import date, datetime, timezone as dt_timezone
+        from .cost_store import mutable_since
+        # 05:00 UTC on March 10 is still March 9 in accounts west of UTC.
+        with patch('reports.cost_store.timezone.now', return_value=datetime(2024, 3, 10, 5, tzinfo=dt_timezone.utc)):
+            self.assertEqual(mutable_since(), date(2024, 3, 6))
+        with patch('reports.cost_store.timezone.now', return_value=datetime(2024, 3, 10, 13, tzinfo=dt_timezone.utc)):
+            self.assertEqual(mutable_since(), date(2024, 3, 7))
+
+    @patch('reports.google_ads_reports.fetch_campaign_daily_costs', return_value=None)
+    @patch('reports.google_ads_reports.get_account_hierarchy')
+    def test_failed_fetch_is_not_marked_as_covered(self, mock_accounts, mock_daily):
+        from .google_ads_reports import fetch_all_client_campaign_costs
+        from .models import DailyCostCoverage
+        mock_accounts.return_value = self.ACCOUNTS
+        self.assertEqual(fetch_all_client_campaign_costs('token', '2024-01-01', '2024-01-31', use_store=True), [])
+        self.assertFalse(DailyCostCoverage.objects.exists())
+
+    def test_overlapping_stores_upsert_and_drop_vanished_campaigns(self):
+        from datetime import date
+        from .cost_store import store_daily_costs
+        from .models import DailyCampaignCost
+        first = self._daily_rows('1', '2024-01-01', '2024-01-03')
+        first.append({'campaign_id': '66', 'campaign_name': 'Gone', 'account_name': 'Client', 'date': date(2024, 1, 2), 'cost_micros': 1})
+        store_daily_costs('1', '2024-01-01', '2024-01-03', first)
+        second = self._daily_rows('1', '2024-01-02', '2024-01-04')
+        second[0]['cost_micros'] = 2_000_000
+        store_daily_costs('1', '2024-01-02', '2024-01-04', second)
+
+        stored = DailyCampaignCost.objects.filter(customer_id='1').order_by('date')
+        self.assertEqual(
+            [(row.date.day, row.campaign_id, row.cost_micros) for row in stored],
+            [(1, '55', 1_500_000), (2, '55', 2_000_000), (3, '55', 1_500_000), (4, '55', 1_500_000)],
+        )
+
+
+class ReportMergeTests(ReportsAPITestCase):
+    def test_merge_joins_filters_and_sorts(self):
+        from .report_merge import merge_report_rows
+        binom = {'data': [
+            {'name': 'Beta - 250417_02 Offer (beta.com)', 'revenue': '100', 'leads': '4'},
+            {'name': 'alpha - Plain  Offer (a.com)', 'revenue': '30', 'leads': '1'},
+            {'name': 'Zero - 250101_01 Nothing', 'revenue': '0', 'leads': '0'},
+        ]}
+        google = [
+            {'Account': 'Beta Ads', 'Campaign': 'Beta - 250417_02 Offer renamed', 'Cost': 40.0},
+            {'Account': '', 'Campaign': 'Gamma - Google only (g.com)', 'Cost': 12.5},
+            {'Account': 'Zero', 'Campaign': 'Zero - 250101_01 Nothing', 'Cost': 0},
+        ]
+        self.assertEqual([row.to_dict() for row in merge_report_rows(binom, google)], [
+            {'Account': 'alpha', 'Campaign': 'alpha - Plain  Offer', 'Total Spend': 0, 'Revenue': 30.0, 'Sales': '1'},
+            {'Account': 'Beta Ads', 'Campaign': 'Beta - 250417_02 Offer', 'Total Spend': 40.0, 'Revenue': 100.0, 'Sales': '4'},
+            {'Account': 'Gamma', 'Campaign': 'Gamma - Google only', 'Total Spend': 12.5, 'Revenue': 0, 'Sales': '0'},
+        ])
+
+    def test_campaign_row_parsing_and_metrics(self):
+        from .rows import CampaignRow, parse_binom_rows, parse_cost_rows
+        binom = list(parse_binom_rows({'data': [{'name': 'A - Offer (a.com)', 'revenue': 'bad', 'leads': '3'}]}))
+        self.assertEqual(binom, [CampaignRow('', 'A - Offer (a.com)', 0, 0.0, '3')])
+        row = CampaignRow('Acct', 'Camp', 40.0)
+        costs = list(parse_cost_rows([row, {'Account': 'B', 'Campaign': 'y', 'Cost': '2.5'}]))
+        self.assertIs(costs[0], row)
+        self.assertEqual(costs[1].to_cost_dict(), {'Account': 'B', 'Campaign': 'y', 'Cost': 2.5})
+        merged = CampaignRow('Acct', 'Camp', spend=40.0, revenue=50.0)
+        self.assertEqual((merged.pl, merged.roi), (10.0, 0.25))
+        self.assertIsNone(CampaignRow('Acct', 'Camp', revenue=5.0).roi)
+        self.assertFalse(hasattr(merged, '__dict__'))
+
+    def test_benchmark_command_runs(self):
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('benchmark_merge', sizes='200', repeat=1, stdout=out)
+        self.assertIn('rows/sec', out.getvalue())
+
+
+class ReportStoreTests(ReportsAPITestCase):
+    def test_report_type_for_range(self):
+        from .report_store import report_type_for_range
+        self.assertEqual(report_type_for_range('2024-02-05', '2024-02-05'), 'daily')
+        # Exact weeks and months are left to the rollups.
+        self.assertEqual(report_type_for_range('2024-02-05', '2024-02-11'), 'custom')
+        self.assertEqual(report_type_for_range('2024-02-01', '2024-02-29'), 'custom')
+        self.assertEqual(report_type_for_range('2024-02-02', '2024-02-08'), 'custom')
+
+    def test_rerunning_a_range_updates_rows_in_batches(self):
+        from decimal import Decimal
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import ReportRecord
+        from .report_store import store_report_rows
+        from .rows import CampaignRow
+        rows = [CampaignRow(f'Acct {i % 7}', f'Camp {i}', 10.0, 15.0, '2') for i in range(1200)]
+        rows.append(CampaignRow('Acct', 'Binom only', 0, 5.0, '1'))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(store_report_rows(rows, '2024-02-01', '2024-02-29'), 1201)
+        # One statement per batch (SQLite caps batches by its bound-parameter limit), not per row.
+        self.assertLess(len(queries), 30)
+
+        rows[0] = CampaignRow('Acct 0', 'Camp 0', 20.0, 15.0, '3')
+        store_report_rows(rows, '2024-02-01', '2024-02-29')
+        self.assertEqual(ReportRecord.objects.count(), 1201)
+        record = ReportRecord.objects.get(account_name='Acct 0', campaign_name='Camp 0')
+        self.assertEqual((record.report_type, record.total_spend, record.pl, record.roi, record.sales),
+                         ('custom', Decimal('20.00'), Decimal('-5.00'), Decimal('-25.00'), 3))
+        self.assertIsNone(ReportRecord.objects.get(campaign_name='Binom only').roi)
+
+    def test_rerun_drops_vanished_campaigns_and_leaves_rollups_alone(self):
+        from .models import ReportRecord
+        from .report_store import store_report_rows
+        from .rows import CampaignRow
+        store_report_rows([CampaignRow('Acct', 'Weekly', 1.0, 2.0, '1')], '2024-02-05', '2024-02-11', report_type='weekly')
+        store_report_rows([
+            CampaignRow('Acct', 'Kept', 10.0, 15.0, '1'),
+            CampaignRow('Acct', 'Paused', 10.0, 15.0, '1'),
+            CampaignRow('Gone', 'Camp', 10.0, 15.0, '1'),
+        ], '2024-02-05', '2024-02-11')
+
+        store_report_rows([CampaignRow('Acct', 'Kept', 12.0, 15.0, '1')], '2024-02-05', '2024-02-11')
+        self.assertEqual(
+            sorted(ReportRecord.objects.values_list('report_type', 'account_name', 'campaign_name')),
+            [('custom', 'Acct', 'Kept'), ('weekly', 'Acct', 'Weekly')],
+        )
+
+
+@patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
+class ReportHistoryTests(ReportsAPITestCase):
+    def setUp(self):
+        from datetime import date, timedelta
+        from .report_store import store_report_rows
+        from .rows import CampaignRow
+        self.user = create_test_user(username='history', email='history@example.com')
+        self.client.login(username=self.user.username, password='password')
+        day = date(2024, 4, 1)
+        for offset in range(3):
+            current = day + timedelta(days=offset)
+            store_report_rows([
+                CampaignRow('Alpha', 'A1', 10.0, 15.0, '1'),
+                CampaignRow('Alpha', 'A2', 0, 5.0, '0'),
+                CampaignRow('Beta', 'B1', 20.0, 10.0, '2'),
+                CampaignRow('Gamma', 'G1', 0, 1.0, '0'),
+            ], current, current)
+        # A monthly record in the same range must not be double-counted with the daily ones.
+        store_report_rows([CampaignRow('Alpha', 'A1', 999.0, 0, '0')], '2024-04-01', '2024-04-30', report_type='monthly')
+
+    def test_groups_by_account_with_sql_roi(self, mock_perm):
+        response = self.client.get(reverse('report_history'), {'start_date': '2024-04-01', 'end_date': '2024-06-30'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [
+            {'account_name': 'Alpha', 'total_spend': 30.0, 'revenue': 60.0, 'pl': 30.0, 'roi': 100.0, 'sales': 3},
+            {'account_name': 'Beta', 'total_spend': 60.0, 'revenue': 30.0, 'pl': -30.0, 'roi': -50.0, 'sales': 6},
+            {'account_name': 'Gamma', 'total_spend': 0.0, 'revenue': 3.0, 'pl': 3.0, 'roi': None, 'sales': 0},
+        ])
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_roi_is_not_truncated_by_integer_division(self, mock_perm):
+        from .report_store import store_report_rows
+        from .rows import CampaignRow
+        store_report_rows([CampaignRow('Delta', 'D1', 3.0, 4.0, '1')], '2024-05-01', '2024-05-01')
+        response = self.client.get(reverse('report_history'), {'account': 'Delta'})
+        self.assertEqual(response.data['results'][0]['roi'], 33.33)
+
+    def test_keyset_pages_cover_every_group_once(self, mock_perm):
+        seen = []
+        params = {'group_by': 'campaign', 'page_size': 1}
+        for _ in range(10):
+            response = self.client.get(reverse('report_history'), params)
+            seen.extend((row['account_name'], row['campaign_name']) for row in response.data['results'])
+            if not response.data['next_cursor']:
+                break
+            params['cursor'] = response.data['next_cursor']
+        self.assertEqual(seen, [('Alpha', 'A1'), ('Alpha', 'A2'), ('Beta', 'B1'), ('Gamma', 'G1')])
+
+    def test_filters_and_invalid_parameters(self, mock_perm):
+        response = self.client.get(reverse('report_history'), {'account': 'Alpha', 'group_by': 'date', 'end_date': '2024-04-02'})
+        self.assertEqual([str(row['start_date']) for row in response.data['results']], ['2024-04-01', '2024-04-02'])
+        self.assertEqual(response.data['results'][0]['revenue'], 20.0)
+        self.assertEqual(self.client.get(reverse('report_history'), {'cursor': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('report_history'), {'group_by': 'day'}).status_code, 400)
+
+
+class ReportRollupTests(ReportsAPITestCase):
+    def _store_days(self, start, days, spend=10.0):
+        from datetime import timedelta
+        from .report_store import store_report_rows
+        from .rows import CampaignRow
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            store_report_rows([CampaignRow('Acct', 'Camp', spend, 15.0, '1')], day, day)
+
+    def test_incremental_rollups_only_touch_changed_buckets(self):
+        from datetime import date
+        from decimal import Decimal
+        from unittest.mock import patch as mock_patch
+        from .models import ReportRecord
+        from .report_rollups import rollup_bucket, rollup_reports
+        self._store_days(date(2024, 4, 1), 30)  # all of April: 5 full ISO weeks (Apr 1-28) + a partial one
+
+        summary = rollup_reports()
+        self.assertEqual(summary, {'changed_days': 30, 'buckets_rebuilt': 5, 'buckets_incomplete': 1})
+        monthly = ReportRecord.objects.get(report_type='monthly', start_date=date(2024, 4, 1))
+        self.assertEqual((monthly.end_date, monthly.total_spend, monthly.sales), (date(2024, 4, 30), Decimal('300.00'), 30))
+        self.assertEqual(ReportRecord.objects.filter(report_type='weekly').count(), 4)
+
+        self.assertEqual(rollup_reports()['changed_days'], 0)
+
+        self._store_days(date(2024, 4, 10), 1, spend=20.0)
+        with mock_patch('reports.report_rollups.rollup_bucket', wraps=rollup_bucket) as spy:
+            rollup_reports()
+        self.assertEqual(sorted(call.args for call in spy.call_args_list), [
+            ('monthly', date(2024, 4, 1), date(2024, 4, 30)),
+            ('weekly', date(2024, 4, 8), date(2024, 4, 14)),
+        ])
+        monthly.refresh_from_db()
+        self.assertEqual(monthly.total_spend, Decimal('310.00'))
+
+    def test_days_without_campaigns_count_as_stored(self):
+        from datetime import date
+        from decimal import Decimal
+        from .models import ReportRecord
+        from .report_rollups import rollup_reports
+        from .report_store import store_report_rows
+        self._store_days(date(2024, 4, 1), 6)
+        store_report_rows([], '2024-04-07', '2024-04-07')
+
+        self.assertEqual(rollup_reports()['buckets_rebuilt'], 1)
+        weekly = ReportRecord.objects.get(report_type='weekly', start_date=date(2024, 4, 1))
+        self.assertEqual(weekly.total_spend, Decimal('60.00'))
+
+    def test_rerun_that_empties_a_day_rebuilds_its_buckets(self):
+        from datetime import date
+        from decimal import Decimal
+        from .models import ReportRecord
+        from .report_rollups import rollup_reports
+        from .report_store import store_report_rows
+        self._store_days(date(2024, 4, 1), 7)
+        rollup_reports()
+
+        store_report_rows([], '2024-04-03', '2024-04-03')
+        self.assertEqual(rollup_reports()['changed_days'], 1)
+        weekly = ReportRecord.objects.get(report_type='weekly', start_date=date(2024, 4, 1))
+        self.assertEqual(weekly.total_spend, Decimal('60.00'))
+
+
+@patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
+class ReportJobTests(ReportsAPITestCase):
+    def setUp(self):
+        from django.conf import settings
+        self.user = create_test_user(username='jobs', email='jobs@example.com')
+        self.client.login(username=self.user.username, password='password')
+        GoogleAccount.objects.create(user_email=settings.GOOGLE_ACCOUNT_EMAIL, refresh_token='fake_token')
+
+    @patch('reports.views.fetch_all_client_campaign_costs')
+    @patch('reports.views.fetch_binom_data')
+    def test_job_is_queued_then_run_by_the_worker(self, mock_binom, mock_costs, mock_perm):
+        from .report_jobs import run_worker
+        mock_binom.return_value = [{'name': 'Acct - 250417_02 Camp (site.com)', 'revenue': '50', 'leads': '2'}]
+        mock_costs.return_value = [{'Account': 'Acct', 'Campaign': 'Acct - 250417_02 Camp', 'Cost': 20.0}]
+
+        response = self.client.post(reverse('combined_report_jobs'), {'start_date': '2024-01-01', 'end_date': '2024-01-31'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'queued')
+        mock_binom.assert_not_called()
+
+        self.assertEqual(run_worker(concurrency=1, once=True), 1)
+        job = self.client.get(response.data['status_url']).data
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['result']['data'], [
+            {'Account': 'Acct', 'Campaign': 'Acct - 250417_02 Camp', 'Total Spend': 20.0, 'Revenue': 50.0, 'Sales': '2'}
+        ])
+        self.assertEqual(job['result']['start_date'], '2024-01-01')
+
+    @patch('reports.views.fetch_all_client_campaign_costs', return_value=[])
+    @patch('reports.views.fetch_binom_data', side_effect=RuntimeError('502 Bad Gateway'))
+    def test_failed_job_records_the_error(self, mock_binom, mock_costs, mock_perm):
+        from .models import ReportJob
+        from .report_jobs import run_worker
+        job = ReportJob.objects.create(start_date='2024-01-01', end_date='2024-01-02')
+        run_worker(concurrency=1, once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error, job.attempts), ('failed', '502 Bad Gateway', 1))
+
+    def test_claims_are_exclusive_and_stale_jobs_are_reclaimed(self, mock_perm):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import ReportJob
+        from .report_jobs import claim_next_job
+        job = ReportJob.objects.create(start_date='2024-01-01', end_date='2024-01-02')
+        self.assertEqual(claim_next_job('a').pk, job.pk)
+        self.assertIsNone(claim_next_job('b'))
+
+        ReportJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+        with self.settings(REPORT_JOB_STALE_SECONDS=60):
+            reclaimed = claim_next_job('b')
+        self.assertEqual((reclaimed.pk, reclaimed.worker, reclaimed.attempts), (job.pk, 'b', 2))
+
+    def test_missing_dates_and_unknown_job(self, mock_perm):
+        self.assertEqual(self.client.post(reverse('combined_report_jobs'), {}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('combined_report_job', args=[999])).status_code, 404)
+
+    def test_invalid_dates_are_rejected(self, mock_perm):
+        from .models import ReportJob
+        for dates in ({'start_date': '2025-13-45', 'end_date': '2025-01-31'}, {'start_date': '2025-02-01', 'end_date': '2025-01-31'}):
+            self.assertEqual(self.client.post(reverse('combined_report_jobs'), dates, format='json').status_code, 400)
+        self.assertFalse(ReportJob.objects.exists())
+
+
+class SingleFlightTests(ReportsAPITestCase):
+    def setUp(self):
+        import tempfile
+        self.lock_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(SINGLE_FLIGHT_LOCK_DIR=self.lock_dir)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        import shutil
+        self.settings_override.disable()
+        shutil.rmtree(self.lock_dir, ignore_errors=True)
+
+    def test_concurrent_calls_in_one_process_run_once(self):
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from .single_flight import SingleFlight
+        flight = SingleFlight('test')
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=5)
+            return ['rows']
+
+        roles = [{} for _ in range(5)]
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(flight.do, 'key', work, stats=stats) for stats in roles]
+            started.wait(timeout=5)
+            time.sleep(0.2)  # let the followers join the leader's call
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [['rows']] * 5)
+        self.assertEqual(sorted(stats['role'] for stats in roles), ['leader'] + ['waited'] * 4)
+        self.assertEqual(flight.do('key', lambda: 'again'), 'again')
+
+    def test_waiter_reuses_result_of_another_process(self):
+        import fcntl
+        import hashlib
+        import threading
+        import time
+        from pathlib import Path
+        from django.core.cache import caches
+        from .single_flight import SingleFlight
+        flight = SingleFlight('test')
+        digest = hashlib.sha256(b'test:key').hexdigest()[:32]
+        # Another worker holds the key's lock (flock conflicts across separate open() calls too).
+        other = open(Path(self.lock_dir) / f"{digest}.lock", 'a+b')
+        fcntl.flock(other.fileno(), fcntl.LOCK_EX)
+
+        def other_worker_finishes():
+            time.sleep(0.2)
+            caches['reports'].set(f"singleflight:{digest}", (time.time(), ['from other worker']), 60)
+            fcntl.flock(other.fileno(), fcntl.LOCK_UN)
+            other.close()
+
+        threading.Thread(target=other_worker_finishes).start()
+        stats = {}
+        result = flight.do('key', lambda: self.fail('should reuse the shared result'), stats=stats)
+        self.assertEqual((result, stats['role']), (['from other worker'], 'shared'))
+
+
+@override_settings(COMBINED_CACHE_ENABLED=True, COMBINED_CACHE_FRESH_TTL=60)
+@patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
+class CombinedReportCacheTests(ReportsAPITestCase):
+    def setUp(self):
+        from django.conf import settings
+        from django.core.cache import caches
+        caches['reports'].clear()
+        self.user = create_test_user(username='swr', email='swr@example.com')
+        self.client.login(username=self.user.username, password='password')
+        GoogleAccount.objects.create(user_email=settings.GOOGLE_ACCOUNT_EMAIL, refresh_token='fake_token')
+        self.params = {'start_date': '2024-03-01', 'end_date': '2024-03-31'}
+
+    def _costs(self, cost):
+        return [{'Account': 'Acct', 'Campaign': 'Acct - 250417_02 Camp', 'Cost': cost}]
+
+    @patch('reports.report_cache._refresh_in_background')
+    @patch('reports.views.fetch_all_client_campaign_costs')
+    @patch('reports.views.fetch_binom_data', return_value=[])
+    def test_fresh_stale_and_forced_refresh(self, mock_binom, mock_costs, mock_refresh, mock_perm):
+        mock_costs.return_value = self._costs(10.0)
+        first = self.client.get(reverse('combined_report'), self.params)
+        self.assertEqual((first['X-Report-Cache'], first['Age']), ('miss', '0'))
+
+        mock_costs.return_value = self._costs(20.0)
+        second = self.client.get(reverse('combined_report'), self.params)
+        self.assertEqual(second['X-Report-Cache'], 'hit')
+        self.assertEqual(second.data['data'][0]['Total Spend'], 10.0)
+        self.assertEqual(mock_costs.call_count, 1)
+        mock_refresh.assert_not_called()
+
+        with self.settings(COMBINED_CACHE_FRESH_TTL=0):
+            stale = self.client.get(reverse('combined_report'), self.params)
+        self.assertEqual(stale['X-Report-Cache'], 'stale')
+        self.assertEqual(stale.data['data'][0]['Total Spend'], 10.0)
+        from .report_cache import _store
+        cache_key, build = mock_refresh.call_args.args
+        _store(cache_key, build())  # what the background thread does
+
+        refreshed = self.client.get(reverse('combined_report'), self.params)
+        self.assertEqual((refreshed['X-Report-Cache'], refreshed.data['data'][0]['Total Spend']), ('hit', 20.0))
+
+        mock_costs.return_value = self._costs(30.0)
+        forced = self.client.get(reverse('combined_report'), {**self.params, 'refresh': '1'})
+        self.assertEqual((forced['X-Report-Cache'], forced.data['data'][0]['Total Spend']), ('refresh', 30.0))
+
+    @override_settings(BINOM_CACHE_ENABLED=True, BINOM_SHARD_SIZE='')
+    @patch('reports.views.fetch_all_client_campaign_costs')
+    @patch('reports.report_service.fetch_binom_data_from_binom_module')
+    def test_forced_refresh_skips_the_binom_cache(self, mock_binom, mock_costs, mock_perm):
+        mock_costs.return_value = self._costs(10.0)
+        mock_binom.return_value = [{'name': 'Acct - 250417_02 Camp', 'revenue': '5', 'leads': '1'}]
+        self.client.get(reverse('combined_report'), self.params)
+        self.assertEqual(mock_binom.call_count, 1)
+
+        mock_binom.return_value = [{'name': 'Acct - 250417_02 Camp', 'revenue': '7', 'leads': '1'}]
+        forced = self.client.get(reverse('combined_report'), {**self.params, 'refresh': '1'})
+        self.assertEqual(mock_binom.call_count, 2)
+        self.assertEqual(forced.data['data'][0]['Revenue'], 7.0)
+
+
+@patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
+class ConditionalReportTests(ReportsAPITestCase):
+    def setUp(self):
+        self.user = create_test_user(username='etag', email='etag@example.com')
+        self.client.login(username=self.user.username, password='password')
+        GoogleAccount.objects.create(user_email='etag@example.com', refresh_token='fake_token')
+        self.params = {'email': 'etag@example.com', 'start_date': '2024-01-01', 'end_date': '2024-01-31'}
+
+    @patch('reports.views.fetch_all_client_campaign_costs')
+    def test_unchanged_report_is_answered_with_304(self, mock_costs, mock_perm):
+        mock_costs.return_value = [{'Account': 'A', 'Campaign': 'x', 'Cost': 1.0}]
+        first = self.client.get(reverse('google_ads_test'), self.params)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        etag = first['ETag']
+        self.assertIn('no-cache', first['Cache-Control'])
+        from .conditional import report_etag
+        self.assertEqual(etag, report_etag(first.content, first['Content-Type']))  # hashed from the rendered bytes
+
+        again = self.client.get(reverse('google_ads_test'), self.params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual((again.content, again['ETag']), (b'', etag))
+
+        mock_costs.return_value = [{'Account': 'A', 'Campaign': 'x', 'Cost': 2.0}]
+        changed = self.client.get(reverse('google_ads_test'), self.params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    @patch('reports.views.fetch_binom_data', return_value=[{'name': 'Camp', 'revenue': '1', 'leads': '1'}])
+    def test_errors_get_no_etag(self, mock_binom, mock_perm):
+        self.assertFalse(self.client.get(reverse('google_ads_test'), {}).has_header('ETag'))
+        response = self.client.get(reverse('generate_report'), {'start_date': '2024-01-01', 'end_date': '2024-01-31'})
+        self.assertTrue(response.has_header('ETag'))
+
+
+@override_settings(COMBINED_CACHE_ENABLED=False)
+@patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
+class CombinedReportExportTests(ReportsAPITestCase):
+    def setUp(self):
+        from django.conf import settings
+        self.user = create_test_user(username='export', email='export@example.com')
+        self.client.login(username=self.user.username, password='password')
+        GoogleAccount.objects.create(user_email=settings.GOOGLE_ACCOUNT_EMAIL, refresh_token='fake_token')
+        self.params = {'start_date': '2024-01-01', 'end_date': '2024-01-31'}
+
+    def _mock_upstreams(self, mock_binom, mock_costs):
+        mock_binom.return_value = [
+            {'name': 'Acct - 250417_02 Camp (site.com)', 'revenue': '50', 'leads': '2'},
+            {'name': 'Other - Binom only', 'revenue': '5', 'leads': '1'},
+        ]
+        mock_costs.return_value = [{'Account': 'Acct', 'Campaign': 'Acct - 250417_02 Camp', 'Cost': 20.0}]
+
+    @patch('reports.views.fetch_all_client_campaign_costs')
+    @patch('reports.views.fetch_binom_data')
+    def test_csv_export_streams_rows(self, mock_binom, mock_costs, mock_perm):
+        import csv
+        self._mock_upstreams(mock_binom, mock_costs)
+        response = self.client.get(reverse('combined_report_export', args=['csv']), self.params)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        body = iter(response.streaming_content)
+        self.assertEqual(next(body), b'Account,Campaign,Total Spend,Revenue,P/L,ROI,Sales,Start Date,End Date\r\n')
+        mock_binom.assert_called_once()  # loaded before the response starts, so failures aren't hidden in a 200
+
+        rows = list(csv.reader(b''.join(body).decode().splitlines()))
+        self.assertEqual(rows, [
+            ['Acct', 'Acct - 250417_02 Camp', '20.0', '50.0', '30.0', '150.0', '2', '2024-01-01', '2024-01-31'],
+            ['Other', 'Other - Binom only', '0', '5.0', '5.0', '', '1', '2024-01-01', '2024-01-31'],
+        ])
+
+    @patch('reports.views.fetch_all_client_campaign_costs')
+    @patch('reports.views.fetch_binom_data')
+    def test_ndjson_export_and_unknown_format(self, mock_binom, mock_costs, mock_perm):
+        self._mock_upstreams(mock_binom, mock_costs)
+        response = self.client.get(reverse('combined_report_export', args=['ndjson']), self.params)
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(lines[0], {
+            'Account': 'Acct', 'Campaign': 'Acct - 250417_02 Camp', 'Total Spend': 20.0, 'Revenue': 50.0,
+            'P/L': 30.0, 'ROI': 150.0, 'Sales': '2', 'Start Date': '2024-01-01', 'End Date': '2024-01-31',
+        })
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(self.client.get(reverse('combined_report_export', args=['xlsx']), self.params).status_code, 404)
+        self.assertEqual(self.client.get(reverse('combined_report_export', args=['csv'])).status_code, 400)
+
+    @patch('reports.views.fetch_all_client_campaign_costs', return_value=[])
+    @patch('reports.views.fetch_binom_data', side_effect=RuntimeError('502 Bad Gateway'))
+    def test_upstream_failure_is_an_error_response(self, mock_binom, mock_costs, mock_perm):
+        response = self.client.get(reverse('combined_report_export', args=['csv']), self.params)
+        self.assertEqual(response.status_code, 502)
+        self.assertFalse(response.streaming)
+        self.assertIn('502 Bad Gateway', response.data['error'])
+
+
+@skipUnless(find_spec('pyarrow'), 'pyarrow is not installed')
+@override_settings(COMBINED_CACHE_ENABLED=False)
+@patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
+class ColumnarRendererTests(ReportsAPITestCase):
+    def setUp(self):
+        from django.conf import settings
+        self.user = create_test_user(username='columnar', email='columnar@example.com')
+        self.client.login(username=self.user.username, password='password')
+        GoogleAccount.objects.create(user_email=settings.GOOGLE_ACCOUNT_EMAIL, refresh_token='fake_token')
+
+    @patch('reports.views.fetch_all_client_campaign_costs')
+    @patch('reports.views.fetch_binom_data')
+    def test_combined_report_as_parquet(self, mock_binom, mock_costs, mock_perm):
+        import io
+        from datetime import date
+        import pyarrow.parquet as pq
+        mock_binom.return_value = [{'name': 'Acct - 250417_02 Camp (site.com)', 'revenue': '50', 'leads': '2'}]
+        mock_costs.return_value = [{'Account': 'Acct', 'Campaign': 'Acct - 250417_02 Camp', 'Cost': 20.0}]
+        response = self.client.get(reverse('combined_report'), {'start_date': '2024-01-01', 'end_date': '2024-01-31', 'format': 'parquet'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.parquet')
+
+        table = pq.read_table(io.BytesIO(response.content))
+        self.assertEqual(table.column_names, ['Account', 'Campaign', 'Total Spend', 'Revenue', 'P/L', 'ROI', 'Sales', 'Start Date', 'End Date'])
+        self.assertEqual(str(table.schema.field('Sales').type), 'int64')
+        self.assertEqual(table.to_pylist(), [{
+            'Account': 'Acct', 'Campaign': 'Acct - 250417_02 Camp', 'Total Spend': 20.0, 'Revenue': 50.0,
+            'P/L': 30.0, 'ROI': 150.0, 'Sales': 2, 'Start Date': date(2024, 1, 1), 'End Date': date(2024, 1, 31),
+        }])
+
+    def test_history_as_arrow_file(self, mock_perm):
+        import pyarrow as pa
+        from .report_store import store_report_rows
+        from .rows import CampaignRow
+        store_report_rows([CampaignRow('Alpha', 'A1', 10.0, 15.0, '1'), CampaignRow('Beta', 'B1', 0, 5.0, '0')], '2024-04-01', '2024-04-01')
+        response = self.client.get(reverse('report_history'), {'format': 'arrow', 'page_size': 1})
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.arrow.file')
+        self.assertTrue(response['X-Next-Cursor'])
+        table = pa.ipc.open_file(pa.py_buffer(response.content)).read_all()
+        self.assertEqual(table.to_pylist(), [
+            {'account_name': 'Alpha', 'total_spend': 10.0, 'revenue': 15.0, 'pl': 5.0, 'roi': 50.0, 'sales': 1}
+        ])
+
+
+@override_settings(COMBINED_CACHE_ENABLED=False)
+@patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
+class ColumnLayoutTests(ReportsAPITestCase):
+    def setUp(self):
+        from django.conf import settings
+        self.user = create_test_user(username='layout', email='layout@example.com')
+        self.client.login(username=self.user.username, password='password')
+        GoogleAccount.objects.create(user_email=settings.GOOGLE_ACCOUNT_EMAIL, refresh_token='fake_token')
+        self.params = {'start_date': '2024-01-01', 'end_date': '2024-01-31', 'layout': 'columns'}
+
+    @patch('reports.views.fetch_all_client_campaign_costs')
+    @patch('reports.views.fetch_binom_data')
+    def test_combined_report_columns(self, mock_binom, mock_costs, mock_perm):
+        mock_binom.return_value = [{'name': 'Acct - 250417_02 Camp (site.com)', 'revenue': '50', 'leads': '2'}]
+        mock_costs.return_value = [
+            {'Account': 'Acct', 'Campaign': 'Acct - 250417_02 Camp', 'Cost': 20.0},
+            {'Account': 'Acct', 'Campaign': 'Acct - Google only', 'Cost': 5},
+        ]
+        response = self.client.get(reverse('combined_report'), self.params)
+        body = json.loads(response.content)
+        self.assertEqual(body['columns'], ['Account', 'Campaign', 'Total Spend', 'Revenue', 'Sales'])
+        self.assertEqual(body['data'], {
+            'Account': ['Acct', 'Acct'],
+            'Campaign': ['Acct - 250417_02 Camp', 'Acct - Google only'],
+            'Total Spend': [20.0, 5.0],
+            'Revenue': [50.0, 0.0],
+            'Sales': [2, 0],
+        })
+        self.assertEqual((body['total_rows'], body['start_date']), (2, '2024-01-01'))
+        self.assertEqual(self.client.get(reverse('combined_report'), {**self.params, 'layout': 'grid'}).status_code, 400)
+
+    @patch('reports.views.fetch_binom_data')
+    def test_generate_report_columns(self, mock_binom, mock_perm):
+        mock_binom.return_value = [
+            {'id': '7', 'name': 'b', 'leads': '3', 'revenue': '1.5'},
+            {'id': '8', 'name': 'a', 'leads': '0', 'revenue': '0'},
+            {'id': '9', 'name': 'A2', 'leads': '1', 'revenue': '0'},
+        ]
+        response = self.client.get(reverse('generate_report'), self.params)
+        self.assertEqual(response.data['data'], {'id': ['9', '7'], 'name': ['A2', 'b'], 'leads': [1, 3], 'revenue': [0.0, 1.5]})
+
+
+class ORJSONRendererTests(ReportsAPITestCase):
+    def test_output_matches_drf_json_renderer(self):
+        from datetime import date, datetime, timezone as dt_timezone
+        from decimal import Decimal
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import ORJSONRenderer
+        data = {
+            'rows': [{'Account': 'Ünïcode', 'Total Spend': 1.5, 'Sales': '2', 'roi': None}],
+            'decimal': Decimal('12.30'),
+            'day': date(2024, 1, 2),
+            'when': datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+            'empty': [],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+
+@override_settings(COMBINED_CACHE_ENABLED=False, SERVER_TIMING_TOP_CUSTOMERS=2)
+@patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
+class ServerTimingTests(ReportsAPITestCase):
+    def setUp(self):
+        from django.conf import settings
+        self.user = create_test_user(username='timing', email='timing@example.com')
+        self.client.login(username=self.user.username, password='password')
+        GoogleAccount.objects.create(user_email=settings.GOOGLE_ACCOUNT_EMAIL, refresh_token='fake_token')
+
+    @patch('reports.views.fetch_all_client_campaign_costs')
+    @patch('reports.views.fetch_binom_data')
+    def test_combined_report_stages_and_slowest_customers(self, mock_binom, mock_costs, mock_perm):
+        from . import timing
+
+        def binom(*args, **kwargs):
+            # Runs on the binom-fetch thread, so this checks the collector is handed over.
+            timing.record('binom', 12.0)
+            return [{'name': 'Acct - 250417_02 Camp (site.com)', 'revenue': '50', 'leads': '2'}]
+
+        def costs(*args, **kwargs):
+            for customer_id, ms in (('111', 5.0), ('222', 30.0), ('333', 20.0)):
+                timing.record_customer(customer_id, ms)
+            return []
+
+        mock_binom.side_effect = binom
+        mock_costs.side_effect = costs
+        with self.assertLogs('reports.timing', level='INFO') as logs:
+            response = self.client.get(reverse('combined_report'), {'start_date': '2024-01-01', 'end_date': '2024-01-31'})
+
+        metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertIn('binom;dur=12.0', response['Server-Timing'])
+        for name in ('report', 'merge', 'store', 'payload', 'serialize', 'total'):
+            self.assertIn(name, metrics)
+        self.assertTrue(response['Server-Timing'].endswith('ads-customer;desc="222";dur=30.0, ads-customer;desc="333";dur=20.0'))
+        self.assertIn('customers_ms=[222=30.0 333=20.0 111=5.0]', logs.output[0])
+        self.assertEqual(logs.records[0].timing_stages_ms['binom'], 12.0)
+
+    def test_timing_is_a_no_op_outside_requests(self, mock_perm):
+        from . import timing
+        with timing.stage('binom'):
+            timing.record_customer('111', 1.0)
+        func = lambda: 1
+        self.assertIs(timing.bind(func), func)
+
+
+@skipUnless(find_spec('prometheus_client'), 'prometheus_client is not installed')
+@override_settings(COMBINED_CACHE_ENABLED=True, METRICS_AUTH_TOKEN='scrape-secret')
+class MetricsTests(ReportsAPITestCase):
+    def setUp(self):
+        from django.conf import settings
+        from django.core.cache import caches
+        caches['reports'].clear()
+        GoogleAccount.objects.create(user_email=settings.GOOGLE_ACCOUNT_EMAIL, refresh_token='fake_token')
+
+    def sample(self, name, **labels):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    @patch('reports.permissions.IsGoogleOrSuperuser.has_permission', return_value=True)
+    @patch('reports.views.fetch_all_client_campaign_costs')
+    @patch('reports.views.fetch_binom_data')
+    def test_report_requests_are_counted(self, mock_binom, mock_costs, mock_perm):
+        mock_binom.return_value = [{'name': 'Acct - 250417_02 Camp (site.com)', 'revenue': '50', 'leads': '2'}]
+        mock_costs.return_value = [
+            {'Account': 'Acct', 'Campaign': 'Acct - 250417_02 Camp', 'Cost': 20.0},
+            {'Account': 'Acct', 'Campaign': 'Acct - Google only', 'Cost': 5},
+        ]
+        misses = self.sample('reports_cache_requests_total', cache='combined', result='miss')
+        hits = self.sample('reports_cache_requests_total', cache='combined', result='hit')
+        merges = self.sample('reports_merge_rows_count', side='output')
+        output_rows = self.sample('reports_merge_rows_sum', side='output')
+        view_requests = self.sample('reports_http_request_duration_seconds_count', view='combined_report', method='GET', status='200')
+
+        params = {'start_date': '2024-01-01', 'end_date': '2024-01-31'}
+        self.client.get(reverse('combined_report'), params)
+        self.client.get(reverse('combined_report'), params)
+
+        self.assertEqual(self.sample('reports_cache_requests_total', cache='combined', result='miss'), misses + 1)
+        self.assertEqual(self.sample('reports_cache_requests_total', cache='combined', result='hit'), hits + 1)
+        self.assertEqual(self.sample('reports_merge_rows_count', side='output'), merges + 1)
+        self.assertEqual(self.sample('reports_merge_rows_sum', side='output'), output_rows + 2)
+        self.assertEqual(
+            self.sample('reports_http_request_duration_seconds_count', view='combined_report', method='GET', status='200'),
+            view_requests + 2,
+        )
+
+    @override_settings(METRICS_CUSTOMER_LABELS=True)
+    @patch('reports.google_ads_reports.get_google_ads_service')
+    def test_google_ads_calls_are_counted_per_customer(self, mock_service):
+        from .google_ads_reports import fetch_campaign_costs
+        mock_service.return_value.search_stream.side_effect = [[], RuntimeError('boom')]
+        ok = self.sample('reports_upstream_requests_total', upstream='google_ads', endpoint='campaign_costs', customer_id='123', status='ok')
+        errors = self.sample('reports_upstream_requests_total', upstream='google_ads', endpoint='campaign_costs', customer_id='123', status='error')
+        fetch_campaign_costs('token', '123', None, '2024-01-01', '2024-01-31')
+        fetch_campaign_costs('token', '123', None, '2024-01-01', '2024-01-31')
+        self.assertEqual(self.sample('reports_upstream_requests_total', upstream='google_ads', endpoint='campaign_costs', customer_id='123', status='ok'), ok + 1)
+        self.assertEqual(self.sample('reports_upstream_requests_total', upstream='google_ads', endpoint='campaign_costs', customer_id='123', status='error'), errors + 1)
+        self.assertGreater(self.sample('reports_upstream_request_duration_seconds_count', upstream='google_ads', endpoint='campaign_costs', customer_id='123'), 0)
+
+    @patch('reports.google_ads_reports.get_google_ads_service')
+    def test_google_ads_calls_are_not_labelled_per_customer_by_default(self, mock_service):
+        from .google_ads_reports import fetch_campaign_costs
+        mock_service.return_value.search_stream.return_value = []
+        unlabelled = self.sample('reports_upstream_requests_total', upstream='google_ads', endpoint='campaign_costs', customer_id='', status='ok')
+        labelled = self.sample('reports_upstream_requests_total', upstream='google_ads', endpoint='campaign_costs', customer_id='456', status='ok')
+        fetch_campaign_costs('token', '456', None, '2024-01-01', '2024-01-31')
+        self.assertEqual(self.sample('reports_upstream_requests_total', upstream='google_ads', endpoint='campaign_costs', customer_id='', status='ok'), unlabelled + 1)
+        self.assertEqual(self.sample('reports_upstream_requests_total', upstream='google_ads', endpoint='campaign_costs', customer_id='456', status='ok'), labelled)
+
+    def test_endpoint_requires_the_scrape_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'# TYPE reports_upstream_requests_total counter', response.content)
@@ -0,0 +1,169 @@
+# backend/reports/timing.py
+"""
+Per-request stage timings, reported as a Server-Timing header and one log line per request.
+
+ServerTimingMiddleware opens a collector for each request; code on the request's path
+wraps its stages in ``with stage('binom'):`` and reports upstream calls per Google Ads
+customer with record_customer(). Repeated stages add up (and so do stages run on several
+threads at once, so their sum can exceed the wall time). Outside a request, e.g. in the
+job worker, nothing is collected and the helpers cost next to nothing.
+
+Collectors live in a context variable, which pool threads don't inherit: work submitted
+to a ThreadPoolExecutor has to be wrapped with bind() to be counted.
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('report_timings', default=None)
+
+# Server-Timing metric names are HTTP tokens.
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class Timings:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.customers = {}
+
+    def add(self, name, ms):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def add_customer(self, customer_id, ms):
+        with self._lock:
+            self.customers[str(customer_id)] = self.customers.get(str(customer_id), 0.0) + ms
+
+    def slowest_customers(self, limit=None):
+        with self._lock:
+            ranked = sorted(self.customers.items(), key=lambda item: item[1], reverse=True)
+        return ranked if limit is None else ranked[:limit]
+
+    def header_value(self, total_ms=None, customer_limit=5):
+        """Server-Timing value: every stage, then the ``customer_limit`` slowest customers."""
+        with self._lock:
+            stages = list(self.stages.items())
+        if total_ms is not None:
+            stages.append(('total', total_ms))
+        metrics = [f"{_UNSAFE_NAME.sub('_', name)};dur={ms:.1f}" for name, ms in stages]
+        metrics += [
+            f'ads-customer;desc="{customer_id}";dur={ms:.1f}'
+            for customer_id, ms in self.slowest_customers(customer_limit)
+        ]
+        return ", ".join(metrics)
+
+
+def start():
+    """Opens a collector for the current context; returns (timings, token for finish())."""
+    timings = Timings()
+    return timings, _current.set(timings)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """Times the block as stage ``name`` of the current request (if there is one)."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - started) * 1000)
+
+
+def record(name, ms):
+    """Adds an already measured ``ms`` to stage ``name`` of the current request."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, ms)
+
+
+def record_customer(customer_id, ms):
+    """Adds ``ms`` of Google Ads query time for ``customer_id`` to the current request."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add_customer(customer_id, ms)
+
+
+def bind(func):
+    """Wraps ``func`` so that, run on a pool thread, it reports to the caller's collector."""
+    timings = _current.get()
+    if timings is None:
+        return func
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current.set(timings)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header (stages, total and the slowest Google Ads customers) to
+    every response and logs the full breakdown of requests that recorded any stage.
+
+    DRF responses are rendered after the view returns, so the time between the view
+    returning and the middleware getting the rendered response is reported as 'serialize'.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', True):
+            return self.get_response(request)
+        started = time.perf_counter()
+        timings, token = start()
+        try:
+            request._timing_view_finished = None
+            response = self.get_response(request)
+        finally:
+            finish(token)
+        finished = time.perf_counter()
+        if request._timing_view_finished is not None:
+            timings.add('serialize', (finished - request._timing_view_finished) * 1000)
+        total_ms = (finished - started) * 1000
+
+        response['Server-Timing'] = timings.header_value(
+            total_ms, getattr(settings, 'SERVER_TIMING_TOP_CUSTOMERS', 5)
+        )
+        if timings.stages.keys() - {'serialize'}:
+            self._log(request, response, timings, total_ms)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called with the view's (not yet rendered) response.
+        request._timing_view_finished = time.perf_counter()
+        return response
+
+    def _log(self, request, response, timings, total_ms):
+        stages = " ".join(f"{name}={ms:.1f}" for name, ms in timings.stages.items())
+        customers = " ".join(f"{customer_id}={ms:.1f}" for customer_id, ms in timings.slowest_customers())
+        logger.info(
+            f"Request timing: {request.method} {request.path} status={response.status_code} "
+            f"total_ms={total_ms:.1f} stages_ms=[{stages}] customers_ms=[{customers}]",
+            extra={
+                'timing_path': request.path,
+                'timing_status': response.status_code,
+                'timing_total_ms': round(total_ms, 1),
+                'timing_stages_ms': {name: round(ms, 1) for name, ms in timings.stages.items()},
+                'timing_customers_ms': {customer_id: round(ms, 1) for customer_id, ms in timings.slowest_customers()},
+            },
+        )
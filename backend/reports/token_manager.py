@@ -0,0 +1,73 @@
+# backend/reports/token_manager.py
+"""
+Shared OAuth access-token store backed by GoogleAccount.access_token / token_expiry.
+
+Every gunicorn worker reads the same row, so a token minted by one worker is reused by
+all of them until shortly before it expires. Refreshes happen under a row lock
+(select_for_update) and re-check the row after acquiring it, so a burst of workers
+starting up results in a single refresh instead of one per worker.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .auth_utils import refresh_access_token
+from .models import GoogleAccount
+
+logger = logging.getLogger(__name__)
+
+# google-auth treats a token as expired ~225 seconds before its real expiry and rejects
+# tokens from a refresh handler that are already inside that window, so never hand out
+# a token closer to expiry than this.
+MIN_REFRESH_MARGIN_SECONDS = 300
+
+
+def _refresh_margin():
+    margin = getattr(settings, 'GOOGLE_TOKEN_REFRESH_MARGIN', MIN_REFRESH_MARGIN_SECONDS)
+    return timedelta(seconds=max(int(margin), MIN_REFRESH_MARGIN_SECONDS))
+
+
+def _is_valid(account, now=None):
+    if not account.access_token or not account.token_expiry:
+        return False
+    now = now or timezone.now()
+    return account.token_expiry - _refresh_margin() > now
+
+
+def store_access_token(account, access_token, expires_in):
+    """Persists a freshly minted access token on the given GoogleAccount."""
+    account.access_token = access_token
+    account.token_expiry = timezone.now() + timedelta(seconds=int(expires_in or 0))
+    account.save(update_fields=['access_token', 'token_expiry', 'updated_at'])
+    return account
+
+
+def get_access_token(refresh_token, force_refresh=False):
+    """
+    Returns (access_token, expiry) for the GoogleAccount owning ``refresh_token``.
+
+    The cached token is returned as long as it is valid beyond the refresh margin;
+    otherwise it is refreshed under a row lock and written back. Returns (None, None)
+    when no GoogleAccount row holds this refresh token.
+    """
+    account = (
+        GoogleAccount.objects.filter(refresh_token=refresh_token)
+        .only('id', 'access_token', 'token_expiry')
+        .order_by('-updated_at')
+        .first()
+    )
+    if account is None:
+        return None, None
+    if not force_refresh and _is_valid(account):
+        return account.access_token, account.token_expiry
+
+    with transaction.atomic():
+        account = GoogleAccount.objects.select_for_update().get(pk=account.pk)
+        # Another worker may have refreshed the token while we were waiting for the lock.
+        if not force_refresh and _is_valid(account):
+            return account.access_token, account.token_expiry
+        tokens = refresh_access_token(refresh_token)
+        store_access_token(account, tokens["access_token"], tokens.get("expires_in", 3600))
+        logger.info(f"Refreshed Google access token for {account.user_email} (expires {account.token_expiry.isoformat()})")
+    return account.access_token, account.token_expiry
@@ -1,8 +1,11 @@
 import re
 
+# Campaign IDs embedded in campaign names, e.g. "Account - 250417_02 Offer (domain.com)".
+CAMPAIGN_ID_RE = re.compile(r'(\d{6}_\d{2})')
+
 def extract_campaign_id(name):
     """
     Extracts the campaign ID pattern like 250417_02 from campaign names.
     """
-    match = re.search(r'(\d{6}_\d{2})', name)
+    match = CAMPAIGN_ID_RE.search(name)
     return match.group(1) if match else None
@@ -1,21 +1,43 @@
 # backend/reports/views.py
 from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.response import Response
 from django.contrib.auth import login, logout
 from django.contrib.auth.models import User
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.settings import api_settings
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from django.utils import timezone
+from .columnar import binom_columns, combined_columns, combined_json_columns, history_columns
+from .conditional import etag_response
+from .exports import EXPORT_CONTENT_TYPES, iter_export
 from .google_auth_service import build_auth_url, exchange_code_for_tokens, fetch_all_client_campaign_costs
-from .models import GoogleAccount
-from .report_service import fetch_binom_data
-from .permissions import IsGoogleOrSuperuser
+from .models import GoogleAccount, ReportJob
+from .report_merge import merge_report_rows
+from .report_cache import get_or_build
+from .report_history import DEFAULT_PAGE_SIZE, GROUP_FIELDS, InvalidHistoryQuery, query_report_history
+from .report_store import store_report_rows
+from .report_service import SHARD_SIZES, fetch_binom_data, filter_binom_rows, iter_binom_rows, report_params_digest
+from .single_flight import SingleFlight
+from . import metrics, timing
+from .permissions import IsGoogleOrSuperuser, IsMetricsScraperOrGoogleOrSuperuser
+from .renderers import COLUMNAR_FORMATS, COLUMNAR_RENDERERS
 
 
 logger = logging.getLogger(__name__)
 
+combined_report_flight = SingleFlight("combined-report")
+
+LAYOUTS = ("rows", "columns")
+
+# Report endpoints that can also answer ?format=parquet / ?format=arrow.
+REPORT_RENDERERS = list(api_settings.DEFAULT_RENDERER_CLASSES) + COLUMNAR_RENDERERS
+
 @api_view(['GET'])
 def google_auth_url(request):
     url = build_auth_url(request)
@@ -70,17 +92,26 @@ def google_auth_callback(request):
         return Response({"error": "Could not retrieve user email from Google's token response."}, status=400)
 
     new_refresh_token = tokens.get("refresh_token")
+    token_fields = {}
+    if tokens.get("access_token"):
+        # Seed the shared token store so the first report doesn't need another refresh.
+        token_fields = {
+            "access_token": tokens["access_token"],
+            "token_expiry": timezone.now() + timedelta(seconds=int(tokens.get("expires_in", 3600))),
+        }
     try:
         with transaction.atomic():
             account = GoogleAccount.objects.filter(user_email=user_email).first()
             if account:
                 if new_refresh_token:
                     account.refresh_token = new_refresh_token
+                    for field, value in token_fields.items():
+                        setattr(account, field, value)
                     account.save()
                 message = "Google account re-authorized successfully."
             else:
                 if new_refresh_token:
-                    GoogleAccount.objects.create(user_email=user_email, refresh_token=new_refresh_token)
+                    GoogleAccount.objects.create(user_email=user_email, refresh_token=new_refresh_token, **token_fields)
                     message = "Google account authorized and created successfully."
                 else:
                     frontend_callback_url = f'{settings.FRONTEND_URL}/auth/google/callback?email={user_email}'
@@ -110,6 +141,7 @@ def google_auth_callback(request):
     frontend_callback_url = f'{settings.FRONTEND_URL}/auth/google/callback?email={user_email}'
     return redirect(frontend_callback_url)
 
+@etag_response
 @api_view(['GET'])
 @permission_classes([IsGoogleOrSuperuser])
 def generate_report(request):
@@ -126,6 +158,10 @@ def generate_report(request):
         - timezone (IANA TZ, e.g. America/Atikokan; default)
         - trafficSourceIds (comma-separated, e.g. "1,6")
         - dateType (default: "custom-time")
+        - stream (optional, "1" to parse the Binom response incrementally; default: BINOM_STREAM_RESPONSES)
+        - shard (optional, "day" or "week": fetch the range as concurrent sub-ranges and re-aggregate; default: BINOM_SHARD_SIZE)
+        - refresh (optional, "1" to bypass the cached Binom response and store a fresh one)
+        - layout (optional, "columns" for {columns, types, data: {column: [values]}} instead of row objects)
     - Response: JSON object of Binom API report data (campaigns, leads, revenue, etc).
     - Used for verifying connectivity/parity with Binom, or for building custom reporting pipelines.
 
@@ -140,33 +176,57 @@ def generate_report(request):
     traffic_source_ids = request.GET.get("trafficSourceIds", "1,6")
     date_type = request.GET.get("dateType", "custom-time")
 
+    stream = request.GET.get("stream", str(getattr(settings, 'BINOM_STREAM_RESPONSES', False))).lower() in ("1", "true", "yes")
+    layout = _layout(request)
+    if not layout:
+        return Response({"error": f"layout must be one of: {', '.join(LAYOUTS)}."}, status=400)
+
+    if stream:
+        # Parse the Binom payload incrementally; only rows that survive the filter are kept.
+        try:
+            filtered_data = list(filter_binom_rows(iter_binom_rows(
+                start_date,
+                end_date,
+                timezone_value,
+                traffic_source_ids,
+                date_type
+            )))
+        except ValueError as e:
+            # Malformed body, or an object without rows such as Binom's {"error": ...}.
+            return Response({"error": str(e)}, status=502)
+        filtered_data.sort(key=lambda x: str(x.get('name', '')).lower())
+        return Response(_binom_layout(filtered_data, layout))
+
+    shard = request.GET.get("shard") or getattr(settings, 'BINOM_SHARD_SIZE', '') or None
+    if shard and shard not in SHARD_SIZES:
+        return Response({"error": f"shard must be one of: {', '.join(SHARD_SIZES)}."}, status=400)
+
     binom_data = fetch_binom_data(
         start_date,
         end_date,
         timezone_value,
         traffic_source_ids,
-        date_type
+        date_type,
+        shard=shard,
+        refresh=request.GET.get("refresh", "").lower() in ("1", "true", "yes")
     )
     
     # Filter, transform, and sort the data
     if isinstance(binom_data, list):
         # First filter and transform the data
-        filtered_data = [
-            {
-                'id': item.get('id'),
-                'name': item.get('name'),
-                'leads': item.get('leads', '0'),
-                'revenue': item.get('revenue', '0')
-            }
-            for item in binom_data 
-            if item.get('revenue') != "0" or item.get('leads') != "0"
-        ]
+        filtered_data = list(filter_binom_rows(binom_data))
         # Then sort by name (case-insensitive)
         filtered_data.sort(key=lambda x: str(x.get('name', '')).lower())
-        return Response(filtered_data)
+        return Response(_binom_layout(filtered_data, layout))
     
     return Response(binom_data)
 
+def _binom_layout(filtered_data, layout):
+    if layout == "columns":
+        return {**binom_columns(filtered_data), 'total_rows': len(filtered_data)}
+    return filtered_data
+
+@etag_response
 @api_view(['GET'])
 @permission_classes([IsGoogleOrSuperuser])
 def google_ads_test_view(request):
@@ -197,253 +257,313 @@ def google_ads_test_view(request):
 from django.conf import settings
 from django.shortcuts import redirect
 from django.shortcuts import redirect
+from django.urls import reverse
 import os
 
-@api_view(['GET'])
-@permission_classes([IsGoogleOrSuperuser])
-def combined_report_view(request):
-    """
-    Combined report: merges Binom and Google Ads data, stores result, pushes to Google Sheets, returns local table and sheet URLs.
-    Accepts: start_date, end_date (YYYY-MM-DD)
-    """
-    start_date = request.GET.get("start_date")
-    end_date = request.GET.get("end_date")
-    # Constants from .env or settings
+def combined_report_account():
+    """GoogleAccount whose refresh token the combined report uses, or None if it can't be used."""
     EMAIL = getattr(settings, 'GOOGLE_ACCOUNT_EMAIL', os.environ.get('GOOGLE_ACCOUNT_EMAIL'))
+    account = GoogleAccount.objects.filter(user_email=EMAIL).first()
+    if not account or not account.refresh_token:
+        return None
+    return account
+
+def combined_report_key(start_date, end_date):
+    """Normalized identity of a combined report: range plus the upstream settings that shape it."""
     TRAFFIC_SOURCE_IDS = getattr(settings, 'TRAFFIC_SOURCE_IDS', os.environ.get('TRAFFIC_SOURCE_IDS', '1,6'))
     TIMEZONE = getattr(settings, 'DEFAULT_TIMEZONE', os.environ.get('DEFAULT_TIMEZONE', 'America/Atikokan'))
     DATE_TYPE = getattr(settings, 'DEFAULT_DATE_TYPE', os.environ.get('DEFAULT_DATE_TYPE', 'custom-time'))
+    return report_params_digest(start_date, end_date, TIMEZONE, TRAFFIC_SOURCE_IDS, DATE_TYPE)
 
-    # 1. Fetch Binom data
-    binom_data = fetch_binom_data(
+def build_combined_report_once(account, start_date, end_date, stats=None, refresh=False):
+    """
+    build_combined_report with concurrent identical requests coalesced: one caller (in this
+    process or, through a file lock, in another worker) fetches, the others share its rows.
+    Forced refreshes only coalesce with each other, never with a build that used cached Binom data.
+    """
+    key = combined_report_key(start_date, end_date)
+    return combined_report_flight.do(
+        f"{key}:refresh" if refresh else key,
+        build_combined_report,
+        account,
         start_date,
         end_date,
-        TIMEZONE,
-        TRAFFIC_SOURCE_IDS,
-        DATE_TYPE
+        refresh=refresh,
+        stats=stats,
     )
-    # 2. Fetch Google Ads data
-    account = GoogleAccount.objects.filter(user_email=EMAIL).first()
-    if not account or not account.refresh_token:
-        return Response({"error": "."}, status=400)
-    google_ads_data = fetch_all_client_campaign_costs(account.refresh_token, start_date, end_date)
+
+def build_combined_report(account, start_date, end_date, refresh=False):
+    """
+    Fetches Binom and Google Ads data for the range, merges them and stores the result.
+    Returns the merged CampaignRow list. Shared by combined_report_view and the report job worker.
+    ``refresh=True`` bypasses the Binom cache.
+    """
+    # Constants from .env or settings
+    TRAFFIC_SOURCE_IDS = getattr(settings, 'TRAFFIC_SOURCE_IDS', os.environ.get('TRAFFIC_SOURCE_IDS', '1,6'))
+    TIMEZONE = getattr(settings, 'DEFAULT_TIMEZONE', os.environ.get('DEFAULT_TIMEZONE', 'America/Atikokan'))
+    DATE_TYPE = getattr(settings, 'DEFAULT_DATE_TYPE', os.environ.get('DEFAULT_DATE_TYPE', 'custom-time'))
+
+    # 1 + 2. Fetch Binom and Google Ads data concurrently. Binom is plain HTTP, so it runs on
+    # a helper thread while the Google Ads fetch (which also touches the DB) stays on the
+    # calling thread. future.result() re-raises any Binom error once both sides are done.
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="binom-fetch") as executor:
+        binom_future = executor.submit(
+            timing.bind(fetch_binom_data),
+            start_date,
+            end_date,
+            TIMEZONE,
+            TRAFFIC_SOURCE_IDS,
+            DATE_TYPE,
+            shard=getattr(settings, 'BINOM_SHARD_SIZE', '') or None,
+            refresh=refresh
+        )
+        google_ads_data = fetch_all_client_campaign_costs(account.refresh_token, start_date, end_date, as_rows=True)
+        binom_data = binom_future.result()
 
     # 3. Merge/align data by campaign ID and name
-    import re
-    
-    def normalize_campaign_name(name):
-        """Normalize campaign name by removing the domain part and extra spaces"""
-        if not name:
-            return ''
-        # Remove anything in parentheses (domain part)
-        name = re.sub(r'\([^)]*\)', '', str(name))
-        # Remove extra spaces and trim
-        return ' '.join(name.split()).strip()
-    
-    def extract_campaign_id(s):
-        if not s:
-            return None
-        # Look for patterns like 250417_02
-        match = re.search(r'(\d{6}_\d{2})', str(s))
-        return match.group(1) if match else None
-    
-    def get_campaign_key(campaign_name):
-        """Create a consistent key for matching campaigns"""
-        if not campaign_name:
-            return None
-        # Extract the campaign ID if exists
-        cid = extract_campaign_id(campaign_name)
-        if cid:
-            return cid
-        # If no ID, use the normalized campaign name
-        return normalize_campaign_name(campaign_name)
-
-    # Prepare Binom dict: {campaign_key: row}
-    binom_rows = binom_data['data'] if isinstance(binom_data, dict) and 'data' in binom_data else binom_data
-    binom_lookup = {}
-    for row in binom_rows or []:
-        campaign_name = row.get('name', '')
-        key = get_campaign_key(campaign_name)
-        if key:
-            binom_lookup[key] = row
-
-    # Prepare Google Ads dict: {campaign_key: row}
-    google_rows = google_ads_data['data'] if isinstance(google_ads_data, dict) and 'data' in google_ads_data else google_ads_data
-    google_lookup = {}
-    for row in google_rows or []:
-        campaign_name = row.get('Campaign', '')
-        key = get_campaign_key(campaign_name)
-        if key:
-            google_lookup[key] = row
-
-    # Merge by campaign key (ID or normalized name)
-    combined_rows = []
-    matched_keys = set()
-    
-    # First, process all campaigns that exist in both Binom and Google Ads
-    common_keys = set(binom_lookup.keys()) & set(google_lookup.keys())
-    for key in common_keys:
-        binom_row = binom_lookup[key]
-        google_row = google_lookup[key]
-        
-        # Get account name from Google or extract from campaign name
-        account_name = google_row.get('Account', '')
-        if not account_name and ' - ' in str(binom_row.get('name', '')):
-            account_name = str(binom_row.get('name', '')).split(' - ')[0].strip()
-            
-        campaign_name = binom_row.get('name', '')
-        # Remove domain part if exists
-        campaign_name = campaign_name.split(' (')[0].strip()
-        
-        total_spend = float(google_row.get('Cost', 0))
-        revenue = float(binom_row.get('revenue', 0))
-        sales = binom_row.get('leads', '0')
-        
-        # Calculate P/L and ROI
-        pl_value = revenue - total_spend
-        roi_value = ((revenue / total_spend) - 1) if total_spend else 0
-        
-        combined_rows.append({
-            'ACCOUNT NAME': account_name,
-            'CAMPAIGN NAME': campaign_name,
-            'TOTAL SPEND': total_spend,
-            'REVENUE': revenue,
-            'P/L': pl_value,
-            'P/L_FORMULA': f'=D{len(combined_rows) + 2}-C{len(combined_rows) + 2}',
-            'ROI': f'{roi_value:.2%}' if total_spend else '',
-            'ROI_VALUE': roi_value if total_spend else 0,
-            'ROI_FORMULA': f'=(D{len(combined_rows) + 2}/C{len(combined_rows) + 2})-1' if total_spend else '',
-            'SALES': sales
-        })
-        matched_keys.add(key)
-    
-    # Add Binom-only campaigns (present in Binom but not in Google Ads)
-    binom_only_keys = set(binom_lookup.keys()) - matched_keys
-    for key in binom_only_keys:
-        binom_row = binom_lookup[key]
-        campaign_name = binom_row.get('name', '')
-        
-        # Extract account name from campaign name if it follows the pattern
-        account_name = ''
-        if ' - ' in str(campaign_name):
-            account_name = str(campaign_name).split(' - ')[0].strip()
-        
-        # Remove domain part if exists
-        campaign_name = campaign_name.split(' (')[0].strip()
-        
-        total_spend = 0
-        revenue = float(binom_row.get('revenue', 0))
-        sales = binom_row.get('leads', '0')
-        
-        combined_rows.append({
-            'ACCOUNT NAME': account_name,
-            'CAMPAIGN NAME': campaign_name,
-            'TOTAL SPEND': total_spend,
-            'REVENUE': revenue,
-            'P/L': revenue,  # P/L is same as revenue when spend is 0
-            'P/L_FORMULA': f'=D{len(combined_rows) + 2}-C{len(combined_rows) + 2}',
-            'ROI': '',  # No ROI when there's no spend
-            'ROI_VALUE': 0,
-            'ROI_FORMULA': '',
-            'SALES': sales
-        })
-    
-    # Add Google Ads-only campaigns (present in Google but not in Binom)
-    google_only_keys = set(google_lookup.keys()) - matched_keys
-    for key in google_only_keys:
-        google_row = google_lookup[key]
-        campaign_name = google_row.get('Campaign', '')
-        
-        # Extract account name from Google data or campaign name
-        account_name = google_row.get('Account', '')
-        if not account_name and ' - ' in str(campaign_name):
-            account_name = str(campaign_name).split(' - ')[0].strip()
-        
-        # Remove domain part if exists
-        campaign_name = campaign_name.split(' (')[0].strip()
-        
-        total_spend = float(google_row.get('Cost', 0))
-        revenue = 0  # No revenue data from Google Ads
-        
-        combined_rows.append({
-            'ACCOUNT NAME': account_name,
-            'CAMPAIGN NAME': campaign_name,
-            'TOTAL SPEND': total_spend,
-            'REVENUE': revenue,
-            'P/L': -total_spend,  # Negative P/L when there's no revenue
-            'P/L_FORMULA': f'=D{len(combined_rows) + 2}-C{len(combined_rows) + 2}',
-            'ROI': '-100.00%',  # -100% ROI when there's no revenue
-            'ROI_VALUE': -1,
-            'ROI_FORMULA': f'=(D{len(combined_rows) + 2}/C{len(combined_rows) + 2})-1',
-            'SALES': '0'  # No sales data from Google Ads
-        })
-    # Columns for frontend DataGrid
-    columns = [
-        {"field": "ACCOUNT NAME", "headerName": "ACCOUNT NAME", "width": 180},
-        {"field": "CAMPAIGN NAME", "headerName": "CAMPAIGN NAME", "width": 300},
-        {"field": "TOTAL SPEND", "headerName": "TOTAL SPEND", "width": 130},
-        {"field": "REVENUE", "headerName": "REVENUE", "width": 130},
-        {"field": "P/L", "headerName": "P/L", "width": 120},
-        {"field": "ROI", "headerName": "ROI", "width": 120},
-        {"field": "SALES", "headerName": "SALES", "width": 100}
-    ]
-    # Sort by ACCOUNT NAME, then by CAMPAIGN NAME (both case-insensitive)
-    combined_rows.sort(key=lambda x: (str(x.get('ACCOUNT NAME', '')).lower(), str(x.get('CAMPAIGN NAME', '')).lower()))
-    # Add id for DataGrid
-    for i, row in enumerate(combined_rows):
-        row['id'] = i
-
-    # 4. Store in DB (stub)
-    # TODO: Implement DB storage for historical/ROI
+    with timing.stage('merge'):
+        final_output = merge_report_rows(binom_data, google_ads_data)
+
+    # 4. Store in DB (batched upsert, re-running a range updates its rows in place)
+    if getattr(settings, 'REPORT_STORE_ENABLED', True) and start_date and end_date:
+        try:
+            with timing.stage('store'):
+                store_report_rows(final_output, start_date, end_date)
+        except Exception as e:
+            # The report itself is still returned; history just misses this run.
+            logger.error(f"Failed to store combined report for {start_date}..{end_date}: {e}", exc_info=True)
 
     # 5. Push to Google Sheets (stub)
     sheet_url = None
     sheet_preview_url = None
     # TODO: Implement Google Sheets API integration
 
-    # 6. Return data
-    # Clean and filter combined_rows before returning
-    cleaned_rows = []
-    for row in combined_rows:
-        # Exclude if both ACCOUNT NAME and CAMPAIGN NAME are empty
-        if not str(row.get("ACCOUNT NAME", "")).strip() and not str(row.get("CAMPAIGN NAME", "")).strip():
-            continue
-        # Exclude if both TOTAL SPEND and REVENUE are zero
-        try:
-            spend = float(row.get("TOTAL SPEND", 0))
-            revenue = float(row.get("REVENUE", 0))
-        except (TypeError, ValueError):
-            spend = revenue = 0
-        if spend == 0 and revenue == 0:
-            continue
-        # Remove formula fields and ROI_VALUE
-        cleaned_row = {k: v for k, v in row.items() 
-                     if k not in ['P/L_FORMULA', 'ROI_FORMULA', 'ROI_VALUE', 'id']}
-        cleaned_rows.append(cleaned_row)
-    
-    # 4. Sort the cleaned rows by Account and Campaign name
-    cleaned_rows.sort(key=lambda x: (
-        str(x.get('ACCOUNT NAME', '')).lower(),
-        str(x.get('CAMPAIGN NAME', '')).lower()
-    ))
-    
-    # 5. Format the final output as specified
-    final_output = []
-    for row in cleaned_rows:
-        final_output.append({
-            'Account': row.get('ACCOUNT NAME', ''),
-            'Campaign': row.get('CAMPAIGN NAME', '').split(' (')[0],  # Remove domain part if exists
-            'Total Spend': row.get('TOTAL SPEND', 0),
-            'Revenue': row.get('REVENUE', 0),
-            'Sales': row.get('SALES', 0)
-        })
-    
-    return Response({
-        'data': final_output,
+    return final_output
+
+def combined_report_payload(rows, start_date, end_date):
+    return {
+        'data': [row.to_dict() for row in rows],
         'start_date': start_date,
         'end_date': end_date,
-        'total_rows': len(final_output)
-    })
+        'total_rows': len(rows)
+    }
+
+def _layout(request):
+    """'rows' (default) or 'columns' from ?layout=; None for anything else."""
+    layout = request.GET.get("layout", "rows")
+    return layout if layout in LAYOUTS else None
+
+def _refresh_requested(request):
+    return request.GET.get("refresh", "").lower() in ("1", "true", "yes")
+
+def load_combined_report(account, start_date, end_date, refresh=False, cache_stats=None, flight_stats=None):
+    """Combined report rows, through the stale-while-revalidate cache when it is enabled."""
+    if not getattr(settings, 'COMBINED_CACHE_ENABLED', True):
+        return build_combined_report_once(account, start_date, end_date, stats=flight_stats, refresh=refresh)
+    return get_or_build(
+        f"combined:{combined_report_key(start_date, end_date)}",
+        # Background rebuilds of stale entries keep using the Binom cache; only ?refresh=1 skips it.
+        lambda: build_combined_report_once(account, start_date, end_date, stats=flight_stats, refresh=refresh),
+        refresh=refresh,
+        stats=cache_stats,
+    )
+
+@etag_response
+@api_view(['GET'])
+@renderer_classes(REPORT_RENDERERS)
+@permission_classes([IsGoogleOrSuperuser])
+def combined_report_view(request):
+    """
+    Combined report: merges Binom and Google Ads data, stores result, pushes to Google Sheets, returns local table and sheet URLs.
+    Accepts: start_date, end_date (YYYY-MM-DD), refresh=1 to bypass the cached copy.
+    Cached results are served immediately (stale ones are rebuilt in the background); the
+    Age and X-Report-Cache (hit, stale, miss, refresh) headers tell how fresh the data is.
+    Server-Timing breaks the request down by stage (binom, hierarchy, ads, merge, store, serialize)
+    and lists the slowest Google Ads customers.
+    ?format=parquet / ?format=arrow return the rows (with P/L, ROI and the date range) as a typed columnar file;
+    ?layout=columns returns {columns, types, data: {column: [values]}} instead of a list of row objects.
+    For long ranges prefer POST /api/combined-report/jobs/, which runs the same report on the job worker.
+    """
+    start_date = request.GET.get("start_date")
+    end_date = request.GET.get("end_date")
+    layout = _layout(request)
+    if not layout:
+        return Response({"error": f"layout must be one of: {', '.join(LAYOUTS)}."}, status=400)
+
+    account = combined_report_account()
+    if not account:
+        return Response({"error": "."}, status=400)
+
+    flight_stats = {}
+    cache_stats = {}
+    # 'report' covers the cache lookup plus, on a miss, the binom/hierarchy/ads/merge/store stages.
+    with timing.stage('report'):
+        final_output = load_combined_report(
+            account,
+            start_date,
+            end_date,
+            refresh=_refresh_requested(request),
+            cache_stats=cache_stats,
+            flight_stats=flight_stats,
+        )
+
+    # 6. Return data
+    with timing.stage('payload'):
+        if request.accepted_renderer.format in COLUMNAR_FORMATS:
+            response = Response(combined_columns(final_output, start_date, end_date))
+            response["Content-Disposition"] = (
+                f'attachment; filename="combined-report_{start_date}_{end_date}.{request.accepted_renderer.format}"'
+            )
+        elif layout == "columns":
+            response = Response({
+                **combined_json_columns(final_output),
+                'start_date': start_date,
+                'end_date': end_date,
+                'total_rows': len(final_output)
+            })
+        else:
+            response = Response(combined_report_payload(final_output, start_date, end_date))
+    if cache_stats:
+        response["X-Report-Cache"] = cache_stats["status"]
+        response["Age"] = str(cache_stats["age"])
+    if flight_stats:
+        response["X-Report-Coalesced"] = flight_stats["role"]
+    return response
+
+@api_view(['GET'])
+@permission_classes([IsGoogleOrSuperuser])
+def combined_report_export(request, export_format):
+    """
+    Streams the combined report as CSV or NDJSON (one JSON object per line), including P/L
+    and ROI (%). The rows are loaded first (so upstream failures get a normal 502 error) and
+    then encoded in chunks while the response is sent, never as one full payload.
+    Usage: /api/combined-report/export/csv/?start_date=2025-01-01&end_date=2025-12-31 (refresh=1 optional)
+    """
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return Response({"error": f"Unsupported export format: {export_format}. Use one of: {', '.join(EXPORT_CONTENT_TYPES)}."}, status=404)
+    start_date = request.GET.get("start_date")
+    end_date = request.GET.get("end_date")
+    if not start_date or not end_date:
+        return Response({"error": "Missing required query parameters: start_date, end_date"}, status=400)
+    account = combined_report_account()
+    if not account:
+        return Response({"error": "."}, status=400)
+
+    try:
+        rows = load_combined_report(account, start_date, end_date, refresh=_refresh_requested(request))
+    except Exception as e:
+        logger.error(f"Combined report export for {start_date}..{end_date} failed: {e}", exc_info=True)
+        return Response({"error": f"Could not load the combined report: {e}"}, status=502)
+
+    response = StreamingHttpResponse(
+        iter_export(export_format, rows, start_date, end_date),
+        content_type=EXPORT_CONTENT_TYPES[export_format],
+    )
+    response["Content-Disposition"] = f'attachment; filename="combined-report_{start_date}_{end_date}.{export_format}"'
+    return response
+
+@api_view(['POST'])
+@permission_classes([IsGoogleOrSuperuser])
+def combined_report_job_create(request):
+    """
+    Queues a combined report and returns right away with the job ID (HTTP 202); the report
+    runs on `manage.py run_report_worker`. Poll the returned status_url for the result.
+    Accepts: start_date, end_date (YYYY-MM-DD)
+    """
+    start_date = request.data.get("start_date") or request.GET.get("start_date")
+    end_date = request.data.get("end_date") or request.GET.get("end_date")
+    if not start_date or not end_date:
+        return Response({"error": "Missing required parameters: start_date, end_date"}, status=400)
+    try:
+        start_date, end_date = date.fromisoformat(str(start_date)), date.fromisoformat(str(end_date))
+    except ValueError:
+        return Response({"error": "start_date and end_date must be YYYY-MM-DD."}, status=400)
+    if end_date < start_date:
+        return Response({"error": "end_date must not be before start_date."}, status=400)
+    if not combined_report_account():
+        return Response({"error": "."}, status=400)
+
+    job = ReportJob.objects.create(
+        start_date=start_date,
+        end_date=end_date,
+        requested_by=getattr(request.user, 'email', '') or '',
+    )
+    return Response(
+        {
+            'job_id': job.pk,
+            'status': job.status,
+            'status_url': reverse('combined_report_job', args=[job.pk]),
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+@api_view(['GET'])
+@permission_classes([IsGoogleOrSuperuser])
+def combined_report_job_status(request, job_id):
+    """Status of a queued combined report; includes the report payload once it has succeeded."""
+    job = ReportJob.objects.filter(pk=job_id).first()
+    if not job:
+        return Response({"error": f"Report job {job_id} not found."}, status=404)
+    data = {
+        'job_id': job.pk,
+        'status': job.status,
+        'start_date': job.start_date,
+        'end_date': job.end_date,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
+    if job.status == ReportJob.STATUS_FAILED:
+        data['error'] = job.error
+    if job.status == ReportJob.STATUS_SUCCEEDED:
+        data['result'] = job.result
+    return Response(data)
+
+@api_view(['GET'])
+@renderer_classes(REPORT_RENDERERS)
+@permission_classes([IsGoogleOrSuperuser])
+def report_history_view(request):
+    """
+    Historical report totals from stored ReportRecords; never calls Binom or Google Ads.
+    Accepts: start_date, end_date, account, campaign, group_by (account|campaign|date),
+    report_type (default daily), page_size, cursor (next_cursor of the previous page).
+    With ?format=parquet / ?format=arrow the page is a typed columnar file and the cursor
+    moves to the X-Next-Cursor header.
+    """
+    group_by = request.GET.get("group_by", "account")
+    try:
+        rows, next_cursor = query_report_history(
+            start_date=request.GET.get("start_date"),
+            end_date=request.GET.get("end_date"),
+            account=request.GET.get("account"),
+            campaign=request.GET.get("campaign"),
+            group_by=group_by,
+            report_type=request.GET.get("report_type", "daily"),
+            cursor=request.GET.get("cursor"),
+            page_size=request.GET.get("page_size", DEFAULT_PAGE_SIZE),
+        )
+    except InvalidHistoryQuery as e:
+        return Response({"error": str(e)}, status=400)
+    if request.accepted_renderer.format in COLUMNAR_FORMATS:
+        response = Response(history_columns(rows, GROUP_FIELDS[group_by]))
+        if next_cursor:
+            response["X-Next-Cursor"] = next_cursor
+        return response
+    return Response({'results': rows, 'next_cursor': next_cursor})
+
+@api_view(['GET'])
+@permission_classes([IsMetricsScraperOrGoogleOrSuperuser])
+def metrics_view(request):
+    """
+    Prometheus metrics in text format: upstream call counts and latency by endpoint and
+    customer, report cache hits, merge row counts and per-view request latency. Summed over
+    all workers when PROMETHEUS_MULTIPROC_DIR is set. Scrapers authenticate with
+    `Authorization: Bearer <METRICS_AUTH_TOKEN>`.
+    """
+    if not metrics.enabled():
+        return Response({"error": "prometheus_client is not installed."}, status=503)
+    body, content_type = metrics.render()
+    return HttpResponse(body, content_type=content_type)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -456,6 +576,8 @@ def google_ads_manager_check(request):
     """
     Lists all accounts in the hierarchy, including their name, ID, parent, and manager status.
     This is a diagnostic endpoint to verify account discovery.
+    Optional ?mode=flat|tree picks the discovery strategy; the number of upstream queries and
+    the discovery time are returned in the X-Discovery-Queries / X-Discovery-Duration-Ms headers.
     Usage: /api/google-ads/manager-check/?email=your-email@example.com
     """
     email = request.GET.get("email")
@@ -468,9 +590,43 @@ def google_ads_manager_check(request):
 
     # Use the enhanced function that gets all accounts and their details.
     from .google_auth_service import get_all_accounts_in_hierarchy
-    all_accounts = get_all_accounts_in_hierarchy(account.refresh_token)
-    
-    return Response(all_accounts)
+    mode = request.GET.get("mode")
+    if mode and mode not in ("flat", "tree"):
+        return Response({"error": "mode must be 'flat' or 'tree'."}, status=400)
+    stats = {}
+    all_accounts = get_all_accounts_in_hierarchy(account.refresh_token, mode=mode, stats=stats)
+
+    response = Response(all_accounts)
+    if stats:
+        response["X-Discovery-Mode"] = stats["mode"]
+        response["X-Discovery-Queries"] = str(stats["query_count"])
+        response["X-Discovery-Duration-Ms"] = str(stats["duration_ms"])
+    return response
+
+@api_view(['POST'])
+@permission_classes([IsGoogleOrSuperuser])
+def google_ads_hierarchy_refresh(request):
+    """
+    Re-walks the Google Ads MCC tree and replaces the stored hierarchy snapshot.
+    Report endpoints read the snapshot and only re-walk on their own once it is older than
+    GOOGLE_ADS_HIERARCHY_TTL; use this after linking or unlinking accounts.
+    Usage: POST /api/google-ads/hierarchy/refresh/ (optional: email)
+    """
+    email = request.data.get("email") or request.GET.get("email") or settings.GOOGLE_ACCOUNT_EMAIL
+    account = GoogleAccount.objects.filter(user_email=email).first()
+    if not account or not account.refresh_token:
+        return Response({"error": f"GoogleAccount with a refresh token not found for email: {email}."}, status=404)
+
+    from .google_auth_service import refresh_account_hierarchy
+    snapshot = refresh_account_hierarchy(account.refresh_token)
+    return Response({
+        "root_customer_id": snapshot.root_customer_id,
+        "account_count": snapshot.account_count,
+        "discovery_mode": snapshot.discovery_mode,
+        "query_count": snapshot.query_count,
+        "discovery_ms": snapshot.discovery_ms,
+        "refreshed_at": snapshot.refreshed_at,
+    })
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])